@@ -0,0 +1,75 @@
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+from pathlib import Path
+
+from extensions.kinematics.fk import kinematics_of
+from extensions.kinematics.registry import available_models, load_model
+
+
+def best_ms(fn, repeat: int) -> float:
+    """Лучшее время из repeat запусков, мс."""
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t) * 1e3)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Прямая кинематика: DHKinematics против fkine roboticstoolbox")
+    parser.add_argument("model", nargs="?", default="lbr_iiwa7_r800",
+                        help=f"модель из extensions/kinematics/models ({', '.join(available_models())}) или путь")
+    parser.add_argument("-n", "--samples", type=int, default=10_000, help="конфигураций в пакете")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="запусков на вариант (лучшее время)")
+    parser.add_argument("-o", "--output", type=str, default=None, help="дописать результаты в JSON-файл")
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    kin = kinematics_of(model)
+    robot = model.to_rtb()
+    q = np.random.default_rng(0).uniform(model.qlim[0], model.qlim[1], (args.samples, model.n))
+
+    # точность: ядро против fkine по каждой конфигурации
+    T_kin = kin.fkine(q)
+    T_rtb = np.array([robot.fkine(qi).A for qi in q])
+    error = float(np.max(np.abs(T_kin - T_rtb)))
+
+    out = np.empty_like(T_kin)
+    variants = [
+        ("fkine в цикле (SE3 на конфигурацию)", lambda: [robot.fkine(qi).A for qi in q], 1),
+        ("fkine пакетом (SE3 с N позами)", lambda: robot.fkine(q), args.repeat),
+        ("DHKinematics.fkine", lambda: kin.fkine(q), args.repeat),
+        ("DHKinematics.fkine(out=...)", lambda: kin.fkine(q, out=out), args.repeat),
+    ]
+
+    rows = []
+    print(f"[INFO] {model.name}: N = {args.samples}, наибольшее расхождение с fkine {error:.1e}")
+    print(f"{'вариант':<38} {'время, мс':>10} {'мкс/поза':>9} {'ускорение':>10}")
+    reference = None
+    for name, fn, repeat in variants:
+        ms = best_ms(fn, repeat)
+        reference = reference or ms
+        print(f"{name:<38} {ms:>10.1f} {ms * 1e3 / args.samples:>9.2f} {reference / ms:>9.0f}x")
+        rows.append({"variant": name, "ms": ms, "speedup": reference / ms})
+
+    if args.output:
+        path = Path(args.output)
+        history = json.loads(path.read_text(encoding="utf-8")) if path.exists() else []
+        history.append({"time": time.strftime("%Y-%m-%d %H:%M:%S"), "python": sys.version.split()[0],
+                        "model": model.name, "samples": args.samples, "error": error, "results": rows})
+        path.write_text(json.dumps(history, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[INFO] Результаты дописаны в {path}")
+
+
+if __name__ == "__main__":
+    main()
+
+
+# python benchmark_fk.py                           — LBR iiwa 7 R800, N = 10 000
+# python benchmark_fk.py lbr_iiwa7_r800 -n 100000 -r 10 -o fk_history.json
@@ -0,0 +1,142 @@
+import io
+import sys
+import json
+import time
+import types
+import argparse
+import contextlib
+
+import numpy as np
+
+from pathlib import Path
+
+# сцены строятся вызовами ObstacleSpawner; вне Webots модуль controller заменяется пустым,
+# а узлы сцены не создаются — препятствия только регистрируются в CollisionWorld
+try:
+    import controller  # noqa: F401
+except ImportError:
+    controller = types.ModuleType("controller")
+    controller.Supervisor = controller.Node = object
+    sys.modules["controller"] = controller
+
+from extensions.kinematics.collision import CollisionWorld
+from extensions.kinematics.planner import RRTConnect, TrajectoryPlannerComponent
+from extensions.kinematics.robot_models import LBRiiwaR800Model
+from extensions.webots.spawner import ObstacleSpawner
+
+
+class _OfflineScene:
+    """Минимальный супервизор для ObstacleSpawner без Webots: узлы сцены никуда не вставляются."""
+
+    def getBasicTimeStep(self) -> float:
+        return 16.0
+
+    def getRoot(self):
+        return self
+
+    def getField(self, name: str):
+        return self
+
+    def importMFNodeFromString(self, position: int, node_string: str):
+        pass
+
+    def step(self, timestep: int) -> int:
+        return 0
+
+
+# сцена: препятствия (вызовы ObstacleSpawner, база робота в начале мировых координат), старт и цель
+_Q_LEFT = [-1.0, 0.6, 0.0, -1.2, 0.0, 1.2, 0.0]
+_Q_RIGHT = [1.0, 0.6, 0.0, -1.2, 0.0, 1.2, 0.0]
+SCENES = {
+    # стена перед роботом между двумя позами подхода
+    "wall": ([("spawn_box", (0.55, 0.0, 0.45), {"size": (0.1, 0.25, 0.9), "name": "WALL"})],
+             _Q_LEFT, _Q_RIGHT),
+    # стойка с полкой сверху: обход только сбоку от стойки под полкой
+    "pillars": ([("spawn_cylinder", (0.5, 0.0, 0.3), {"radius": 0.06, "height": 0.6, "name": "PILLAR"}),
+                 ("spawn_box", (0.5, 0.0, 0.75), {"size": (0.3, 0.3, 0.02), "name": "TOP"})],
+                _Q_LEFT, _Q_RIGHT),
+    # тонкий барьер вдоль стола между позами захвата и укладки
+    "barrier": ([("spawn_box", (0.45, 0.2, 0.2), {"size": (0.04, 0.8, 0.4), "name": "BARRIER"})],
+                [0.454, 0.563, 0.832, -1.657, -0.453, 1.126, 1.409],
+                [0.082, 0.645, 0.13, -1.326, -0.084, 1.176, 0.219]),
+}
+
+
+def build_scene(model, name: str) -> tuple[CollisionWorld, np.ndarray, np.ndarray]:
+    """:return: мир препятствий сцены, стартовая и целевая конфигурации"""
+    world = CollisionWorld(model)
+    spawner = ObstacleSpawner(supervisor=_OfflineScene(), collision_world=world)
+    obstacles, q_start, q_goal = SCENES[name]
+    for method, translation, kwargs in obstacles:
+        getattr(spawner, method)(translation, **kwargs)
+    return world, np.asarray(q_start, dtype=float), np.asarray(q_goal, dtype=float)
+
+
+def path_length(path: np.ndarray) -> float:
+    return float(np.sum(np.linalg.norm(np.diff(path, axis=0), axis=1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Обход препятствий RRT-Connect на тестовых сценах")
+    parser.add_argument("names", nargs="*", help=f"сцены ({', '.join(SCENES)}; по умолчанию — все)")
+    parser.add_argument("-s", "--seeds", type=int, default=20, help="запусков RRT-Connect на сцену (зёрна 0..s-1)")
+    parser.add_argument("-b", "--budget", type=float, default=2.0, help="время на поиск пути, с")
+    parser.add_argument("--detour-time", type=float, default=1.0, help="detour_time планировщика для plan(), с")
+    parser.add_argument("-o", "--output", type=str, default=None, help="дописать результаты в JSON-файл")
+    args = parser.parse_args()
+
+    model = LBRiiwaR800Model()
+    names = args.names or list(SCENES)
+
+    rows = []
+    print(f"{'сцена':<9} {'успех':>7} {'медиана, мс':>12} {'макс, мс':>9} {'путь / прямо, рад':>18} "
+          f"{'plan(), мс':>11}  траектория")
+    for name in names:
+        world, q_start, q_goal = build_scene(model, name)
+        if np.any(world.in_collision(np.array([q_start, q_goal]))):
+            print(f"{name:<9} [WARN] старт или цель в столкновении — сцена пропущена")
+            continue
+        if RRTConnect(model, world).edge_free(q_start, q_goal):
+            print(f"[WARN] {name}: прямой путь свободен — обход не нужен")
+
+        times, lengths = [], []
+        for seed in range(args.seeds):
+            rrt = RRTConnect(model, world, seed=seed)
+            t = time.perf_counter()
+            path = rrt.plan(q_start, q_goal, time_budget=args.budget)
+            times.append((time.perf_counter() - t) * 1e3)
+            if path is not None:
+                lengths.append(path_length(path))
+
+        planer = TrajectoryPlannerComponent(model, dt=0.016, profile="scurve", collision=world,
+                                            detour_time=args.detour_time)
+        t = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            planned = planer.plan(q_start, None, None, q_target=q_goal)
+        plan_ms = (time.perf_counter() - t) * 1e3
+        free = planned and not world.check(planer.trajectory).collides
+
+        direct = float(np.linalg.norm(q_goal - q_start))
+        length = float(np.mean(lengths)) if lengths else float("nan")
+        status = "без столкновений" if free else "[WARN] не спланирована или задевает препятствия"
+        print(f"{name:<9} {len(lengths):>3}/{args.seeds:<3} {np.median(times):>12.0f} {np.max(times):>9.0f} "
+              f"{length:>9.2f} / {direct:<6.2f} {plan_ms:>11.0f}  {status}")
+        rows.append({"scene": name, "success": len(lengths), "seeds": args.seeds,
+                     "median_ms": float(np.median(times)), "max_ms": float(np.max(times)),
+                     "path_rad": length, "direct_rad": direct, "plan_ms": plan_ms, "free": bool(free)})
+
+    if args.output:
+        path = Path(args.output)
+        history = json.loads(path.read_text(encoding="utf-8")) if path.exists() else []
+        history.append({"time": time.strftime("%Y-%m-%d %H:%M:%S"), "python": sys.version.split()[0],
+                        "budget": args.budget, "results": rows})
+        path.write_text(json.dumps(history, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[INFO] Результаты дописаны в {path}")
+
+
+if __name__ == "__main__":
+    main()
+
+
+# python benchmark_rrt.py                          — все сцены, 20 зёрен, 2 с на поиск
+# python benchmark_rrt.py wall barrier -s 50 -o rrt_history.json
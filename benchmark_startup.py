@@ -0,0 +1,101 @@
+import ast
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent
+CONTROLLERS = ROOT / "controllers"
+
+# время до первого шага — импорт модулей контроллера; вне Webots модуль controller
+# заменяется пустым (его собственный импорт дешёвый и от нас не зависит)
+_PROLOGUE = """
+import sys, time, types
+try:
+    import controller
+except ImportError:
+    controller = types.ModuleType("controller")
+    controller.__getattr__ = lambda name: type(name, (), {{}})
+    sys.modules["controller"] = controller
+t0 = time.perf_counter()
+sys.path[:0] = [{controllers!r}, {root!r}]
+{imports}
+t1 = time.perf_counter()
+print((t1 - t0) * 1e3, sorted(m for m in ("roboticstoolbox", "spatialmath", "matplotlib", "scipy") if m in sys.modules))
+"""
+
+
+def controller_imports(path: Path) -> list[str]:
+    """Импорты верхнего уровня контроллера, кроме модуля Webots ``controller``."""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    lines = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [a for a in node.names if a.name.split(".")[0] != "controller"]
+            if names:
+                lines.append(ast.unparse(ast.Import(names=names)))
+        elif isinstance(node, ast.ImportFrom) and (node.module or "").split(".")[0] != "controller":
+            lines.append(ast.unparse(node))
+    return lines
+
+
+def measure(imports: list[str], repeat: int) -> tuple[float, float, list[str]]:
+    """
+    :return: медианы времени импорта и полного запуска интерпретатора, мс; тяжёлые пакеты в sys.modules
+    """
+    code = _PROLOGUE.format(controllers=str(CONTROLLERS), root=str(ROOT), imports="\n".join(imports))
+    import_ms, total_ms, heavy = [], [], []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT)
+        total_ms.append((time.perf_counter() - t) * 1e3)
+        if out.returncode != 0:
+            raise RuntimeError(out.stderr.strip().splitlines()[-1])
+        value, modules = out.stdout.strip().split(" ", 1)
+        import_ms.append(float(value))
+        heavy = ast.literal_eval(modules)
+    return float(sorted(import_ms)[repeat // 2]), float(sorted(total_ms)[repeat // 2]), heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время старта контроллеров до первого шага (импорт модулей)")
+    parser.add_argument("names", nargs="*", help="контроллеры (по умолчанию — все)")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="запусков на контроллер (медиана)")
+    parser.add_argument("-o", "--output", type=str, default=None, help="дописать результаты в JSON-файл")
+    args = parser.parse_args()
+
+    scripts = sorted(p for p in CONTROLLERS.glob("*/*.py") if p.stem == p.parent.name)
+    if args.names:
+        scripts = [p for p in scripts if p.stem in args.names]
+
+    rows = []
+    print(f"{'контроллер':<34} {'импорт, мс':>11} {'запуск, мс':>11}  тяжёлые пакеты")
+    for path in scripts + [None]:
+        name = path.stem if path is not None else "(справка) import roboticstoolbox"
+        imports = controller_imports(path) if path is not None else ["import roboticstoolbox"]
+        try:
+            import_ms, total_ms, heavy = measure(imports, args.repeat)
+        except RuntimeError as e:
+            print(f"{name:<34} {'—':>11} {'—':>11}  [WARN] {e}")
+            continue
+        print(f"{name:<34} {import_ms:>11.0f} {total_ms:>11.0f}  {', '.join(heavy) or '—'}")
+        rows.append({"controller": name, "import_ms": import_ms, "total_ms": total_ms, "heavy": heavy})
+
+    if args.output:
+        path = Path(args.output)
+        history = json.loads(path.read_text(encoding="utf-8")) if path.exists() else []
+        history.append({"time": time.strftime("%Y-%m-%d %H:%M:%S"), "python": sys.version.split()[0], "results": rows})
+        path.write_text(json.dumps(history, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[INFO] Результаты дописаны в {path}")
+
+
+if __name__ == "__main__":
+    main()
+
+
+# python benchmark_startup.py                      — все контроллеры
+# python benchmark_startup.py supervisor_csv_moving -r 10 -o startup_history.json
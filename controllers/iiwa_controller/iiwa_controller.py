@@ -6,6 +6,7 @@ sys.path.append(str(Path(__file__).resolve().parents[2]))
 
 from controller import Robot, Motor, PositionSensor
 from extensions.webots.communication import WebotsJsonComm
+from extensions.core.segments import SegmentPlayer
 from extensions.utils.device_search import is_gripper_motor
 
 
@@ -54,15 +55,46 @@ def build_state():
 
 
 
+def send_progress(index: int, events: dict):
+    comm.send({"source": robot.getName(),
+               "type": "robot_progress",
+               "data": {"index": index, "events": events, **build_state()}})
+
+
+# Участки траектории (robot_segment) исполняются локально: уставка интерполируется
+# каждый шаг, супервизору уходят только события и конец принятого буфера.
+player = SegmentPlayer()
+gripper_open = False
+reported_end = True
+
 while robot.step(ts) != -1:
 
     # Получаем позиции от supervisor
     for m in comm.receive():
-        if m.get("source") == "supervisor" and m.get("type") == "robot_position":           
-            apply_cmd(m["data"]["joints"], m["data"]["gripper"])
-
-    comm.send({"source": robot.getName(),
-               "type": f"{robot.getName()}_current_pose",
-               "data": build_state()})
+        if m.get("source") != "supervisor":
+            continue
+        if m.get("type") == "robot_position":
+            gripper_open = bool(m["data"]["gripper"])
+            apply_cmd(m["data"]["joints"], gripper_open)
+        elif m.get("type") == "robot_segment":
+            player.push(m["data"])
+            reported_end = False
+
+    if not player.active:
+        comm.send({"source": robot.getName(),
+                   "type": f"{robot.getName()}_current_pose",
+                   "data": build_state()})
+        continue
+
+    q, passed = player.step(ts / 1000.0)
+    if player.gripper is not None:
+        gripper_open = player.gripper
+    apply_cmd(dict(zip(player.joints, q)), gripper_open)
+
+    for index, kinds in passed:
+        send_progress(index, kinds)
+    if player.idle and not reported_end:
+        send_progress(int(player.end), {})
+        reported_end = True
 
 comm.disable()
@@ -31,7 +31,7 @@ state_q = model.qz
 step_counter = 0
 
 motion = MotionTracker(0.01)
-cmd_builder = CommandBuilder([f"lbr_A{i+1}" for i in range(7)], ["camera_motor"])
+cmd_builder = CommandBuilder(model.joint_names, ["camera_motor"])
 cmd_builder.set_target(model.qr)
 
 
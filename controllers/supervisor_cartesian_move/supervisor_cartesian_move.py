@@ -6,19 +6,32 @@ sys.path.append(str(Path(__file__).resolve().parents[2]))
 
 import os
 import json
+import numpy as np
 
 from controller import Supervisor
-from extensions.core.motion import MotionTracker
 from extensions.kinematics.solvers import solve_ik
-from extensions.core.commands import CommandBuilder
+from extensions.core.segments import SegmentSender
 from extensions.utils.console import print_progress_bar
 from extensions.webots.communication import WebotsJsonComm
 from extensions.kinematics.robot_models import LBRiiwaR800Model
 from extensions.kinematics.planner import TrajectoryPlannerComponent
+from extensions.kinematics.cache import IKCache, TrajectoryCache
+from extensions.kinematics.batch_ik import objective_signature
+from extensions.kinematics.collision import CollisionWorld
+from extensions.kinematics.dynamics import dynamics_of
+from extensions.kinematics.conditioning import conditioning_of
+from extensions.kinematics.seeds import IKSeedTable
+from extensions.kinematics.reachability import ReachabilityMap
+from extensions.kinematics.trajectory import Trajectory
+from extensions.kinematics.streaming import StreamingPlanner, PlanFailure
 
 # ================ Меням путь до файла и разделить ==========================
 # JSON_CARTESIAN_PATH = "$/home/user/webots_project/controllers/supervisor_cartesian_move/example_move.json"
 JSON_CARTESIAN_PATH = os.path.expandvars("${HOME}/dev/webots_projects/webots_robots/controllers/supervisor_cartesian_move/example_move.json")
+IK_CACHE_PATH = os.path.expandvars("${HOME}/dev/webots_projects/webots_robots/controllers/supervisor_cartesian_move/ik_cache.npz")
+TRAJECTORY_CACHE_DIR = os.path.expandvars("${HOME}/dev/webots_projects/webots_robots/controllers/supervisor_cartesian_move/trajectory_cache")
+# критерий выбора избыточности (угла локтя) в пакетной IK: "limits", "qr", "manipulability" или None
+IK_OBJECTIVE = "limits"
 # ===========================================================================
 
 
@@ -37,75 +50,125 @@ state_q = model.qz
 
 comm = WebotsJsonComm(robot.getDevice("supervisor_receiver"),
                       robot.getDevice("supervisor_emitter"))
-ik_solver = lambda qc, xyz, rpy: solve_ik(model, qc, xyz, rpy)
-motion = MotionTracker(0.05)
-cmd_builder = CommandBuilder([f"lbr_A{i+1}" for i in range(7)], ["camera_motor"])
-planer = TrajectoryPlannerComponent(model)
+seed_table = IKSeedTable.load_or_build(model)
+ik_solver = lambda qc, xyz, rpy: solve_ik(model, qc, xyz, rpy, seed_table=seed_table)
+ik_cache = IKCache(path=IK_CACHE_PATH, tag=objective_signature(IK_OBJECTIVE), model=model)
+trajectory_cache = TrajectoryCache(TRAJECTORY_CACHE_DIR)
+reachability = ReachabilityMap.load_or_build(model)
+collision_world = CollisionWorld(model)  # без препятствий — только самопересечения
+planer = TrajectoryPlannerComponent(model, dt=dt, ik_cache=ik_cache, reachability=reachability,
+                                    seed_table=seed_table, profile="scurve", collision=collision_world,
+                                    dynamics=dynamics_of(model), conditioning=conditioning_of(model),
+                                    ik_objective=IK_OBJECTIVE)
 
 comm.enable(timestep)
 
-# ==== Построим полную траекторию ====
-trajectory = []
-current_q = state_q.copy()
-
-for cmd in commands:
-
-    if cmd["command"] == "move":
-        xyz = cmd["args"][:3]
-        rpy = cmd["args"][3:]
-        success = planer.plan(current_q, xyz, rpy, speed_scale=0.5)
-
-        if success:
-            for point in planer.trajectory:
-                trajectory.append({"joints": point, "gripper": None})
-            current_q = planer.trajectory[-1]
-        else:
-            print(f"[WARN] Не удалось построить траекторию для: {xyz}, {rpy}")
-
-    elif cmd["command"] == "grab":
-        if len(trajectory) == 0:
-            print("[ERROR] Нет предыдущей точки для команды grab.")
+# ==== Планирование программы (в фоновом потоке, по участкам) ====
+def plan_program():
+    """Участки программы: непрерывные группы move, move_linear и выдержки с хватом."""
+    current_q = state_q.copy()
+    steps = 0
+
+    # IK для всех целей программы одним пакетом
+    move_targets = [cmd["args"] for cmd in commands if cmd["command"] == "move"]
+    ik_batch = planer.solve_targets(current_q, move_targets)
+    q_goals = iter([q if ok else None for q, ok in zip(ik_batch.q, ik_batch.success)])
+
+    # move-команды до ближайшей остановки (grab) — одна непрерывная траектория без остановок в точках подлёта
+    moves = []
+
+    def flush_moves():
+        targets = [args for args, _ in moves]
+        ok = planer.plan_waypoints(current_q, targets, speed_scale=1.0, q_targets=[q for _, q in moves])
+        moves.clear()
+        if ok:
+            return Trajectory.from_array(planer.trajectory)
+        return PlanFailure(f"Не удалось построить траекторию для: {targets}", targets)
+
+    for cmd in commands + [None]:
+        if cmd is not None and cmd["command"] == "move":
+            moves.append((cmd["args"], next(q_goals)))
             continue
 
-        last_q = trajectory[-1]["joints"]
-        n_repeat = int(0.5 / dt)
-
-        for _ in range(n_repeat):
-            trajectory.append({"joints": last_q, "gripper": None})
-
-        trajectory.append({"joints": last_q, "gripper": cmd["args"]})
-
-print(f"[INFO] Сформирована траектория из {len(trajectory)} шагов")
+        if moves:
+            segment = flush_moves()
+            if isinstance(segment, Trajectory):
+                current_q = segment.last.copy()
+                steps += len(segment)
+            yield segment
+
+        if cmd is None:
+            break
+
+        if cmd["command"] == "move_linear":
+            xyz = cmd["args"][:3]
+            rpy = cmd["args"][3:]
+            if planer.plan_linear(current_q, xyz, rpy, speed_scale=1.0):
+                segment = Trajectory.from_array(planer.trajectory)
+                current_q = segment.last.copy()
+                steps += len(segment)
+                yield segment
+            else:
+                yield PlanFailure(f"Не удалось построить траекторию для: {xyz}, {rpy}", cmd)
+
+        elif cmd["command"] == "grab":
+            if steps == 0:
+                print("[ERROR] Нет предыдущей точки для команды grab.")
+                continue
+
+            n_repeat = int(0.5 / dt)
+            segment = Trajectory.from_array(np.tile(current_q, (n_repeat + 1, 1)))
+            segment.add_event(-1, "gripper", cmd["args"])
+            steps += len(segment)
+            yield segment
+
+    print(f"[INFO] Сформирована траектория из {steps} шагов")
+    print(f"[INFO] IK-кэш: {ik_cache.stats}")
+    ik_cache.save()
+
+
+# неизменная программа берётся из кэша траекторий и исполняется сразу
+program_key = trajectory_cache.key(commands, state_q, model, dt, speed_scale=1.0,
+                                   planner=planer.signature)
+cached = trajectory_cache.load(program_key)
+
+
+def on_complete():
+    if cached is None and not stream.failures:
+        trajectory_cache.store(program_key, trajectory)
+
+
+if cached is not None:
+    print(f"[INFO] Траектория из {len(cached)} шагов взята из кэша")
+    trajectory = cached
+    stream = StreamingPlanner([], trajectory).start()
+else:
+    trajectory = Trajectory(model.n)
+    stream = StreamingPlanner(plan_program(), trajectory, on_complete=on_complete).start()
 
 # ==== Основной цикл движения ====
-cmd_builder.set_target([0] * model.n)
-cmd_builder.gripper_open = True
+# отсчёты уходят роботу участками; хват по событиям переключает сам контроллер
+sender = SegmentSender(trajectory, model.joint_names, dt)
 index = 0
 
 while robot.step(timestep) != -1:
     msgs = comm.receive()
 
     for m in msgs:
-        if m.get("type") == "LBRiiwa7R800_current_pose":
-            state_q = list(m["data"]["joints"].values())[:-1]
-
-    if cmd_builder.has_target and motion.target_reached(state_q, cmd_builder.target):
-        cmd_builder.clear_target()
-
-        if index < len(trajectory):
-            point = trajectory[index]
-            cmd_builder.set_target(point["joints"])
-
-            if point["gripper"] is not None:
-                cmd_builder.gripper_open = not point["gripper"]
-
+        if m.get("type") == "robot_progress":
+            index = m["data"]["index"]
             print_progress_bar(index + 1, len(trajectory))
-            index += 1
 
-    comm.send({
-        "source": robot.getName(),
-        "type": "robot_position",
-        "data": cmd_builder.command
-    })
+    stream.poll()
+
+    segment = sender.next_segment()
+    if segment is not None:
+        comm.send({
+            "source": robot.getName(),
+            "type": "robot_segment",
+            "data": segment
+        })
 
-comm.disable()
\ No newline at end of file
+print(f"[INFO] Передача траектории: {sender.summary()}")
+stream.stop()
+comm.disable()
@@ -5,6 +5,7 @@ sys.path.append(str(Path(__file__).resolve().parent.parent))
 sys.path.append(str(Path(__file__).resolve().parents[2]))
 
 import os
+import numpy as np
 import pandas as pd
 
 from controller import Supervisor
@@ -13,6 +14,8 @@ from extensions.core.commands import CommandBuilder
 from extensions.utils.console import print_progress_bar
 from extensions.webots.communication import WebotsJsonComm
 from extensions.kinematics.robot_models import LBRiiwaR800Model
+from extensions.kinematics.trajectory import Trajectory
+from extensions.kinematics.simplify import TrajectorySimplifier
 
 # ================ Меням путь до файла и разделить ==========================
 # CSV_PATH = "$/home/user/dev/webots_projects/webots_robots/controllers/supervisor_csv_moving/example_move.csv"
@@ -25,20 +28,26 @@ SEPARATION = ","
 robot = Supervisor()
 timestep = int(robot.getBasicTimeStep())
 df = pd.read_csv(CSV_PATH, sep=SEPARATION)
+# отсчёты исполняются по одному с ожиданием — лишние точки на прямых участках убираем
+simplifier = TrajectorySimplifier(dt=timestep / 1000.0)
+trajectory = simplifier(Trajectory.from_array(df.to_numpy(dtype=float)))
+print(f"[INFO] Прореживание траектории: {simplifier.summary()}")
 
 model = LBRiiwaR800Model()
 state_q = model.qz
 
 comm = WebotsJsonComm(robot.getDevice("supervisor_receiver"),
                       robot.getDevice("supervisor_emitter"))
-motion = MotionTracker(0.01)
-cmd_builder = CommandBuilder([f"lbr_A{i+1}" for i in range(7)], ["camera_motor"])
+# промежуточные отсчёты проходятся с упреждением, строго — только события и конец
+motion = MotionTracker(0.01, lookahead=20, lookahead_tolerance=np.full(7, 0.02))
+cmd_builder = CommandBuilder(model.joint_names, ["camera_motor"])
 
 comm.enable(timestep)
 
 # Переводим робота в начальную точку
 current_index = 0
-cmd_builder.set_target(df.iloc[current_index].to_numpy())
+stops = list(trajectory.event_table())
+cmd_builder.set_target(trajectory[current_index])
 
 while robot.step(timestep) != -1:
     msgs = comm.receive()
@@ -48,14 +57,17 @@ while robot.step(timestep) != -1:
             state_q = list(m["data"]["joints"].values())[:-1]
     
 
-    if cmd_builder.has_target and motion.target_reached(state_q, cmd_builder.target):
-        cmd_builder.clear_target()
+    if cmd_builder.has_target:
+        next_index = motion.advance(state_q, trajectory.q, current_index, stops)
 
-        if current_index + 1 < len(df):
-            current_index += 1
-            cmd_builder.set_target(df.iloc[current_index].to_numpy())
+        if next_index != current_index:
+            if next_index < len(trajectory):
+                current_index = next_index
+                cmd_builder.set_target(trajectory[current_index])
+            else:
+                cmd_builder.clear_target()
 
-        print_progress_bar(current_index + 1, len(df))
+            print_progress_bar(min(next_index + 1, len(trajectory)), len(trajectory))
 
     comm.send({"source": robot.getName(), 
                "type": "robot_position", 
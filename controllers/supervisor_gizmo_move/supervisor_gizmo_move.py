@@ -4,14 +4,22 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 sys.path.append(str(Path(__file__).resolve().parents[2]))
 
+import os
+
 from controller import Supervisor
 from extensions.kinematics.robot_models import LBRiiwaR800Model
 from extensions.kinematics.solvers import solve_ik
+from extensions.kinematics.cache import IKCache
+from extensions.kinematics.seeds import IKSeedTable
+from extensions.kinematics.servo import ResolvedRateServo
 from extensions.webots.communication import WebotsJsonComm
 from extensions.webots.target import WebotsTargetGizmo
-from extensions.core.motion import MotionTracker
 from extensions.core.commands import CommandBuilder
 
+# ================ Меням путь до файла и разделить ==========================
+IK_CACHE_PATH = os.path.expandvars("${HOME}/dev/webots_projects/webots_robots/controllers/supervisor_gizmo_move/ik_cache.npz")
+# ===========================================================================
+
 
 robot = Supervisor()
 timestep = int(robot.getBasicTimeStep())
@@ -22,14 +30,18 @@ comm.enable(timestep)
 
 model = LBRiiwaR800Model()
 state_q = model.qz
+has_state = False
 
 robot_node = robot.getFromDef("KUKA")
 trg_node = robot.getFromDef("TARGET_GRIPPER")
 target = WebotsTargetGizmo(robot_node, trg_node)
 
-ik_solver = lambda qc, xyz, rpy: solve_ik(model, qc, xyz, rpy)
-motion = MotionTracker(0.01)
-cmd_builder = CommandBuilder([f"lbr_A{i+1}" for i in range(7)], ["camera_motor"])
+ik_cache = IKCache(path=IK_CACHE_PATH, model=model)
+seed_table = IKSeedTable.load_or_build(model)
+ik_solver = ik_cache.wrap(lambda qc, xyz, rpy: solve_ik(model, qc, xyz, rpy, seed_table=seed_table))
+# слежение по якобиану каждый такт; полная IK — только когда гизмо отскочил далеко
+servo = ResolvedRateServo(model, timestep / 1000.0, ik_solver=ik_solver)
+cmd_builder = CommandBuilder(model.joint_names, ["camera_motor"])
 
 
 while robot.step(timestep) != -1:
@@ -39,18 +51,12 @@ while robot.step(timestep) != -1:
     for m in msgs:
         if m.get("type") == "LBRiiwa7R800_current_pose":
             state_q = list(m["data"]["joints"].values())[:-1]
+            has_state = True
 
-    # IK — если ещё нет цели
-    if not cmd_builder.has_target:
+    # шаг слежения за гизмо — от текущих углов, как только они пришли от робота
+    if has_state:
         xyz, rpy = target.pose
-        q_star = ik_solver(state_q, xyz, rpy)
-
-        if q_star is not None:
-            cmd_builder.set_target(q_star)
-
-    # Проверяем достижение цели
-    if cmd_builder.has_target and motion.target_reached(state_q, cmd_builder.target):
-        cmd_builder.clear_target()
+        cmd_builder.set_target(servo.step(state_q, xyz, rpy))
 
     cmd_builder.gripper_open = target.gripper
     comm.send({"source": robot.getName(), 
@@ -58,3 +64,5 @@ while robot.step(timestep) != -1:
                "data": cmd_builder.command})
 
 comm.disable()
+ik_cache.save()
+print(f"[INFO] IK-кэш: {ik_cache.stats}")
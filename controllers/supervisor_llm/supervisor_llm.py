@@ -8,18 +8,28 @@ import os
 
 import sys
 import json
+import numpy as np
 import argparse
 
 from controller import Supervisor
-from extensions.core.motion import MotionTracker
 from extensions.kinematics.solvers import solve_ik
-from extensions.core.commands import CommandBuilder
+from extensions.core.segments import SegmentSender
 from extensions.utils.console import print_progress_bar
 from extensions.webots.logger import MoveResultLogger, InitialObjectsSnapshotLogger
 from extensions.webots.communication import WebotsJsonComm
 from extensions.webots.target import WebotsTargetObject
 from extensions.kinematics.robot_models import LBRiiwaR800Model
 from extensions.kinematics.planner import TrajectoryPlannerComponent
+from extensions.kinematics.cache import IKCache, TrajectoryCache
+from extensions.kinematics.batch_ik import objective_signature
+from extensions.kinematics.collision import CollisionWorld
+from extensions.kinematics.dynamics import dynamics_of
+from extensions.kinematics.conditioning import conditioning_of
+from extensions.kinematics.distance_field import DistanceField
+from extensions.kinematics.seeds import IKSeedTable
+from extensions.kinematics.reachability import ReachabilityMap
+from extensions.kinematics.trajectory import Trajectory
+from extensions.kinematics.streaming import StreamingPlanner, PlanFailure
 from extensions.utils.math import (build_pick_place_commands, 
                                    build_pick_place_pairwise,
                                    generate_pallet_poses,
@@ -32,6 +42,7 @@ from extensions.utils.normolize import (normalize_objects,
 from extensions.utils.params import (load_objects_config,
                                      apply_objects_config)
 from extensions.webots.spawner import ObstacleSpawner
+from extensions.webots.workcell import add_static_solids
 
 
 JSON_PATH = os.path.expandvars("${HOME}/dev/webots_projects/webots_robots/controllers/supervisor_llm/example_move_llm.json")
@@ -41,6 +52,14 @@ RESULTS_JSON_PATH = os.path.expandvars(
 OBJECTS_INFO_JSON_PATH = os.path.expandvars(
     "${HOME}/dev/webots_projects/webots_robots/controllers/supervisor_llm/objects_info.json"
 )
+IK_CACHE_PATH = os.path.expandvars(
+    "${HOME}/dev/webots_projects/webots_robots/controllers/supervisor_llm/ik_cache.npz"
+)
+TRAJECTORY_CACHE_DIR = os.path.expandvars(
+    "${HOME}/dev/webots_projects/webots_robots/controllers/supervisor_llm/trajectory_cache"
+)
+# критерий выбора избыточности (угла локтя) в пакетной IK: "limits", "qr", "manipulability" или None
+IK_OBJECTIVE = "limits"
 PROMT_PATH = os.path.expandvars("")
 
 
@@ -97,34 +116,47 @@ if opts.objects_config:
     except Exception as e:
         print(f"[WARN] Ошибка применения конфигурации объектов: {e}")
 
-# Спавн препятсвия (в мировоых координатах, не в робота)
-spawner = ObstacleSpawner(supervisor=robot)
-
-# box_def = spawner.spawn_box(
-#         name="OBJ_COLISION",
-#         translation=(0.30, 0.0, 0.83),
-#         size=(0.20, 0.10, 0.30),
-#         color=(220, 80, 80),
-#         static=True,
-#         mass=10.0
-#     )
-
 model = LBRiiwaR800Model()
 state_q = model.qz
 comm = WebotsJsonComm(robot.getDevice("supervisor_receiver"),
                       robot.getDevice("supervisor_emitter"))
-ik_solver = lambda qc, xyz, rpy: solve_ik(model, qc, xyz, rpy)
-motion = MotionTracker(0.05)
-cmd_builder = CommandBuilder([f"lbr_A{i+1}" for i in range(7)], ["camera_motor"])
-planer = TrajectoryPlannerComponent(model)
+seed_table = IKSeedTable.load_or_build(model)
+ik_solver = lambda qc, xyz, rpy: solve_ik(model, qc, xyz, rpy, seed_table=seed_table)
+ik_cache = IKCache(path=IK_CACHE_PATH, tag=objective_signature(IK_OBJECTIVE), model=model)
+trajectory_cache = TrajectoryCache(TRAJECTORY_CACHE_DIR)
+reachability = ReachabilityMap.load_or_build(model)
+collision_world = CollisionWorld(model)
+
+robot_node = robot.getFromDef("KUKA")
+if robot_node is None:
+    raise RuntimeError("DEF 'KUKA' не найден в мире. Убедись, что у робота есть DEF KUKA.")
+
+# Поле расстояний рабочей ячейки (система базы робота): стол, ограждения и созданные препятствия
+distance_field = DistanceField(lower=(-1.4, -1.4, -0.4), upper=(1.4, 1.4, 1.4), resolution=0.02)
+add_static_solids(robot, distance_field, robot_node=robot_node)
+
+# траектории, задевающие стол или ограждения, планировщик отклоняет
+planer = TrajectoryPlannerComponent(model, dt=dt, ik_cache=ik_cache, reachability=reachability,
+                                    seed_table=seed_table, profile="scurve", collision=collision_world,
+                                    dynamics=dynamics_of(model), conditioning=conditioning_of(model),
+                                    ik_objective=IK_OBJECTIVE, distance_field=distance_field)
 
 comm.enable(timestep)
 transform_fn = lambda xyz: transform_world_to_local(robot_node, xyz)
 
 # ==== Выбор целей====
-robot_node = robot.getFromDef("KUKA")
-if robot_node is None:
-    raise RuntimeError("DEF 'KUKA' не найден в мире. Убедись, что у робота есть DEF KUKA.")
+# Спавн препятсвия (в мировоых координатах, не в робота); препятствия учитываются планировщиком
+spawner = ObstacleSpawner(supervisor=robot, collision_world=collision_world, robot_node=robot_node,
+                          distance_field=distance_field)
+
+# box_def = spawner.spawn_box(
+#         name="OBJ_COLISION",
+#         translation=(0.30, 0.0, 0.83),
+#         size=(0.20, 0.10, 0.30),
+#         color=(220, 80, 80),
+#         static=True,
+#         mass=10.0
+#     )
 
 missing = [name for name in opts.objects if robot.getFromDef(name) is None]
 if missing:
@@ -172,7 +204,9 @@ if have_pallet(opts):
     commands = build_pick_place_pairwise(
         pick_list=cords_rpy,
         target_poses=pallet_poses,
-        delta_z=opts.delta_z
+        delta_z=opts.delta_z,
+        reachability=reachability,
+        linear_approach=True
     )
 else:
     if len(opts.target_poses) == 1:
@@ -182,13 +216,17 @@ else:
             delta_z=opts.delta_z,
             place_step_z=opts.place_step_z,
             gap=opts.gap,
-            start_index=0
+            start_index=0,
+            reachability=reachability,
+            linear_approach=True
         )
     elif len(opts.target_poses) == num_objs:
         commands = build_pick_place_pairwise(
             pick_list=cords_rpy,
             target_poses=opts.target_poses,
-            delta_z=opts.delta_z
+            delta_z=opts.delta_z,
+            reachability=reachability,
+            linear_approach=True
         )
     else:
         raise ValueError(
@@ -235,51 +273,114 @@ for idx, (w_def, p) in enumerate(zip(opts.objects, cords_rpy)):
     })
 
 
-# ==== Планирование траектоии ====
-trajectory = []
-current_q = state_q.copy()
-
-place_done_markers = []
-pending_release = False   # флаг: только что была команда 'grab': False
-object_place_counter = 0  # счётчик уложенных объектов
-
-for cmd in commands:
-    if cmd["command"] == "move":
-        xyz = cmd["args"][:3]
-        rpy = cmd["args"][3:]
-        success = planer.plan(current_q, xyz, rpy, speed_scale=0.5)
-        if success:
-            for point in planer.trajectory:
-                trajectory.append({"joints": point, "gripper": None})
-            current_q = planer.trajectory[-1]
-
-            if pending_release:
-                place_done_markers.append({
-                    "traj_index": len(trajectory) - 1,
-                    "object_idx": object_place_counter
-                })
-                object_place_counter += 1
-                pending_release = False
-        else:
-            print(f"[WARN] Не удалось построить траекторию для: {xyz}, {rpy}")
-
-    elif cmd["command"] == "grab":
-        if len(trajectory) == 0:
-            print("[ERROR] Нет предыдущей точки для команды grab.")
+# ==== Планирование траектоии (в фоновом потоке, по участкам) ====
+def plan_program():
+    """Участки программы: непрерывные группы move, move_linear и выдержки с хватом."""
+    current_q = state_q.copy()
+    steps = 0
+    clearance = distance_field.truncation
+
+    # IK для всех целей программы одним пакетом
+    move_targets = [cmd["args"] for cmd in commands if cmd["command"] == "move"]
+    ik_batch = planer.solve_targets(current_q, move_targets)
+    q_goals = iter([q if ok else None for q, ok in zip(ik_batch.q, ik_batch.success)])
+
+    pending_release = False   # флаг: только что была команда 'grab': False
+    object_place_counter = 0  # счётчик уложенных объектов
+
+    # move-команды до ближайшей остановки (grab) — одна непрерывная траектория без остановок в точках подлёта
+    moves = []
+
+    def planned_segment():
+        """Участок из траектории планировщика; после отпускания отмечает момент укладки объекта."""
+        nonlocal pending_release, object_place_counter, clearance
+        segment = Trajectory.from_array(planer.trajectory)
+        # зазор до стола и ограждений; звено 1 стоит на столе и не учитывается
+        gaps = distance_field.clearance(segment.q, collision_world.link_capsules)
+        clearance = min(clearance, float(np.min(gaps[:, 1:])))
+
+        if pending_release:
+            # объект уложен, когда робот отошёл в первую точку после отпускания
+            segment.add_event(planer.waypoint_index[0], "placed", object_place_counter)
+            object_place_counter += 1
+            pending_release = False
+        return segment
+
+    def flush_moves():
+        targets = [args for args, _ in moves]
+        ok = planer.plan_waypoints(current_q, targets, speed_scale=1.0, q_targets=[q for _, q in moves])
+        moves.clear()
+        if ok:
+            return planned_segment()
+        return PlanFailure(f"Не удалось построить траекторию для: {targets}", targets)
+
+    for cmd in commands + [None]:
+        if cmd is not None and cmd["command"] == "move":
+            moves.append((cmd["args"], next(q_goals)))
             continue
 
-        last_q = trajectory[-1]["joints"]
-        n_repeat = int(0.2 / dt)
-
-        for i in range(n_repeat):
-            if i == n_repeat // 2:
-                trajectory.append({"joints": last_q, "gripper": cmd["args"]})
-            trajectory.append({"joints": last_q, "gripper": None})
-
-        if cmd["args"] is False:
-            pending_release = True
+        if moves:
+            segment = flush_moves()
+            if isinstance(segment, Trajectory):
+                current_q = segment.last.copy()
+                steps += len(segment)
+            yield segment
+
+        if cmd is None:
+            break
+
+        if cmd["command"] == "move_linear":
+            xyz = cmd["args"][:3]
+            rpy = cmd["args"][3:]
+            if planer.plan_linear(current_q, xyz, rpy, speed_scale=1.0):
+                segment = planned_segment()
+                current_q = segment.last.copy()
+                steps += len(segment)
+                yield segment
+            else:
+                yield PlanFailure(f"Не удалось построить траекторию для: {xyz}, {rpy}", cmd)
+
+        elif cmd["command"] == "grab":
+            if steps == 0:
+                print("[ERROR] Нет предыдущей точки для команды grab.")
+                continue
+
+            n_repeat = int(0.2 / dt)
+            segment = Trajectory.from_array(np.tile(current_q, (n_repeat + 1, 1)))
+            segment.add_event(n_repeat // 2, "gripper", cmd["args"])
+            steps += len(segment)
+            yield segment
+
+            if cmd["args"] is False:
+                pending_release = True
+
+    print(f"[INFO] Сформирована траектория из {steps} шагов")
+    print(f"[INFO] Наименьший зазор звеньев до стола и ограждений: {clearance:.3f} м")
+    print(f"[INFO] IK-кэш: {ik_cache.stats}")
+    ik_cache.save()
+
+
+# неизменная программа берётся из кэша траекторий и исполняется сразу
+program_key = trajectory_cache.key(commands, state_q, model, dt, speed_scale=1.0,
+                                   planner=planer.signature)
+cached = trajectory_cache.load(program_key)
+
+
+def on_complete():
+    if cached is None and not stream.failures:
+        trajectory_cache.store(program_key, trajectory)
+
+
+if cached is not None:
+    print(f"[INFO] Траектория из {len(cached)} шагов взята из кэша")
+    trajectory = cached
+    stream = StreamingPlanner([], trajectory).start()
+else:
+    trajectory = Trajectory(model.n)
+    stream = StreamingPlanner(plan_program(), trajectory, on_complete=on_complete).start()
 
-print(f"[INFO] Сформирована траектория из {len(trajectory)} шагов")
+# маркеры укладки дополняются по мере поступления участков
+place_done_markers = [{"traj_index": i, "object_idx": obj} for i, obj in trajectory.events_of("placed")]
 
 logger = MoveResultLogger(
     robot=robot,
@@ -291,37 +392,32 @@ logger = MoveResultLogger(
 )
 
 # ==== Основной цикл ====
-cmd_builder.set_target([0] * model.n)
-cmd_builder.gripper_open = True
+# отсчёты уходят роботу участками; контроллер сообщает о пройденных событиях
+sender = SegmentSender(trajectory, model.joint_names, dt)
 index = 0
 
 while robot.step(timestep) != -1:
     msgs = comm.receive()
 
     for m in msgs:
-        if m.get("type") == "LBRiiwa7R800_current_pose":
-            state_q = list(m["data"]["joints"].values())[:-1]
-
-    if cmd_builder.has_target and motion.target_reached(state_q, cmd_builder.target):
-        cmd_builder.clear_target()
-
-        if index < len(trajectory):
-            point = trajectory[index]
-            cmd_builder.set_target(point["joints"])
-
-            if point["gripper"] is not None:
-                cmd_builder.gripper_open = not point["gripper"]
-
+        if m.get("type") == "robot_progress":
+            index = m["data"]["index"]
             print_progress_bar(index + 1, len(trajectory))
-            index += 1
-
-            logger.try_log(index - 1)
-
-    comm.send({
-        "source": robot.getName(),
-        "type": "robot_position",
-        "data": cmd_builder.command
-    })
-
+            logger.try_log(index)
+
+    if stream.poll():
+        place_done_markers[:] = [{"traj_index": i, "object_idx": obj}
+                                 for i, obj in trajectory.events_of("placed")]
+
+    segment = sender.next_segment()
+    if segment is not None:
+        comm.send({
+            "source": robot.getName(),
+            "type": "robot_segment",
+            "data": segment
+        })
+
+print(f"[INFO] Передача траектории: {sender.summary()}")
+stream.stop()
 comm.disable()
 logger.finalize()
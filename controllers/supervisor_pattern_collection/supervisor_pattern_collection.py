@@ -6,16 +6,23 @@ sys.path.append(str(Path(__file__).resolve().parents[2]))
 
 import os
 import json
+import numpy as np
 import pandas as pd
 
 from controller import Supervisor
-from extensions.core.motion import MotionTracker
 from extensions.kinematics.solvers import solve_ik
-from extensions.core.commands import CommandBuilder
+from extensions.core.segments import SegmentSender
 from extensions.utils.console import print_progress_bar
 from extensions.webots.communication import WebotsJsonComm
 from extensions.kinematics.robot_models import LBRiiwaR800Model
 from extensions.kinematics.planner import TrajectoryPlannerComponent
+from extensions.kinematics.cache import IKCache, TrajectoryCache
+from extensions.kinematics.batch_ik import objective_signature
+from extensions.kinematics.collision import CollisionWorld
+from extensions.kinematics.dynamics import dynamics_of
+from extensions.kinematics.trajectory import Trajectory
+from extensions.kinematics.streaming import StreamingPlanner, PlanFailure
+from extensions.kinematics.seeds import IKSeedTable
 
 
 # ================ Меням путь до файла и разделить ==========================
@@ -24,6 +31,10 @@ from extensions.kinematics.planner import TrajectoryPlannerComponent
  
 JSON_CARTESIAN_PATH = os.path.expandvars("${HOME}/dev/webots_projects/webots_robots/controllers/supervisor_pattern_collection/collect_pattern.json")
 IMAGE_FOLDER = os.path.expandvars("${HOME}/dev/webots_projects/webots_robots/pattern_collect")
+IK_CACHE_PATH = os.path.expandvars("${HOME}/dev/webots_projects/webots_robots/controllers/supervisor_pattern_collection/ik_cache.npz")
+TRAJECTORY_CACHE_DIR = os.path.expandvars("${HOME}/dev/webots_projects/webots_robots/controllers/supervisor_pattern_collection/trajectory_cache")
+# критерий выбора избыточности (угла локтя) в пакетной IK: "limits", "qr", "manipulability" или None
+IK_OBJECTIVE = "limits"
 # ===========================================================================
 
 
@@ -40,69 +51,97 @@ dt = 10 / 1000.0
 
 
 model = LBRiiwaR800Model()
-state_q = model.qz
 
 comm = WebotsJsonComm(robot.getDevice("supervisor_receiver"),
                       robot.getDevice("supervisor_emitter"))
-ik_solver = lambda qc, xyz, rpy: solve_ik(model, qc, xyz, rpy)
-motion = MotionTracker(0.005)
-cmd_builder = CommandBuilder([f"lbr_A{i+1}" for i in range(7)], ["camera_motor"])
-planer = TrajectoryPlannerComponent(model, dt=dt)
+seed_table = IKSeedTable.load_or_build(model)
+ik_solver = lambda qc, xyz, rpy: solve_ik(model, qc, xyz, rpy, seed_table=seed_table)
+ik_cache = IKCache(path=IK_CACHE_PATH, tag=objective_signature(IK_OBJECTIVE), model=model)
+trajectory_cache = TrajectoryCache(TRAJECTORY_CACHE_DIR)
+collision_world = CollisionWorld(model)  # без препятствий — только самопересечения
+planer = TrajectoryPlannerComponent(model, dt=dt, ik_cache=ik_cache, seed_table=seed_table,
+                                    collision=collision_world, dynamics=dynamics_of(model),
+                                    ik_objective=IK_OBJECTIVE)
 
 comm.enable(timestep)
 
-trajectory = []
-current_q = model.qz
-
-path_robot = []
-
-success = planer.plan(current_q, target_rpy=None, target_xyz=None, q_target=model.qr, speed_scale=0.5)
-if success:
-    for point in planer.trajectory:
-        trajectory.append({"joints": point, "collect": None})
-        path_robot.append(point)
-    current_q = planer.trajectory[-1]
+# ==== Планирование программы (в фоновом потоке, по участкам) ====
+def plan_program():
+    """Участки программы: стартовый переезд qz → qr, переезды move и выдержки со съёмкой."""
+    current_q = model.qz
+    steps = 0
+
+    if planer.plan(current_q, target_rpy=None, target_xyz=None, q_target=model.qr, speed_scale=0.5):
+        segment = Trajectory.from_array(planer.trajectory)
+        current_q = segment.last.copy()
+        steps += len(segment)
+        yield segment
+    else:
+        yield PlanFailure("Не удалось построить стартовую траекторию от qz к qr")
+
+    # IK для всех целей программы одним пакетом
+    move_targets = [cmd["args"] for cmd in commands if cmd["command"] == "move"]
+    ik_batch = planer.solve_targets(current_q, move_targets)
+    q_goals = iter([q if ok else None for q, ok in zip(ik_batch.q, ik_batch.success)])
+
+    for cmd in commands:
+        if cmd["command"] == "move":
+            xyz = cmd["args"][:3]
+            rpy = cmd["args"][3:]
+            success = planer.plan(current_q, xyz, rpy, speed_scale=0.5, q_target=next(q_goals))
+
+            if success:
+                segment = Trajectory.from_array(planer.trajectory)
+                current_q = segment.last.copy()
+                steps += len(segment)
+                yield segment
+            else:
+                yield PlanFailure(f"Не удалось построить траекторию для: {xyz}, {rpy}", cmd)
+
+        elif cmd["command"] == "collect":
+            if steps == 0:
+                print("[ERROR] Нет предыдущей точки для команды collect.")
+                continue
+
+            n_repeat = int(0.5 / dt)
+            segment = Trajectory.from_array(np.tile(current_q, (n_repeat + 1, 1)))
+            segment.add_event(-1, "collect", cmd["args"])
+            steps += len(segment)
+            yield segment
+
+    print(f"[INFO] Сформирована траектория из {steps} шагов")
+    print(f"[INFO] IK-кэш: {ik_cache.stats}")
+    ik_cache.save()
+
+
+def save_trajectory():
+    df = pd.DataFrame(data=trajectory.q, columns=[f"A{i}" for i in range(1, 8)])
+    df.to_csv("./trajectory_collect.csv", index=False)
+
+
+# неизменная программа берётся из кэша траекторий и исполняется сразу
+program_key = trajectory_cache.key(commands, model.qz, model, dt, speed_scale=0.5,
+                                   planner=planer.signature)
+cached = trajectory_cache.load(program_key)
+
+
+def on_complete():
+    save_trajectory()
+    if cached is None and not stream.failures:
+        trajectory_cache.store(program_key, trajectory)
+
+
+if cached is not None:
+    print(f"[INFO] Траектория из {len(cached)} шагов взята из кэша")
+    trajectory = cached
+    stream = StreamingPlanner([], trajectory, on_complete=save_trajectory).start()
 else:
-    print(f"[ERROR] Не удалось построить стартовую траекторию от qz к qr")
-
-for cmd in commands:
-    if cmd["command"] == "move":
-        xyz = cmd["args"][:3]
-        rpy = cmd["args"][3:]
-        success = planer.plan(current_q, xyz, rpy, speed_scale=0.5)
-
-        if success:
-            for point in planer.trajectory:
-                trajectory.append({"joints": point, "collect": None})
-                path_robot.append(point)
-            current_q = planer.trajectory[-1]
-        else:
-            print(f"[WARN] Не удалось построить траекторию для: {xyz}, {rpy}")
-
-    elif cmd["command"] == "collect":
-        if len(trajectory) == 0:
-            print("[ERROR] Нет предыдущей точки для команды collect.")
-            continue
-
-        last_q = trajectory[-1]["joints"]
-        n_repeat = int(0.5 / dt)
-
-        for _ in range(n_repeat):
-            trajectory.append({"joints": last_q, "collect": None})
-            path_robot.append(last_q)
+    trajectory = Trajectory(model.n)
+    stream = StreamingPlanner(plan_program(), trajectory, on_complete=on_complete).start()
 
-        trajectory.append({"joints": last_q, "collect": cmd["args"]})
-        path_robot.append(last_q)
-
-print(f"[INFO] Сформирована траектория из {len(trajectory)} шагов")
-
-df = pd.DataFrame(data=path_robot, columns=[f"A{i}" for i in range(1, 8)])
-df.to_csv("./trajectory_collect.csv", index=False)
-
-cmd_builder.set_target(model.qz)
-cmd_builder.gripper_open = True
+# отсчёты уходят роботу участками, контроллер исполняет их сам и сообщает о съёмке
+sender = SegmentSender(trajectory, model.joint_names, dt)
 index = 0
-first = True
 
 
 while robot.step(timestep) != -1:
@@ -110,37 +149,28 @@ while robot.step(timestep) != -1:
     msgs = comm.receive()
     
     for m in msgs:
-        if m.get("type") == "LBRiiwa7R800_current_pose":
-            state_q = list(m["data"]["joints"].values())[:-1]
-
-    if first:
+        if m.get("type") != "robot_progress":
+            continue
+        index = m["data"]["index"]
+        print_progress_bar(index + 1, len(trajectory))
+
+        if "collect" in m["data"]["events"]:
+            comm.send({"source": robot.getName(), 
+                        "type": "save_image", 
+                        "data": {
+                                  "folder": IMAGE_FOLDER,
+                                  "type": "rgb"
+                                } 
+                        })
+
+    stream.poll()
+
+    segment = sender.next_segment()
+    if segment is not None:
         comm.send({"source": robot.getName(), 
-                   "type": "robot_position", 
-                   "data": cmd_builder.command})
-        first = False
-        continue
-
-    if cmd_builder.has_target and motion.target_reached(state_q, cmd_builder.target):
-        cmd_builder.clear_target()
-
-        if index < len(trajectory):
-            point = trajectory[index]
-            cmd_builder.set_target(point["joints"])
-
-            if point["collect"] is not None:
-                comm.send({"source": robot.getName(), 
-                            "type": "save_image", 
-                            "data": {
-                                      "folder": IMAGE_FOLDER,
-                                      "type": "rgb"
-                                    } 
-                            })
-
-            print_progress_bar(index + 1, len(trajectory))
-            index += 1
-
-    comm.send({"source": robot.getName(), 
-                   "type": "robot_position", 
-                   "data": cmd_builder.command})
+                   "type": "robot_segment", 
+                   "data": segment})
 
+print(f"[INFO] Передача траектории: {sender.summary()}")
+stream.stop()
 comm.disable()
@@ -4,15 +4,22 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 sys.path.append(str(Path(__file__).resolve().parents[2]))
 
+import os
 import json
 from controller import Supervisor
 from extensions.kinematics.robot_models import LBRiiwaR800Model
 from extensions.webots.communication import WebotsJsonComm
 from extensions.kinematics.solvers import solve_ik, solve_pzk
+from extensions.kinematics.cache import IKCache
+from extensions.kinematics.seeds import IKSeedTable
 from extensions.webots.target import WebotsTargetGizmo
 from extensions.core.motion import MotionTracker
 from extensions.core.commands import CommandBuilder
 
+# ================ Меням путь до файла и разделить ==========================
+IK_CACHE_PATH = os.path.expandvars("${HOME}/dev/webots_projects/webots_robots/controllers/supervisor_pattern_detection/ik_cache.npz")
+# ===========================================================================
+
 
 # =============== Автоматически все выполниться =============================
 robot = Supervisor()
@@ -30,9 +37,11 @@ trg_node = robot.getFromDef("TARGET_GRIPPER")
 target = WebotsTargetGizmo(robot_node, trg_node)
 
 
-ik_solver = lambda qc, xyz, rpy: solve_ik(model, qc, xyz, rpy)
+ik_cache = IKCache(path=IK_CACHE_PATH, model=model)
+seed_table = IKSeedTable.load_or_build(model)
+ik_solver = ik_cache.wrap(lambda qc, xyz, rpy: solve_ik(model, qc, xyz, rpy, seed_table=seed_table))
 motion = MotionTracker(0.01)
-cmd_builder = CommandBuilder([f"lbr_A{i+1}" for i in range(7)], ["camera_motor"])
+cmd_builder = CommandBuilder(model.joint_names, ["camera_motor"])
 
 prev_state_gripper = False
 robot_pose = []
@@ -146,3 +155,5 @@ while robot.step(timestep) != -1:
 
 
 comm.disable()
+ik_cache.save()
+print(f"[INFO] IK-кэш: {ik_cache.stats}")
@@ -8,4 +8,9 @@ class BaseIKSolver(ABC):
     def solve(self,
               q_current: ArrayLike,
               xyz_target: ArrayLike,
-              rpy_target: ArrayLike): ...
\ No newline at end of file
+              rpy_target: ArrayLike): ...
+
+    @property
+    def signature(self) -> str:
+        """Решатель и его настройки одной строкой — для ключей кэша траекторий."""
+        return type(self).__name__
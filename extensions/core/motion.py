@@ -1,12 +1,63 @@
 import numpy as np
+from typing import Iterable
 from numpy.typing import ArrayLike
 
 
 class MotionTracker:
-    """Проверка достижения цели с погрешностью."""
+    """
+    Проверка достижения цели с погрешностью.
 
-    def __init__(self, tolerance: float = 1e-2):
-        self._tol = float(tolerance)
+    Допуск — число (норма отклонения по всем суставам) или вектор допусков по суставам.
+    Для следования по траектории — ``advance``: с окном упреждения ``lookahead`` цель
+    перескакивает на отсчёт за самым дальним отсчётом окна, уже достигнутым с допуском
+    ``lookahead_tolerance``. Строгая сходимость (``tolerance``) требуется только в точках
+    остановки — отсчётах с событиями (хват, съёмка, укладка) и в конце траектории.
+    """
+
+    def __init__(self,
+                 tolerance: float | ArrayLike = 1e-2,
+                 lookahead: int = 0,
+                 lookahead_tolerance: float | ArrayLike | None = None):
+        """
+        :param tolerance: допуск достижения цели, рад (число — по норме, вектор — по суставам)
+        :param lookahead: окно упреждения, отсчётов; 0 — каждый отсчёт достигается строго
+        :param lookahead_tolerance: допуск прохода промежуточных отсчётов; None — как tolerance
+        """
+        self._tol = np.asarray(tolerance, dtype=float)
+        self._pass_tol = self._tol if lookahead_tolerance is None else np.asarray(lookahead_tolerance, dtype=float)
+        self.lookahead = max(0, int(lookahead))
+
+    @staticmethod
+    def _within(cur: np.ndarray, goals: np.ndarray, tol: np.ndarray) -> np.ndarray:
+        diff = goals - cur
+        if tol.ndim == 0:
+            return np.linalg.norm(diff, axis=-1) < tol
+        return np.all(np.abs(diff) <= tol, axis=-1)
 
     def target_reached(self, cur: ArrayLike, goal: ArrayLike) -> bool:
-        return float(np.linalg.norm(np.asarray(cur) - np.asarray(goal))) < self._tol
\ No newline at end of file
+        return bool(self._within(np.asarray(cur, dtype=float), np.asarray(goal, dtype=float), self._tol))
+
+    def advance(self, cur: ArrayLike, q: ArrayLike, index: int, stops: Iterable[int] = ()) -> int:
+        """
+        Следующая цель на траектории.
+
+        :param cur: текущие углы суставов (n,)
+        :param q: траектория (N, n)
+        :param index: номер текущей цели
+        :param stops: номера отсчётов со строгой сходимостью (события); последний отсчёт — всегда
+        :return: номер следующей цели; index — цель ещё не достигнута, N — траектория пройдена
+        """
+        q = np.asarray(q, dtype=float)
+        cur = np.asarray(cur, dtype=float)
+        last = len(q) - 1
+        later = [s for s in stops if s >= index]
+        stop = min(later + [last])
+
+        # окно не заходит за точку остановки: проскочить событие нельзя
+        hi = min(index + self.lookahead, stop)
+        passed = self._within(cur, q[index:hi + 1], self._pass_tol)
+        if hi == stop:
+            passed[-1] = self._within(cur, q[stop], self._tol)
+
+        hits = np.flatnonzero(passed)
+        return index if hits.size == 0 else index + int(hits[-1]) + 1
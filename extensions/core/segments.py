@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import numpy as np
+
+from typing import Any, Dict, List
+
+from ..kinematics.simplify import simplify_indices
+from ..kinematics.trajectory import Trajectory
+
+
+class SegmentSender:
+    """
+    Сторона супервизора: готовые отсчёты траектории уходят роботу участками
+    (сообщение ``robot_segment``), а не по одному за шаг.
+
+    Участок — отсчёты с метками времени: целые номера шагов траектории, между
+    которыми контроллер интерполирует линейно. Перед отправкой участок прореживается
+    (simplify_indices с timed=True): положение в каждый момент отличается от исходного
+    не больше чем на tolerance; отсчёты с событиями сохраняются.
+
+    Данные сообщения::
+
+        {"start": 120, "dt": 0.016, "joints": ["lbr_A1", ...],
+         "k": [0, 7, 31, ...], "q": [[...], ...], "events": {"31": {"gripper": true}}}
+
+    где k и ключи events — номера шагов относительно start.
+    """
+
+    def __init__(self,
+                 trajectory: Trajectory,
+                 joint_names: List[str],
+                 dt: float,
+                 tolerance: float = 1e-3,
+                 max_samples: int = 500):
+        """
+        :param trajectory: исполняемая траектория (дописывается по мере планирования)
+        :param joint_names: имена моторов в порядке столбцов траектории
+        :param dt: шаг траектории, с
+        :param tolerance: допуск прореживания, рад
+        :param max_samples: наибольшее число шагов траектории в одном сообщении
+        """
+        self.trajectory = trajectory
+        self.joint_names = list(joint_names)
+        self.dt = float(dt)
+        self.tolerance = float(tolerance)
+        self.max_samples = int(max_samples)
+        self.sent = 0
+        self.messages = 0
+        self.samples = 0
+
+    def next_segment(self) -> Dict | None:
+        """Данные сообщения robot_segment для ещё не отправленных отсчётов или None."""
+        start, stop = self.sent, min(len(self.trajectory), self.sent + self.max_samples)
+        if stop <= start:
+            return None
+        part = self.trajectory[start:stop]
+        events = part.event_table()
+        keep = np.zeros(len(part), dtype=bool)
+        keep[list(events)] = True
+        index = simplify_indices(part.q, self.tolerance, None, keep, timed=True)
+
+        self.sent = stop
+        self.messages += 1
+        self.samples += len(index)
+        return {"start": start,
+                "dt": self.dt,
+                "joints": self.joint_names,
+                "k": index.tolist(),
+                "q": np.round(part.q[index], 6).tolist(),
+                "events": {str(i): kinds for i, kinds in events.items()}}
+
+    def summary(self) -> str:
+        return (f"{self.messages} сообщений, {self.samples} опорных отсчётов "
+                f"на {self.sent} шагов траектории")
+
+
+class SegmentPlayer:
+    """
+    Сторона контроллера робота: буфер принятых участков и локальная интерполяция.
+
+    Каждый шаг контроллера ``step`` продвигает время на шаг симуляции и возвращает
+    уставку суставов (линейная интерполяция между опорными отсчётами) и события,
+    пройденные за шаг. Если буфер кончился, робот стоит в последней точке, а время
+    не уходит вперёд — следующий участок продолжит движение с того же места.
+    """
+
+    def __init__(self):
+        self._k = np.zeros(0)
+        self._q = np.zeros((0, 0))
+        self._events: Dict[int, Dict[str, Any]] = {}
+        self.joints: List[str] = []
+        self.dt = 0.0
+        self.position = -1.0   # текущий шаг траектории (дробный); -1 — ещё не начато
+        self.gripper: bool | None = None
+        self._fired = -np.inf  # события до этого шага уже выданы
+
+    def push(self, segment: Dict):
+        """Добавляет участок из сообщения robot_segment."""
+        start = int(segment["start"])
+        k = start + np.asarray(segment["k"], dtype=float)
+        q = np.asarray(segment["q"], dtype=float)
+        self.joints = list(segment["joints"])
+        self.dt = float(segment["dt"])
+
+        # пройденные отсчёты не нужны — кроме последнего, от него идёт интерполяция
+        first = max(0, int(np.searchsorted(self._k, self.position, side="right")) - 1)
+        old_k, old_q = self._k[first:], self._q[first:]
+        old_k, old_q = old_k[old_k < start], old_q[old_k < start]
+        self._k = np.concatenate([old_k, k])
+        self._q = np.vstack([old_q, q]) if old_k.size else q
+        for i, kinds in segment.get("events", {}).items():
+            self._events[start + int(i)] = kinds
+        if self.position < 0:
+            self.position = float(self._k[0])
+
+    @property
+    def end(self) -> float:
+        """Последний принятый шаг траектории."""
+        return float(self._k[-1]) if self._k.size else -1.0
+
+    @property
+    def active(self) -> bool:
+        return self._k.size > 0
+
+    @property
+    def idle(self) -> bool:
+        """Всё принятое исполнено."""
+        return not self.active or self.position >= self.end
+
+    def step(self, timestep: float) -> tuple[np.ndarray | None, List[tuple[int, Dict[str, Any]]]]:
+        """
+        :param timestep: шаг симуляции, с
+        :return: уставка суставов (n,) или None, если участков ещё не было,
+                 и события [(шаг траектории, {тип: значение}), ...], пройденные за этот шаг
+        """
+        if not self.active:
+            return None, []
+        self.position = min(self.position + timestep / self.dt, self.end)
+        i = min(max(int(np.searchsorted(self._k, self.position, side="right")) - 1, 0), self._k.size - 1)
+        if i + 1 < self._k.size:
+            w = (self.position - self._k[i]) / (self._k[i + 1] - self._k[i])
+            q = self._q[i] + w * (self._q[i + 1] - self._q[i])
+        else:
+            q = self._q[i].copy()
+
+        passed = []
+        for k in sorted(k for k in self._events if self._fired < k <= self.position):
+            kinds = self._events.pop(k)
+            if "gripper" in kinds:
+                self.gripper = bool(kinds["gripper"])
+            passed.append((k, kinds))
+        self._fired = self.position
+        return q, passed
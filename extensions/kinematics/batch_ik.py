@@ -0,0 +1,476 @@
+import numpy as np
+
+from typing import Callable, Mapping, NamedTuple
+from numpy.typing import ArrayLike
+
+from .fk import kinematics_of, rpy_to_rot
+
+
+# вторичные критерии IK в нуль-пространстве якобиана (минимизируются)
+OBJECTIVES = ("limits", "qr", "manipulability")
+
+
+def parse_objective(objective: str | Mapping[str, float] | None) -> dict[str, float]:
+    """
+    Критерий избыточности: имя из OBJECTIVES, словарь {имя: вес} или None (без критерия).
+
+    "limits" — удалённость от середины диапазонов суставов, "qr" — близость к рабочей
+    позе qr (обе — сумма квадратов отклонений, нормированных на диапазон qlim);
+    "manipulability" — -ln√det(J Jᵀ), т. е. удалённость от сингулярностей.
+    """
+    if objective is None:
+        return {}
+    weights = {objective: 1.0} if isinstance(objective, str) else {k: float(w) for k, w in objective.items()}
+    unknown = set(weights) - set(OBJECTIVES)
+    if unknown:
+        raise ValueError(f"Неизвестный критерий IK: {', '.join(sorted(unknown))}")
+    return {k: w for k, w in weights.items() if w != 0}
+
+
+def objective_signature(objective: str | Mapping[str, float] | None) -> str:
+    """Строка критерия для ключей кэшей (пустая — без критерия)."""
+    return ",".join(f"{k}:{w:g}" for k, w in sorted(parse_objective(objective).items()))
+
+
+class BatchIKResult(NamedTuple):
+    q: np.ndarray           # (M, n) решения (для неудачных — последняя итерация)
+    success: np.ndarray     # (M,) флаги сходимости
+    residual: np.ndarray    # (M,) норма ошибки позы [м, рад]
+    iterations: np.ndarray  # (M,) число итераций с учётом перезапусков
+
+
+def pose_error(T: np.ndarray, T_goal: np.ndarray) -> np.ndarray:
+    """
+    Ошибка позы в системе базы: [p_goal - p; ω], где ω — ось*угол поворота R_goal @ R.T.
+
+    :param T: текущие позы (M, 4, 4)
+    :param T_goal: целевые позы (M, 4, 4)
+    :return: (M, 6)
+    """
+    e = np.empty(T.shape[:-2] + (6,))
+    e[..., :3] = T_goal[..., :3, 3] - T[..., :3, 3]
+
+    R_err = T_goal[..., :3, :3] @ np.swapaxes(T[..., :3, :3], -1, -2)
+    v = 0.5 * np.stack([R_err[..., 2, 1] - R_err[..., 1, 2],
+                        R_err[..., 0, 2] - R_err[..., 2, 0],
+                        R_err[..., 1, 0] - R_err[..., 0, 1]], axis=-1)
+    s = np.linalg.norm(v, axis=-1)
+    c = 0.5 * (np.trace(R_err, axis1=-2, axis2=-1) - 1.0)
+    angle = np.arctan2(s, c)
+
+    scale = np.where(s > 1e-12, angle / np.maximum(s, 1e-12), 1.0)
+    w = v * scale[..., None]
+
+    # угол около π: ось берём из симметричной части R + I
+    flip = (c < 0) & (s < 1e-6)
+    if np.any(flip):
+        B = R_err[flip] + np.eye(3)
+        col = np.argmax(np.linalg.norm(B, axis=-2), axis=-1)
+        axis = B[np.arange(B.shape[0]), :, col]
+        axis /= np.linalg.norm(axis, axis=-1, keepdims=True)
+        w[flip] = axis * angle[flip][:, None]
+
+    e[..., 3:] = w
+    return e
+
+
+def interpolate_poses(T_start: np.ndarray, T_goal: np.ndarray, s: ArrayLike) -> np.ndarray:
+    """
+    Позы на прямом отрезке между T_start и T_goal: позиция — линейно,
+    ориентация — по геодезической (поворот вокруг постоянной оси).
+
+    :param s: параметры пути (N,) в [0, 1]
+    :return: (N, 4, 4)
+    """
+    s = np.asarray(s, dtype=float).reshape(-1)
+    w = pose_error(T_start[None], T_goal[None])[0, 3:]
+    angle = np.linalg.norm(w)
+    axis = w / angle if angle > 1e-12 else np.zeros(3)
+
+    # формула Родрига для поворотов на s·angle вокруг axis
+    K = np.array([[0.0, -axis[2], axis[1]],
+                  [axis[2], 0.0, -axis[0]],
+                  [-axis[1], axis[0], 0.0]])
+    th = s * angle
+    R = (np.eye(3) + np.sin(th)[:, None, None] * K
+         + (1.0 - np.cos(th))[:, None, None] * (K @ K))
+
+    T = np.zeros((s.size, 4, 4))
+    T[:, :3, :3] = R @ T_start[:3, :3]
+    T[:, :3, 3] = T_start[:3, 3] + s[:, None] * (T_goal[:3, 3] - T_start[:3, 3])
+    T[:, 3, 3] = 1.0
+    return T
+
+
+class BatchIKSolver:
+    """
+    Пакетная обратная кинематика методом затухающих наименьших квадратов (Левенберг–Марквардт).
+
+    Решает M целей одновременно: FK и якобианы считаются векторизованно,
+    у каждой цели своя маска сходимости и свой коэффициент затухания.
+
+    С критерием objective сошедшиеся решения затем сдвигаются вдоль избыточности
+    (для 7 осей — угол локтя) градиентным спуском по критерию, спроецированным
+    в нуль-пространство якобиана; поза TCP после каждого шага восстанавливается
+    шагами Гаусса — Ньютона, шаг принимается, только если невязка в допуске
+    и критерий уменьшился.
+    """
+
+    def __init__(self,
+                 robot,
+                 ilimit: int = 100,
+                 slimit: int = 5,
+                 tol: float = 1e-6,
+                 damping: float = 1e-2,
+                 joint_limits: bool = True,
+                 seed: int = 0,
+                 objective: str | Mapping[str, float] | None = None,
+                 null_ilimit: int = 60,
+                 null_step: float = 0.2):
+        """
+        :param robot: модель робота (DHModel с qlim)
+        :param ilimit: максимум итераций на одну попытку
+        :param slimit: число перезапусков из случайной конфигурации для несошедшихся целей
+        :param tol: допуск на норму ошибки позы
+        :param damping: начальный коэффициент затухания λ
+        :param joint_limits: ограничивать решения пределами qlim
+        :param seed: зерно генератора для перезапусков (результат детерминирован)
+        :param objective: вторичный критерий в нуль-пространстве (см. parse_objective):
+                          "limits", "qr", "manipulability" или {имя: вес}; None — любое решение
+        :param null_ilimit: максимум итераций спуска по критерию
+        :param null_step: наибольший шаг вдоль нуль-пространства, рад
+        """
+        self._kin = kinematics_of(robot)
+        self._qr = getattr(robot, "qr", None)
+        self._qlim = np.asarray(robot.qlim, dtype=float)
+        self._ilimit = int(ilimit)
+        self._slimit = int(slimit)
+        self._tol = float(tol)
+        self._damping = float(damping)
+        self._joint_limits = joint_limits
+        self._seed = seed
+        self._objective = parse_objective(objective)
+        self._null_ilimit = int(null_ilimit)
+        self._null_step = float(null_step)
+
+        lo, hi = self._qlim
+        self._q_mid = 0.5 * (lo + hi)
+        self._q_ref = self._q_mid if self._qr is None else np.asarray(self._qr, dtype=float)
+        self._q_w = 1.0 / (hi - lo) ** 2
+        if "qr" in self._objective and self._qr is None:
+            print("[WARN] У модели нет qr — критерий 'qr' считается от середины диапазонов.")
+
+    @property
+    def objective(self) -> str:
+        """Подпись критерия (objective_signature); пустая строка — без критерия."""
+        return objective_signature(self._objective)
+
+    def _clip(self, q: np.ndarray) -> np.ndarray:
+        if self._joint_limits:
+            np.clip(q, self._qlim[0], self._qlim[1], out=q)
+        return q
+
+    def _step(self, q: np.ndarray, J: np.ndarray, e: np.ndarray, lam: np.ndarray) -> np.ndarray:
+        """
+        Шаг затухающих наименьших квадратов с учётом пределов: сустав, стоящий на пределе,
+        которого шаг толкает наружу, исключается из якобиана (вес 0), и шаг пересчитывается
+        по остальным — избыточность отрабатывают другие суставы, а не обрезание после шага.
+        """
+        eye6 = np.eye(6)
+        lam2 = (lam ** 2)[:, None, None] * eye6
+        dq = np.einsum("mji,mj->mi", J, np.linalg.solve(J @ J.transpose(0, 2, 1) + lam2, e[..., None])[..., 0])
+        if not self._joint_limits:
+            return dq
+        lo, hi = self._qlim
+        at_hi, at_lo = q >= hi - 1e-9, q <= lo + 1e-9
+        free = np.ones_like(q)
+        for _ in range(3):
+            pinned = (at_hi & (dq > 0)) | (at_lo & (dq < 0))
+            if not np.any(pinned & (free > 0)):
+                break
+            free[pinned] = 0.0
+            Jw = J * free[:, None, :]
+            dq = np.einsum("mji,mj->mi", Jw, np.linalg.solve(Jw @ J.transpose(0, 2, 1) + lam2, e[..., None])[..., 0])
+        return dq
+
+    def _iterate(self, q: np.ndarray, T_goal: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Одна попытка LM для всех целей; возвращает q, ошибку и число итераций."""
+        M = q.shape[0]
+        T, J = self._kin.fkine_jacob0(q)
+        e = pose_error(T, T_goal)
+        E = np.einsum("ij,ij->i", e, e)
+
+        lam = np.full(M, self._damping)
+        iters = np.zeros(M, dtype=int)
+        active = np.sqrt(E) >= self._tol
+        E_check = E.copy()
+
+        for it in range(self._ilimit):
+            idx = np.flatnonzero(active)
+            if idx.size == 0:
+                break
+
+            Ja, ea = J[idx], e[idx]
+            dq = self._step(q[idx], Ja, ea, lam[idx])
+            q_new = self._clip(q[idx] + dq)
+
+            T_new, J_new = self._kin.fkine_jacob0(q_new)
+            e_new = pose_error(T_new, T_goal[idx])
+            E_new = np.einsum("ij,ij->i", e_new, e_new)
+            iters[idx] += 1
+
+            better = E_new < E[idx]
+            acc = idx[better]
+            q[acc], J[acc], e[acc], E[acc] = q_new[better], J_new[better], e_new[better], E_new[better]
+            lam[acc] = np.maximum(lam[acc] * 0.5, 1e-6)
+            lam[idx[~better]] *= 4.0
+
+            # стагнация: затухание выросло до бесполезного — дальше шаг не сдвинется
+            active[idx] = (np.sqrt(E[idx]) >= self._tol) & (lam[idx] < 1e4)
+
+            # ползание вдоль предела сустава: за 10 итераций ошибка не упала вдвое
+            if (it + 1) % 10 == 0:
+                active &= E < 0.25 * E_check
+                E_check[:] = E
+
+        return q, np.sqrt(E), iters
+
+    def _log_manipulability(self, J: np.ndarray) -> np.ndarray:
+        return 0.5 * np.linalg.slogdet(J @ J.transpose(0, 2, 1))[1]
+
+    def cost(self, q: ArrayLike, J: np.ndarray | None = None) -> np.ndarray:
+        """
+        Значение критерия для пачки конфигураций (M,); нули без критерия.
+
+        :param J: якобианы q, если уже посчитаны (нужны для "manipulability")
+        """
+        q = np.atleast_2d(np.asarray(q, dtype=float))
+        h = np.zeros(q.shape[0])
+        for name, w in self._objective.items():
+            if name == "manipulability":
+                if J is None:
+                    J = self._kin.jacob0(q)
+                h -= w * self._log_manipulability(J)
+            else:
+                ref = self._q_mid if name == "limits" else self._q_ref
+                h += w * ((q - ref) ** 2) @ self._q_w
+        return h
+
+    def _gradient(self, q: np.ndarray, J: np.ndarray) -> np.ndarray:
+        g = np.zeros_like(q)
+        for name, w in self._objective.items():
+            if name == "manipulability":
+                # конечные разности ln√det(J Jᵀ): все n сдвигов всех целей — одним пакетом
+                eps = 1e-6
+                M, n = q.shape
+                q_eps = (q[:, None, :] + eps * np.eye(n)).reshape(-1, n)
+                lm_eps = self._log_manipulability(self._kin.jacob0(q_eps)).reshape(M, n)
+                g -= w * (lm_eps - self._log_manipulability(J)[:, None]) / eps
+            else:
+                ref = self._q_mid if name == "limits" else self._q_ref
+                g += w * 2.0 * (q - ref) * self._q_w
+        return g
+
+    def _correct(self, q: np.ndarray, T_goal: np.ndarray, steps: int = 3):
+        """Шаги Гаусса — Ньютона к позе T_goal; возвращает q, якобианы и невязку."""
+        mu = 1e-10 * np.eye(6)
+        for _ in range(steps):
+            T, J = self._kin.fkine_jacob0(q)
+            e = pose_error(T, T_goal)
+            q = self._clip(q + np.einsum("mji,mj->mi", J, np.linalg.solve(J @ J.transpose(0, 2, 1) + mu, e[..., None])[..., 0]))
+        T, J = self._kin.fkine_jacob0(q)
+        return q, J, np.linalg.norm(pose_error(T, T_goal), axis=1)
+
+    def _optimize(self, q: np.ndarray, T_goal: np.ndarray) -> np.ndarray:
+        """
+        Спуск по критерию вдоль нуль-пространства для уже сошедшихся решений.
+        Шаг у каждой цели свой: растёт в 1.5 раза после удачного шага, делится
+        пополам после неудачного; цель выбывает, когда шаг меньше 1e-3 рад.
+        """
+        M = q.shape[0]
+        _, J = self._kin.fkine_jacob0(q)
+        h = self.cost(q, J)
+        step = np.full(M, 0.25 * self._null_step)
+        active = np.ones(M, dtype=bool)
+        mu = 1e-10 * np.eye(6)
+
+        for _ in range(self._null_ilimit):
+            idx = np.flatnonzero(active)
+            if idx.size == 0:
+                break
+            qa, Ja = q[idx], J[idx]
+            g = self._gradient(qa, Ja)
+            # проекция градиента на нуль-пространство: g - J⁺ J g
+            Jg = np.einsum("mij,mj->mi", Ja, g)
+            null = g - np.einsum("mji,mj->mi", Ja, np.linalg.solve(Ja @ Ja.transpose(0, 2, 1) + mu, Jg[..., None])[..., 0])
+            size = np.abs(null).max(axis=1)
+            flat = size < 1e-9
+            q_new, J_new, res = self._correct(qa - null * (step[idx] / np.maximum(size, 1e-12))[:, None], T_goal[idx])
+            h_new = self.cost(q_new, J_new)
+
+            better = ~flat & (res < self._tol) & (h_new < h[idx])
+            acc = idx[better]
+            q[acc], J[acc], h[acc] = q_new[better], J_new[better], h_new[better]
+            step[acc] = np.minimum(step[acc] * 1.5, self._null_step)
+            step[idx[~better]] *= 0.5
+            active[idx] = ~flat & (step[idx] >= 1e-3)
+
+        return q
+
+    def refine(self, q: ArrayLike, T_goal: ArrayLike) -> np.ndarray:
+        """
+        Сдвигает готовые решения IK (например, ikine_LM) по критерию objective.
+
+        :param q: решения (n,) или (M, n)
+        :param T_goal: их целевые позы (4, 4) или (M, 4, 4)
+        :return: решения той же формы; без критерия — без изменений
+        """
+        q = np.asarray(q, dtype=float)
+        if not self._objective:
+            return q
+        out = self._optimize(np.atleast_2d(q).copy(), np.asarray(T_goal, dtype=float).reshape(-1, 4, 4))
+        return out.reshape(q.shape)
+
+    def solve_poses(self, q0: ArrayLike, T_goal: ArrayLike, optimize: bool = True) -> BatchIKResult:
+        """
+        :param q0: начальное приближение (n,) — общее для всех целей, или (M, n)
+        :param T_goal: целевые позы TCP (M, 4, 4)
+        :param optimize: сдвигать решения по критерию objective (если он задан)
+        """
+        T_goal = np.asarray(T_goal, dtype=float).reshape(-1, 4, 4)
+        M = T_goal.shape[0]
+        q = self._clip(np.array(np.broadcast_to(q0, (M, self._kin.n)), dtype=float))
+
+        q, residual, iterations = self._iterate(q, T_goal)
+        success = residual < self._tol
+
+        # перезапуски: сначала из рабочей позы qr модели, затем из случайных конфигураций
+        rng = np.random.default_rng(self._seed)
+        for attempt in range(self._slimit):
+            failed = np.flatnonzero(~success)
+            if failed.size == 0:
+                break
+            if attempt == 0 and self._qr is not None:
+                q_seed = np.tile(np.asarray(self._qr, dtype=float), (failed.size, 1))
+            else:
+                q_seed = rng.uniform(self._qlim[0], self._qlim[1], (failed.size, self._kin.n))
+            q_r, res_r, it_r = self._iterate(self._clip(q_seed), T_goal[failed])
+            iterations[failed] += it_r
+
+            improved = res_r < residual[failed]
+            upd = failed[improved]
+            q[upd], residual[upd] = q_r[improved], res_r[improved]
+            success = residual < self._tol
+
+        if optimize and self._objective and np.any(success):
+            q[success] = self._optimize(q[success], T_goal[success])
+
+        return BatchIKResult(q=q, success=success, residual=residual, iterations=iterations)
+
+    def solve(self, q0: ArrayLike, xyz: ArrayLike, rpy: ArrayLike, optimize: bool = True) -> BatchIKResult:
+        """
+        :param q0: начальное приближение (n,) или (M, n)
+        :param xyz: целевые позиции (M, 3)
+        :param rpy: целевые ориентации (M, 3), порядок "xyz" как в solve_ik
+        """
+        xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+        T_goal = np.zeros((xyz.shape[0], 4, 4))
+        T_goal[:, :3, :3] = rpy_to_rot(np.asarray(rpy, dtype=float).reshape(-1, 3))
+        T_goal[:, :3, 3] = xyz
+        T_goal[:, 3, 3] = 1.0
+        return self.solve_poses(q0, T_goal, optimize)
+
+    @staticmethod
+    def _filtered(result: BatchIKResult, reject: Callable[[np.ndarray], np.ndarray] | None) -> BatchIKResult:
+        if reject is not None and np.any(result.success):
+            result.success[result.success & reject(result.q)] = False
+        return result
+
+    def solve_sequence(self,
+                       q_start: ArrayLike,
+                       xyz: ArrayLike,
+                       rpy: ArrayLike,
+                       reject: Callable[[np.ndarray], np.ndarray] | None = None) -> BatchIKResult:
+        """
+        Цели программы, идущие друг за другом: как при последовательном планировании,
+        каждая цель уточняется из решения предыдущей, чтобы соседние позы лежали
+        на одной ветви. Обе фазы считаются одним пакетом; критерий objective
+        применяется во второй фазе, когда ветвь уже выбрана.
+
+        :param reject: маска недопустимых решений (M, n) -> (M,), например самопересечений;
+                       такие решения считаются неудачными и не служат приближением следующей цели
+        """
+        q_start = np.asarray(q_start, dtype=float)
+        first = self._filtered(self.solve(q_start, xyz, rpy, optimize=False), reject)
+        if first.q.shape[0] < 2:
+            return self._filtered(self.solve(q_start, xyz, rpy), reject) if self._objective else first
+
+        seeds = np.vstack([q_start, first.q[:-1]])
+        seeds[1:][~first.success[:-1]] = q_start
+        second = self._filtered(self.solve(seeds, xyz, rpy), reject)
+
+        take = second.success | ~first.success
+        q = np.where(take[:, None], second.q, first.q)
+        residual = np.where(take, second.residual, first.residual)
+        return BatchIKResult(q=q,
+                             success=first.success | second.success,
+                             residual=residual,
+                             iterations=first.iterations + second.iterations)
+
+    def solve_path(self, q_start: ArrayLike, T_path: ArrayLike, stride: int = 4) -> BatchIKResult:
+        """
+        IK вдоль плотно дискретизированного пути (например, прямого отрезка TCP).
+
+        Начальные приближения строятся слежением по каждой stride-й точке: шаг
+        затухающих наименьших квадратов из предыдущего решения, поэтому избыточность
+        (угол локтя) меняется непрерывно; между ними — линейная интерполяция.
+        Затем все точки уточняются одним пакетом. Критерий objective здесь не
+        применяется: избыточность вдоль пути задаёт q_start, иначе первые точки
+        пути «перескакивали» бы к оптимуму критерия.
+
+        :param q_start: конфигурация в первой точке пути (n,)
+        :param T_path: позы пути (M, 4, 4), T_path[0] — поза q_start
+        :param stride: шаг слежения по точкам пути
+        """
+        T_path = np.asarray(T_path, dtype=float).reshape(-1, 4, 4)
+        M = T_path.shape[0]
+        knots = np.unique(np.append(np.arange(0, M, stride), M - 1))
+
+        q_knots = np.empty((knots.size, self._kin.n))
+        q_knots[0] = q_start
+        lam2 = self._damping ** 2 * np.eye(6)
+        for k in range(1, knots.size):
+            T, J = self._kin.fkine_jacob0(q_knots[k - 1])
+            e = pose_error(T, T_path[knots[k]])
+            q_knots[k] = self._clip(q_knots[k - 1] + J.T @ np.linalg.solve(J @ J.T + lam2, e))
+
+        seeds = np.stack([np.interp(np.arange(M), knots, q_knots[:, j]) for j in range(self._kin.n)], axis=1)
+        return self.solve_poses(seeds, T_path, optimize=False)
+
+
+if __name__ == "__main__":
+    import argparse
+    from .robot_models import LBRiiwaR800Model
+
+    parser = argparse.ArgumentParser(description="Проверка BatchIKSolver: решение целей у пределов суставов")
+    parser.add_argument("--samples", type=int, default=500, help="Число случайных поз")
+    args = parser.parse_args()
+
+    model = LBRiiwaR800Model()
+    kin = kinematics_of(model)
+    solver = BatchIKSolver(model)
+    rng = np.random.default_rng(0)
+
+    # цель example_move.json, решение которой упирается в предел q6
+    result = solver.solve(model.qz, [[0.31, -0.5, 0.495]], [[-3.14, 0.0, 3.14]])
+    print(f"[INFO] Цель у предела q6: невязка {result.residual[0]:.1e}, итераций {result.iterations[0]}")
+    assert result.success[0], "BatchIKSolver: цель у предела сустава не решена"
+
+    xyz, rpy = kin.fkine_xyzrpy(rng.uniform(model.qlim[0], model.qlim[1], (args.samples, model.n)))
+    for name in ("qz", "qr"):
+        result = solver.solve(getattr(model, name), xyz, rpy)
+        inside = np.all((result.q >= model.qlim[0]) & (result.q <= model.qlim[1]))
+        print(f"[INFO] Из {name}: решено {result.success.mean():.1%} из {args.samples} поз, "
+              f"итераций в среднем {result.iterations.mean():.1f}")
+        assert inside, "BatchIKSolver: решение вне qlim"
+        assert result.success.mean() >= 0.98, f"BatchIKSolver: из {name} решено меньше 98% поз"
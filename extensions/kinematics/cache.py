@@ -0,0 +1,268 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+from collections import OrderedDict
+from typing import Any, Callable, Tuple
+from numpy.typing import ArrayLike
+
+from .fk import model_hash
+from .trajectory import Trajectory
+
+
+IKFunction = Callable[[ArrayLike, ArrayLike, ArrayLike], np.ndarray | None]
+
+
+class IKCache:
+    """
+    Кэш решений IK с квантованием позы и вытеснением LRU.
+
+    Ключ — квантованные (xyz, rpy) цели и «корзина» начального приближения q:
+    одинаковая цель из близкой конфигурации даёт то же решение.
+    Неудачные решения (None) тоже кэшируются, чтобы недостижимая цель
+    не пересчитывалась на каждом шаге, но только в памяти: в файл они не пишутся —
+    IK со случайными перезапусками и проверкой столкновений в следующем запуске
+    может цель решить. Файл привязан к модели (model_hash) и настройкам решателя (tag).
+    """
+
+    def __init__(self,
+                 maxsize: int = 4096,
+                 pos_step: float = 1e-4,
+                 rot_step: float = 1e-3,
+                 seed_step: float = 0.05,
+                 path: str | None = None,
+                 tag: str = "",
+                 model=None):
+        """
+        :param maxsize: максимум записей, при переполнении вытесняется самая старая по обращению
+        :param pos_step: шаг квантования позиции, м
+        :param rot_step: шаг квантования RPY, рад
+        :param seed_step: шаг квантования начального приближения q, рад
+        :param path: файл .npz для сохранения между запусками (загружается, если существует)
+        :param tag: настройки решателя, от которых зависят решения (например, критерий
+                    избыточности objective_signature); файл с другим tag не загружается
+        :param model: модель робота — файл, сохранённый для другой модели (model_hash), не загружается
+        """
+        self._maxsize = int(maxsize)
+        self._pos_step = float(pos_step)
+        self._rot_step = float(rot_step)
+        self._seed_step = float(seed_step)
+        self._path = path
+        self.tag = tag
+        self.model_hash = model_hash(model) if model is not None else ""
+        self._data: OrderedDict[Tuple[int, ...], np.ndarray | None] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def key(self, q_current: ArrayLike, xyz: ArrayLike, rpy: ArrayLike) -> Tuple[int, ...]:
+        rpy = (np.asarray(rpy, dtype=float) + np.pi) % (2 * np.pi) - np.pi
+        parts = (np.asarray(xyz, dtype=float) / self._pos_step,
+                 rpy / self._rot_step,
+                 np.asarray(q_current, dtype=float) / self._seed_step)
+        return tuple(int(v) for v in np.rint(np.concatenate(parts)))
+
+    def lookup(self, key: Tuple[int, ...]) -> Tuple[bool, np.ndarray | None]:
+        """:return: (найдено ли, решение или None)"""
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, self._data[key]
+        self.misses += 1
+        return False, None
+
+    def store(self, key: Tuple[int, ...], q: ArrayLike | None):
+        self._data[key] = None if q is None else np.array(q, dtype=float)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def wrap(self, solver: IKFunction) -> IKFunction:
+        """Оборачивает функцию вида ik_solver(q_current, xyz, rpy) -> q | None."""
+        def cached(q_current, xyz, rpy):
+            key = self.key(q_current, xyz, rpy)
+            found, q = self.lookup(key)
+            if not found:
+                q = solver(q_current, xyz, rpy)
+                self.store(key, q)
+            return q
+        return cached
+
+    @property
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+    def clear(self):
+        self._data.clear()
+        self.hits = self.misses = 0
+
+    def save(self, path: str | None = None):
+        path = path or self._path
+        if path is None:
+            return
+        # неудачи — только в памяти текущего запуска
+        items = [(k, q) for k, q in self._data.items() if q is not None]
+        keys = np.array([k for k, _ in items], dtype=np.int64)
+        values = np.array([q for _, q in items])
+        solved = np.ones(len(items), dtype=bool)
+        steps = np.array([self._pos_step, self._rot_step, self._seed_step])
+        try:
+            np.savez(path, keys=keys, values=values, solved=solved, steps=steps,
+                     tag=np.array(self.tag), model=np.array(self.model_hash))
+        except OSError as e:
+            print(f"[WARN] Не удалось сохранить IK-кэш '{path}': {e}")
+
+    def load(self, path: str):
+        try:
+            data = np.load(path)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Не удалось загрузить IK-кэш '{path}': {e}")
+            return
+
+        steps = np.array([self._pos_step, self._rot_step, self._seed_step])
+        if not np.allclose(data["steps"], steps):
+            print(f"[WARN] IK-кэш '{path}' построен с другим квантованием — пропускаю.")
+            return
+        model = str(data["model"]) if "model" in data.files else ""
+        if model != self.model_hash:
+            print(f"[INFO] IK-кэш '{path}' построен для другой модели — пропускаю.")
+            return
+        tag = str(data["tag"]) if "tag" in data.files else ""
+        if tag != self.tag:
+            print(f"[INFO] IK-кэш '{path}' построен с другими настройками решателя ('{tag}') — пропускаю.")
+            return
+        for key, q, ok in zip(data["keys"], data["values"], data["solved"]):
+            if ok:
+                self.store(tuple(int(v) for v in key), q)
+
+
+
+class TrajectoryCache:
+    """
+    Дисковый кэш спланированных программ с адресацией по содержимому.
+
+    Ключ — хэш списка команд, начальной конфигурации, параметров модели
+    (DH, base/tool, пределы q, qd, qdd, qddd), шага dt и настроек планирования.
+    Любое изменение входных данных даёт новый ключ, поэтому устаревшая запись
+    просто перестаёт находиться; старые записи вытесняются по времени обращения.
+
+    Запись — ``<ключ>.npy`` с отсчётами (открывается через memory map)
+    и ``<ключ>.json`` с таблицей событий.
+    """
+
+    VERSION = 1
+
+    def __init__(self, directory: str, max_entries: int = 16):
+        """
+        :param directory: каталог кэша (создаётся при первой записи)
+        :param max_entries: сколько программ хранить; лишние удаляются, начиная с давно не открывавшихся
+        """
+        self.directory = directory
+        self.max_entries = int(max_entries)
+
+    def key(self,
+            commands: list,
+            q_start: ArrayLike,
+            robot,
+            dt: float,
+            **settings: Any) -> str:
+        """
+        :param commands: программа (список команд, сериализуемый в JSON)
+        :param q_start: начальная конфигурация
+        :param robot: модель робота
+        :param dt: шаг траектории, с
+        :param settings: прочие параметры, влияющие на результат (speed_scale, profile, ...)
+        """
+        h = hashlib.sha1()
+        h.update(json.dumps({"version": self.VERSION,
+                             "commands": commands,
+                             "dt": float(dt),
+                             "settings": settings}, sort_keys=True, default=float).encode("utf-8"))
+        h.update(model_hash(robot).encode("ascii"))
+        for name in ("qdd", "qddd", "tau_max"):
+            h.update(np.ascontiguousarray(getattr(robot, name, ()), dtype=float).tobytes())
+        h.update(np.ascontiguousarray(q_start, dtype=float).tobytes())
+        return h.hexdigest()
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return base + ".npy", base + ".json"
+
+    def load(self, key: str) -> Trajectory | None:
+        """:return: траектория (отсчёты — memory map, только чтение) или None, если записи нет"""
+        q_path, events_path = self._paths(key)
+        if not (os.path.exists(q_path) and os.path.exists(events_path)):
+            return None
+        try:
+            with open(events_path, encoding="utf-8") as f:
+                events = {int(i): kinds for i, kinds in json.load(f).items()}
+            q = np.load(q_path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Не удалось загрузить траекторию из кэша '{q_path}': {e}")
+            return None
+
+        os.utime(events_path)
+        return Trajectory.from_array(q, events, copy=False)
+
+    def store(self, key: str, trajectory: Trajectory):
+        q_path, events_path = self._paths(key)
+        events = {str(i): kinds for i, kinds in trajectory.event_table().items()}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # запись через временные файлы: прерванный запуск не оставит битую запись
+            with open(q_path + ".tmp", "wb") as f:
+                np.save(f, trajectory.q)
+            with open(events_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(events, f, ensure_ascii=False)
+            os.replace(q_path + ".tmp", q_path)
+            os.replace(events_path + ".tmp", events_path)
+        except (OSError, TypeError) as e:
+            print(f"[WARN] Не удалось сохранить траекторию в кэш '{q_path}': {e}")
+            return
+        self._prune()
+
+    def _prune(self):
+        entries = sorted((os.path.getmtime(os.path.join(self.directory, name)), name[:-5])
+                         for name in os.listdir(self.directory) if name.endswith(".json"))
+        for _, key in entries[:max(0, len(entries) - self.max_entries)]:
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+if __name__ == "__main__":
+    import tempfile
+    from .robot_models import LBRiiwaR800Model
+
+    model = LBRiiwaR800Model()
+    other = LBRiiwaR800Model()
+    other.qd = 0.5 * np.asarray(other.qd, dtype=float)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ik_cache.npz")
+        cache = IKCache(path=path, model=model)
+        solved_key = cache.key(model.qz, [0.5, 0.0, 0.5], [np.pi, 0.0, 0.0])
+        failed_key = cache.key(model.qz, [2.0, 0.0, 0.5], [np.pi, 0.0, 0.0])
+        cache.store(solved_key, model.qr)
+        cache.store(failed_key, None)
+        assert cache.lookup(failed_key) == (True, None)
+        cache.save()
+
+        reloaded = IKCache(path=path, model=model)
+        found, q = reloaded.lookup(solved_key)
+        assert found and np.allclose(q, model.qr), "IKCache: решение не загрузилось"
+        assert not reloaded.lookup(failed_key)[0], "IKCache: неудачное решение попало в файл"
+        assert len(IKCache(path=path, model=other)) == 0, "IKCache: загружен файл другой модели"
+    print("[INFO] IKCache: в файле только решённые цели, файл другой модели не загружается")
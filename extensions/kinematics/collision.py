@@ -0,0 +1,418 @@
+import hashlib
+import numpy as np
+
+from typing import NamedTuple
+from numpy.typing import ArrayLike
+
+from .fk import kinematics_of
+
+
+class CollisionResult(NamedTuple):
+    """Первое столкновение на траектории: index = -1, если столкновений нет."""
+    index: int
+    link: str | None = None
+    obstacle: str | None = None
+
+    @property
+    def collides(self) -> bool:
+        return self.index >= 0
+
+
+def pose_matrix(translation: ArrayLike, rotation: ArrayLike | None = None) -> np.ndarray:
+    """
+    Поза 4x4 по смещению и повороту.
+
+    :param rotation: матрица 3x3 или ось-угол (x, y, z, angle) как в Webots; None — без поворота
+    """
+    T = np.eye(4)
+    T[:3, 3] = np.asarray(translation, dtype=float)
+    if rotation is None:
+        return T
+    rotation = np.asarray(rotation, dtype=float)
+    if rotation.shape == (3, 3):
+        T[:3, :3] = rotation
+        return T
+
+    axis, angle = rotation[:3], rotation[3]
+    norm = np.linalg.norm(axis)
+    if norm < 1e-12:
+        return T
+    k = axis / norm
+    K = np.array([[0.0, -k[2], k[1]],
+                  [k[2], 0.0, -k[0]],
+                  [-k[1], k[0], 0.0]])
+    T[:3, :3] = np.eye(3) + np.sin(angle) * K + (1.0 - np.cos(angle)) * (K @ K)
+    return T
+
+
+def _slab(p0: np.ndarray, d: np.ndarray, half: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Интервал параметра t, на котором p0 + t·d лежит в |x| <= half (по последней оси — покоординатно)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t1 = (-half - p0) / d
+        t2 = (half - p0) / d
+    parallel = np.abs(d) < 1e-12
+    inside = np.abs(p0) <= half
+    lo = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(t1, t2))
+    hi = np.where(parallel, np.where(inside, np.inf, -np.inf), np.maximum(t1, t2))
+    return lo, hi
+
+
+def segment_distance(p1: np.ndarray, q1: np.ndarray, p2: np.ndarray, q2: np.ndarray) -> np.ndarray:
+    """
+    Расстояние между отрезками p1–q1 и p2–q2 (пакетно по первым осям, последняя — xyz).
+    Ближайшие точки ищутся по параметрам на [0, 1]; вырожденный отрезок — точка.
+    """
+    def dot(x, y):
+        return np.einsum("...i,...i->...", x, y)
+
+    d1, d2, r = q1 - p1, q2 - p2, p1 - p2
+    a, e, b, c, f = dot(d1, d1), dot(d2, d2), dot(d1, d2), dot(d1, r), dot(d2, r)
+    eps = 1e-12
+    a_safe, e_safe = np.maximum(a, eps), np.maximum(e, eps)
+    denom = a * e - b * b
+
+    # параметр на первом отрезке (для параллельных — начало), проекция на второй;
+    # если она вышла за конец второго — обратная проекция на первый
+    s = np.where(denom > eps, np.clip((b * f - c * e) / np.maximum(denom, eps), 0.0, 1.0), 0.0)
+    t = (b * s + f) / e_safe
+    t_clip = np.clip(t, 0.0, 1.0)
+    s = np.where(t == t_clip, s, np.clip((b * t_clip - c) / a_safe, 0.0, 1.0))
+    t = t_clip
+
+    point_1, point_2 = a <= eps, e <= eps
+    s = np.where(point_1, 0.0, np.where(point_2, np.clip(-c / a_safe, 0.0, 1.0), s))
+    t = np.where(point_2, 0.0, np.where(point_1, np.clip(f / e_safe, 0.0, 1.0), t))
+
+    diff = r + s[..., None] * d1 - t[..., None] * d2
+    return np.sqrt(dot(diff, diff))
+
+
+class LinkCapsules:
+    """
+    Капсулы звеньев робота по пакетной FK.
+
+    Звено i — отрезок между началами систем DH i - 1 и i с радиусом ``robot.link_radii[i]``
+    (звенья нулевой длины — сферы в узлах). Инструмент — отрезки вдоль оси z фланца:
+    ``robot.tool_capsules = [(имя, z0, z1, радиус), ...]``; если их нет — одна капсула
+    от фланца до TCP.
+    """
+
+    def __init__(self, robot):
+        self._kin = kinematics_of(robot)
+        n = self._kin.n
+        radii = np.asarray(getattr(robot, "link_radii", np.full(n, 0.06)), dtype=float).reshape(n)
+        tool = getattr(robot, "tool_capsules", None)
+        if tool is None:
+            tool = [("tool", 0.0, float(np.linalg.norm(self._kin.tool[:3, 3])), 0.04)]
+
+        self.names = [f"link{i + 1}" for i in range(n)] + [name for name, *_ in tool]
+        self.radii = np.concatenate([radii, [r for *_, r in tool]])
+        self._tool_z = np.array([(z0, z1) for _, z0, z1, _ in tool], dtype=float).reshape(-1, 2)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def n(self) -> int:
+        return self._kin.n
+
+    def segments(self, q: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :param q: конфигурации (N, n)
+        :return: начала и концы отрезков капсул (N, C, 3)
+        """
+        n = self._kin.n
+        frames = self._kin.link_frames(np.asarray(q, dtype=float).reshape(-1, n))
+        origins = frames[:, :n + 1, :3, 3]
+        flange_p, flange_z = frames[:, n, None, :3, 3], frames[:, n, None, :3, 2]
+        tool_a = flange_p + self._tool_z[None, :, 0, None] * flange_z
+        tool_b = flange_p + self._tool_z[None, :, 1, None] * flange_z
+        return (np.concatenate([origins[:, :-1], tool_a], axis=1),
+                np.concatenate([origins[:, 1:], tool_b], axis=1))
+
+    @property
+    def reach(self) -> float:
+        """Наибольшее расстояние точки капсул от оси первого сустава (оценка сверху), м."""
+        return float(np.sum(np.abs(self._kin.d)) + np.sum(np.abs(self._kin.a))
+                     + max(float(np.max(np.abs(self._tool_z))), 0.0) + np.max(self.radii))
+
+
+class SelfCollision:
+    """
+    Самопересечения робота: расстояния между капсулами звеньев для всех пар,
+    кроме исключённых (соседние звенья; пары, которые в пределах суставов
+    пересекаются всегда или не пересекаются никогда). Пачка конфигураций (N, n)
+    проверяется одним проходом.
+    """
+
+    def __init__(self,
+                 robot,
+                 capsules: LinkCapsules | None = None,
+                 margin: float = 0.0,
+                 exclusions: list[tuple[str, str]] | None = None):
+        """
+        :param robot: модель робота (DHModel)
+        :param capsules: геометрия звеньев; по умолчанию строится по модели
+        :param margin: запас между капсулами, м
+        :param exclusions: исключённые пары имён капсул; по умолчанию robot.collision_exclusions,
+                           а если их нет — build_exclusions
+        """
+        self.capsules = capsules or LinkCapsules(robot)
+        self.margin = float(margin)
+        if exclusions is None:
+            exclusions = getattr(robot, "collision_exclusions", None)
+        if exclusions is None:
+            exclusions = self.build_exclusions(robot, self.capsules)
+
+        index = {name: i for i, name in enumerate(self.capsules.names)}
+        self.excluded = np.eye(len(self.capsules), dtype=bool)
+        for u, v in exclusions:
+            if u in index and v in index:
+                self.excluded[index[u], index[v]] = self.excluded[index[v], index[u]] = True
+        self.pairs = np.argwhere(np.triu(~self.excluded))
+        self._limit = self.capsules.radii[self.pairs[:, 0]] + self.capsules.radii[self.pairs[:, 1]]
+
+    @staticmethod
+    def build_exclusions(robot,
+                         capsules: LinkCapsules | None = None,
+                         samples: int = 100_000,
+                         clearance: float = 0.02,
+                         seed: int = 0) -> list[tuple[str, str]]:
+        """
+        Матрица исключений по случайным конфигурациям в пределах robot.qlim:
+        соседние капсулы (общий конец), пары, пересекающиеся во всех конфигурациях,
+        и пары, ни в одной конфигурации не сблизившиеся ближе clearance.
+
+        :param clearance: запас для «никогда не пересекающихся» пар, м (сэмплы не покрывают
+                          крайние конфигурации)
+        :return: исключённые пары имён капсул
+        """
+        capsules = capsules or LinkCapsules(robot)
+        qlim = np.asarray(robot.qlim, dtype=float)
+        q = np.random.default_rng(seed).uniform(qlim[0], qlim[1], (samples, capsules.n))
+        a, b = capsules.segments(q)
+
+        out = []
+        for i in range(len(capsules)):
+            for j in range(i + 1, len(capsules)):
+                if np.allclose(b[:, i], a[:, j]) or np.allclose(a[:, i], b[:, j]):
+                    out.append((capsules.names[i], capsules.names[j]))
+                    continue
+                gap = segment_distance(a[:, i], b[:, i], a[:, j], b[:, j]) - capsules.radii[i] - capsules.radii[j]
+                if np.all(gap < 0.0) or np.min(gap) > clearance:
+                    out.append((capsules.names[i], capsules.names[j]))
+        return out
+
+    def collisions(self, q: ArrayLike, padding: float = 0.0) -> np.ndarray:
+        """
+        :param q: конфигурации (N, n)
+        :param padding: дополнительный к margin запас, м
+        :return: (N, P) bool по проверяемым парам ``pairs``
+        """
+        return self._hits(*self.capsules.segments(q), padding)
+
+    def _hits(self, a: np.ndarray, b: np.ndarray, padding: float) -> np.ndarray:
+        i, j = self.pairs[:, 0], self.pairs[:, 1]
+        return segment_distance(a[:, i], b[:, i], a[:, j], b[:, j]) < self._limit + self.margin + padding
+
+    def in_collision(self, q: ArrayLike, padding: float = 0.0) -> np.ndarray:
+        """:return: (N,) bool — конфигурации с самопересечением"""
+        return np.any(self.collisions(q, padding), axis=1)
+
+    def check(self, q: ArrayLike) -> CollisionResult:
+        """Первое самопересечение на траектории: индекс отсчёта и пара звеньев."""
+        hits = self.collisions(q)
+        per_sample = np.any(hits, axis=1)
+        if not np.any(per_sample):
+            return CollisionResult(-1)
+        index = int(np.argmax(per_sample))
+        i, j = self.pairs[int(np.argmax(hits[index]))]
+        return CollisionResult(index, self.capsules.names[i], self.capsules.names[j])
+
+
+class CollisionWorld:
+    """
+    Препятствия (параллелепипеды и цилиндры) в системе базы робота и проверка
+    траекторий на столкновения звеньев с ними и друг с другом.
+
+    Звенья моделируются капсулами (LinkCapsules). Препятствие раздувается
+    на радиус капсулы и запас ``margin``, после чего отрезок пересекается
+    с раздутой фигурой — углы скруглённой фигуры заменены острыми, т.е. проверка
+    консервативна. Вся траектория (N, n) проверяется одним векторизованным проходом.
+    Самопересечения проверяет SelfCollision; в CollisionResult препятствием
+    тогда указано второе звено.
+    """
+
+    def __init__(self, robot, margin: float = 0.01, self_collision: bool = True):
+        """
+        :param robot: модель робота (DHModel)
+        :param margin: запас до препятствия, м
+        :param self_collision: проверять ли самопересечения
+        """
+        self.link_capsules = LinkCapsules(robot)
+        self.self_collision = SelfCollision(robot, self.link_capsules) if self_collision else None
+        self.margin = float(margin)
+
+        self._boxes: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._cylinders: dict[str, tuple[np.ndarray, float, float]] = {}
+        self._arrays = None
+
+    # ------------- препятствия --------------
+    def add_box(self, name: str, pose: ArrayLike, size: ArrayLike):
+        """
+        :param name: имя препятствия (например, DEF в Webots)
+        :param pose: поза центра 4x4 в системе базы робота
+        :param size: габариты (sx, sy, sz), м
+        """
+        self.remove(name)
+        self._boxes[name] = (np.asarray(pose, dtype=float), 0.5 * np.asarray(size, dtype=float))
+        self._arrays = None
+
+    def add_cylinder(self, name: str, pose: ArrayLike, radius: float, height: float):
+        """
+        :param pose: поза центра 4x4 в системе базы робота; ось цилиндра — ось z позы (как у Cylinder в Webots)
+        :param radius: радиус, м
+        :param height: высота, м
+        """
+        self.remove(name)
+        self._cylinders[name] = (np.asarray(pose, dtype=float), float(radius), 0.5 * float(height))
+        self._arrays = None
+
+    def remove(self, name: str) -> bool:
+        found = self._boxes.pop(name, None) is not None or self._cylinders.pop(name, None) is not None
+        if found:
+            self._arrays = None
+        return found
+
+    def clear(self):
+        self._boxes.clear()
+        self._cylinders.clear()
+        self._arrays = None
+
+    def __len__(self) -> int:
+        return len(self._boxes) + len(self._cylinders)
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._boxes) + list(self._cylinders)
+
+    @property
+    def signature(self) -> str:
+        """Хэш набора препятствий и геометрии звеньев — для ключей кэша траекторий."""
+        h = hashlib.sha1()
+        h.update(np.array([self.margin, *self.link_capsules.radii]).tobytes())
+        if self.self_collision is not None:
+            h.update(b"self" + self.self_collision.excluded.tobytes())
+        for name, (pose, half) in sorted(self._boxes.items()):
+            h.update(b"box" + name.encode("utf-8") + pose.tobytes() + half.tobytes())
+        for name, (pose, radius, half_h) in sorted(self._cylinders.items()):
+            h.update(b"cyl" + name.encode("utf-8") + pose.tobytes() + np.array([radius, half_h]).tobytes())
+        return h.hexdigest()
+
+    def _stacked(self):
+        """Препятствия одного типа — в общих массивах (центры, повороты, размеры)."""
+        if self._arrays is None:
+            def stack(items, k):
+                return np.array([item[k] for item in items]) if items else None
+            boxes = list(self._boxes.values())
+            cyls = list(self._cylinders.values())
+            self._arrays = (stack(boxes, 0), stack(boxes, 1), stack(cyls, 0), stack(cyls, 1), stack(cyls, 2))
+        return self._arrays
+
+    # ------------- проверка --------------
+    def _local(self, a: np.ndarray, b: np.ndarray, poses: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Отрезки (N, L, 3) в системах препятствий: (N, L, B, 3)."""
+        B = poses.shape[0]
+        R, c = poses[:, :3, :3], poses[:, :3, 3]
+        # x_local = (x - c) @ R: все препятствия одним матричным произведением (3, B * 3)
+        R_all = R.transpose(1, 0, 2).reshape(3, B * 3)
+        offset = np.einsum("bi,bij->bj", c, R)
+        p0 = (a.reshape(-1, 3) @ R_all).reshape(a.shape[:2] + (B, 3)) - offset
+        p1 = (b.reshape(-1, 3) @ R_all).reshape(b.shape[:2] + (B, 3)) - offset
+        return p0, p1 - p0
+
+    def _box_hits(self, a, b, poses, half, margin) -> np.ndarray:
+        p0, d = self._local(a, b, poses)
+        grow = (self.link_capsules.radii + margin)[None, :, None, None]
+        lo, hi = _slab(p0, d, half[None, None] + grow)
+        t_in = np.maximum(np.max(lo, axis=-1), 0.0)
+        t_out = np.minimum(np.min(hi, axis=-1), 1.0)
+        return t_in <= t_out
+
+    def _cylinder_hits(self, a, b, poses, radius, half_h, margin) -> np.ndarray:
+        p0, d = self._local(a, b, poses)
+        grow = (self.link_capsules.radii + margin)[None, :, None]
+        lo, hi = _slab(p0[..., 2], d[..., 2], half_h[None, None] + grow)
+        lo, hi = np.maximum(lo, 0.0), np.minimum(hi, 1.0)
+        overlap = lo <= hi
+        lo, hi = np.where(overlap, lo, 0.0), np.where(overlap, hi, 0.0)
+
+        # ближайшая к оси точка отрезка в пределах высоты цилиндра
+        a_r, d_r = p0[..., :2], d[..., :2]
+        dd = np.sum(d_r * d_r, axis=-1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(dd > 1e-24, -np.sum(a_r * d_r, axis=-1) / dd, lo)
+        t = np.clip(t, lo, hi)
+        r2 = np.sum((a_r + t[..., None] * d_r) ** 2, axis=-1)
+        return overlap & (r2 <= (radius[None, None] + grow) ** 2)
+
+    def collisions(self, q: ArrayLike, padding: float = 0.0) -> np.ndarray:
+        """
+        :param q: конфигурации (N, n)
+        :param padding: дополнительный к margin запас, м
+        :return: (N, C, B) bool — столкновение капсулы звена с препятствием (порядок как в names)
+        """
+        return self._obstacle_hits(*self.link_capsules.segments(q), self.margin + padding)
+
+    def _obstacle_hits(self, a: np.ndarray, b: np.ndarray, margin: float) -> np.ndarray:
+        box_poses, box_half, cyl_poses, cyl_radius, cyl_half = self._stacked()
+        parts = [np.zeros(a.shape[:2] + (0,), dtype=bool)]
+        if box_poses is not None:
+            parts.append(self._box_hits(a, b, box_poses, box_half, margin))
+        if cyl_poses is not None:
+            parts.append(self._cylinder_hits(a, b, cyl_poses, cyl_radius, cyl_half, margin))
+        return np.concatenate(parts, axis=-1)
+
+    def in_collision(self, q: ArrayLike, padding: float = 0.0) -> np.ndarray:
+        """:return: (N,) bool — конфигурации, в которых звено задевает препятствие или другое звено"""
+        a, b = self.link_capsules.segments(q)
+        hits = np.zeros(a.shape[0], dtype=bool)
+        if len(self):
+            hits |= np.any(self._obstacle_hits(a, b, self.margin + padding), axis=(1, 2))
+        if self.self_collision is not None:
+            hits |= np.any(self.self_collision._hits(a, b, padding), axis=1)
+        return hits
+
+    @property
+    def reach(self) -> float:
+        return self.link_capsules.reach
+
+    def check(self, q: ArrayLike) -> CollisionResult:
+        """Первое столкновение на траектории (N, n): индекс отсчёта, звено и препятствие (или второе звено)."""
+        result = CollisionResult(-1)
+        if len(self):
+            hits = self.collisions(q)
+            per_sample = np.any(hits, axis=(1, 2))
+            if np.any(per_sample):
+                index = int(np.argmax(per_sample))
+                link, obstacle = np.argwhere(hits[index])[0]
+                result = CollisionResult(index, self.link_capsules.names[link], self.names[obstacle])
+        if self.self_collision is not None:
+            own = self.self_collision.check(q)
+            if own.collides and (not result.collides or own.index < result.index):
+                result = own
+        return result
+
+
+if __name__ == "__main__":
+    import argparse
+    from .registry import load_model
+
+    parser = argparse.ArgumentParser(description="Матрица исключений самопересечений для модели со схватом")
+    parser.add_argument("--model", default="lbr_iiwa7_r800", help="Имя модели или путь к .yaml/.urdf")
+    parser.add_argument("--samples", type=int, default=100_000, help="Число конфигураций")
+    args = parser.parse_args()
+
+    pairs = SelfCollision.build_exclusions(load_model(args.model), samples=args.samples)
+    print(f"[INFO] Исключено пар: {len(pairs)}")
+    print("collision_exclusions:\n" + "\n".join(f"  - [{u}, {v}]" for u, v in pairs))
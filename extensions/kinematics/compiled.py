@@ -0,0 +1,195 @@
+import os
+import types
+import hashlib
+import importlib.util
+import numpy as np
+
+from pathlib import Path
+
+from .fk import DHKinematics
+
+
+# версия генератора входит в ключ: изменение шаблона перегенерирует ядра
+_VERSION = 1
+KERNELS_DIR = Path(__file__).resolve().parent / "_kernels"
+_loaded: dict = {}
+
+_HEADER = '''\
+# Сгенерировано extensions/kinematics/compiled.py для модели {name!r} — не редактировать.
+# Ключ (таблица DH + версия генератора): {key}
+import numpy as np
+
+SIGNATURE = {key!r}
+
+
+def _store(frames, axes, origins, i, x, y, z, p):
+    if frames is not None:
+        F = frames[:, i]
+        F[:, :3, 0], F[:, :3, 1], F[:, :3, 2], F[:, :3, 3] = x, y, z, p
+        F[:, 3] = (0.0, 0.0, 0.0, 1.0)
+    if axes is not None:
+        axes[:, i], origins[:, i] = z, p
+
+
+def chain(q, base, frames=None, axes=None, origins=None):
+    N = q.shape[0]
+    x = np.broadcast_to(base[:3, 0], (N, 3))
+    y = np.broadcast_to(base[:3, 1], (N, 3))
+    z = np.broadcast_to(base[:3, 2], (N, 3))
+    p = np.broadcast_to(base[:3, 3], (N, 3))
+    if frames is not None:
+        frames[:, 0] = base
+    if axes is not None:
+        axes[:, 0], origins[:, 0] = z, p
+'''
+
+_FOOTER = '''
+    T = np.empty((N, 4, 4))
+    T[:, :3, 0], T[:, :3, 1], T[:, :3, 2], T[:, :3, 3] = x, y, z, p
+    T[:, 3] = (0.0, 0.0, 0.0, 1.0)
+    return T
+'''
+
+
+def dh_key(kin: DHKinematics) -> str:
+    """Ключ ядра: таблица DH (d, a, alpha, offset) и версия генератора; base/tool в ядро не входят."""
+    h = hashlib.sha1(str(_VERSION).encode())
+    for arr in (kin.d, kin.a, kin.alpha, kin.offset):
+        h.update(np.ascontiguousarray(arr, dtype=float).tobytes())
+    return h.hexdigest()
+
+
+def _unit(value: float) -> int | None:
+    """0, 1 или -1, если value совпадает с ними до погрешности вычисления cos/sin, иначе None."""
+    for u in (0, 1, -1):
+        if abs(value - u) < 1e-12:
+            return u
+    return None
+
+
+def _term(coef: float, name: str) -> str | None:
+    u = _unit(coef)
+    if u == 0:
+        return None
+    if u is not None:
+        return name if u == 1 else f"-{name}"
+    return f"{float(coef)!r} * {name}"
+
+
+def _sum(terms: list[str | None]) -> str:
+    terms = [t for t in terms if t is not None]
+    if not terms:
+        return "np.zeros_like(z)"
+    out = terms[0]
+    for t in terms[1:]:
+        out += f" - {t[1:]}" if t.startswith("-") else f" + {t}"
+    return out
+
+
+def generate_source(kin: DHKinematics, name: str = "") -> str:
+    """
+    Исходный код ядра прохода по цепи для конкретной таблицы DH.
+
+    Повторяет DHKinematics._chain, но параметры звеньев подставлены константами:
+    нулевые a и d, скрутки 0 и ±90° (cos/sin α ∈ {0, ±1}) и нулевые смещения
+    убирают соответствующие умножения и сложения.
+    """
+    lines = [_HEADER.format(name=name, key=dh_key(kin))]
+    if np.any(kin.offset != 0):
+        lines.append(f"    theta = q + np.array({kin.offset.tolist()!r})")
+    else:
+        lines.append("    theta = q")
+    lines.append("    ct, st = np.cos(theta), np.sin(theta)")
+
+    for i in range(kin.n):
+        ca, sa = float(np.cos(kin.alpha[i])), float(np.sin(kin.alpha[i]))
+        lines.append("")
+        lines.append(f"    # сустав {i + 1}: d={float(kin.d[i])!r}, a={float(kin.a[i])!r}, alpha={np.rad2deg(kin.alpha[i]):.6g}°")
+        lines.append(f"    c, s = ct[:, {i}:{i + 1}], st[:, {i}:{i + 1}]")
+        lines.append("    xn = x * c + y * s")
+        lines.append("    yr = y * c - x * s")
+        if kin.a[i] != 0 or kin.d[i] != 0:
+            lines.append(f"    p = {_sum(['p', _term(kin.a[i], 'xn'), _term(kin.d[i], 'z')])}")
+        lines.append(f"    y, z = {_sum([_term(ca, 'yr'), _term(sa, 'z')])}, {_sum([_term(ca, 'z'), _term(-sa, 'yr')])}")
+        lines.append("    x = xn")
+        lines.append(f"    _store(frames, axes, origins, {i + 1}, x, y, z, p)")
+    lines.append(_FOOTER)
+    return "\n".join(lines)
+
+
+def _load(path: Path, key: str):
+    spec = importlib.util.spec_from_file_location(f"_dh_kernel_{key[:16]}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_kernel(kin: DHKinematics, name: str = "", directory: str | Path | None = None):
+    """
+    Модуль ядра для таблицы DH: из кэша на диске по ключу dh_key или сгенерированный
+    и сохранённый туда (в пределах процесса — загружается один раз). Если каталог недоступен для записи — ядро собирается в памяти.
+
+    :param directory: каталог кэша ядер; по умолчанию _kernels рядом с модулем
+    :return: модуль с функцией chain(q, base, frames, axes, origins)
+    """
+    key = dh_key(kin)
+    if key in _loaded:
+        return _loaded[key]
+    directory = KERNELS_DIR if directory is None else Path(directory)
+    path = directory / f"{name or 'dh'}_{key[:16]}.py"
+
+    if path.exists():
+        try:
+            module = _load(path, key)
+            if getattr(module, "SIGNATURE", None) == key:
+                _loaded[key] = module
+                return module
+        except (SyntaxError, ImportError, AttributeError):
+            pass
+        print(f"[INFO] Ядро кинематики '{path}' повреждено — генерирую заново.")
+
+    source = generate_source(kin, name)
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(source, encoding="utf-8")
+        os.replace(tmp, path)
+        module = _load(path, key)
+    except OSError as e:
+        print(f"[WARN] Не удалось сохранить ядро кинематики '{path}': {e}")
+        namespace: dict = {}
+        exec(compile(source, f"<dh_kernel {key[:16]}>", "exec"), namespace)
+        module = types.SimpleNamespace(**namespace)
+    _loaded[key] = module
+    return module
+
+
+class CompiledKinematics(DHKinematics):
+    """
+    DHKinematics со сгенерированным под модель проходом по цепи (см. generate_source).
+    Интерфейс тот же — fkine, fkine_jacob0, jacob0, link_frames; base и tool
+    остаются параметрами и меняются без перегенерации.
+    """
+
+    def __init__(self, *args, name: str = "", directory: str | Path | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._kernel = load_kernel(self, name, directory)
+
+    @classmethod
+    def from_robot(cls, robot, directory: str | Path | None = None) -> "CompiledKinematics":
+        kin = DHKinematics.from_robot(robot)
+        return cls(kin.d, kin.a, kin.alpha, kin.offset, kin.base, kin.tool,
+                   name=getattr(robot, "name", ""), directory=directory)
+
+    def _chain(self,
+               q: np.ndarray,
+               frames: np.ndarray | None = None,
+               axes: np.ndarray | None = None,
+               origins: np.ndarray | None = None) -> np.ndarray:
+        return self._kernel.chain(q, self.base, frames, axes, origins)
+
+
+def compiled_kinematics(robot, directory: str | Path | None = None) -> CompiledKinematics:
+    """CompiledKinematics для DHModel/DHRobot (ядро генерируется один раз на таблицу DH)."""
+    return CompiledKinematics.from_robot(robot, directory)
+
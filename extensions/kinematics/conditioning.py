@@ -0,0 +1,151 @@
+import numpy as np
+
+from typing import NamedTuple
+from numpy.typing import ArrayLike
+
+from .fk import DHKinematics, kinematics_of
+from .timing import retime
+
+
+class JacobianMetrics(NamedTuple):
+    """
+    Обусловленность якобиана для пачки конфигураций.
+
+    sigma — сингулярные числа (N, 6) по убыванию; manipulability — мера Йошикавы
+    √det(J Jᵀ) (N,); condition — σ_max / σ_min (N,), inf в сингулярности.
+    """
+    sigma: np.ndarray
+    manipulability: np.ndarray
+    condition: np.ndarray
+
+    @property
+    def sigma_min(self) -> np.ndarray:
+        return self.sigma[..., -1]
+
+
+class ConditioningScore(NamedTuple):
+    """
+    Оценка траектории: index — первый отсчёт ближе к сингулярности, чем допускается
+    (-1 — нет), worst — отсчёт с наименьшим σ_min; минимумы σ_min и манипулируемости,
+    максимум числа обусловленности; scale — наибольшее местное замедление.
+    """
+    index: int = -1
+    worst: int = -1
+    sigma_min: float = np.inf
+    manipulability: float = np.inf
+    condition: float = 1.0
+    scale: float = 1.0
+
+    @property
+    def singular(self) -> bool:
+        return self.index >= 0
+
+
+class Conditioning:
+    """
+    Близость к сингулярностям вдоль траекторий: сингулярные числа, манипулируемость
+    и число обусловленности геометрического якобиана сразу для пачки (N, n).
+
+    Рядом с сингулярностью прямолинейное движение TCP требует скоростей суставов
+    ~1/σ_min. Отсчёты с σ_min < sigma_slow замедляются в sigma_slow / σ_min раз
+    (скорости суставов остаются как на границе зоны), отсчёты с σ_min < sigma_reject
+    делают траекторию непригодной.
+    """
+
+    def __init__(self,
+                 kinematics: DHKinematics,
+                 length: float = 1.0,
+                 sigma_reject: float = 2e-3,
+                 sigma_slow: float = 2e-2):
+        """
+        :param kinematics: ядро FK модели (kinematics_of(robot))
+        :param length: характерная длина, м — вращательные строки якобиана умножаются
+                       на неё, чтобы σ были в одних единицах (1 — как есть)
+        :param sigma_reject: σ_min, ниже которого траектория отклоняется
+        :param sigma_slow: σ_min, ниже которого движение замедляется
+        """
+        self.kinematics = kinematics
+        self.length = float(length)
+        self.sigma_reject = float(sigma_reject)
+        self.sigma_slow = float(sigma_slow)
+
+    @classmethod
+    def from_robot(cls, robot, **kwargs) -> "Conditioning":
+        return cls(kinematics_of(robot), **kwargs)
+
+    @property
+    def signature(self) -> str:
+        """Параметры, влияющие на траектории, — для ключей кэша траекторий."""
+        return f"{self.length:g}/{self.sigma_reject:g}/{self.sigma_slow:g}"
+
+    def jacobian(self, q: ArrayLike) -> np.ndarray:
+        """Якобиан (N, 6, n) с вращательными строками, умноженными на length."""
+        J = self.kinematics.jacob0(np.atleast_2d(np.asarray(q, dtype=float)))
+        if self.length != 1.0:
+            J[:, 3:] *= self.length
+        return J
+
+    def metrics(self, q: ArrayLike) -> JacobianMetrics:
+        """
+        :param q: конфигурации (n,) или (N, n)
+        :return: метрики формы (N, …) — одна конфигурация даёт N = 1
+        """
+        J = self.jacobian(q)
+        # собственные числа J Jᵀ (6x6) в 1.5–2 раза быстрее SVD пачки 6x7
+        w = np.linalg.eigvalsh(J @ J.transpose(0, 2, 1))[:, ::-1]
+        sigma = np.sqrt(np.clip(w, 0.0, None))
+        with np.errstate(divide="ignore"):
+            condition = np.where(sigma[:, -1] > 0, sigma[:, 0] / sigma[:, -1], np.inf)
+        return JacobianMetrics(sigma, np.prod(sigma, axis=1), condition)
+
+    def manipulability(self, q: ArrayLike) -> np.ndarray:
+        return self.metrics(q).manipulability
+
+    def slowdown(self, sigma_min: ArrayLike) -> np.ndarray:
+        """Множители замедления отсчётов (≥ 1) по σ_min."""
+        sigma_min = np.asarray(sigma_min, dtype=float)
+        with np.errstate(divide="ignore"):
+            return np.maximum(1.0, self.sigma_slow / sigma_min)
+
+    def score(self, trajectory: ArrayLike) -> ConditioningScore:
+        q = np.asarray(trajectory, dtype=float)
+        if len(q) == 0:
+            return ConditioningScore()
+        return self._score(self.metrics(q))
+
+    def _score(self, m: JacobianMetrics) -> ConditioningScore:
+        sigma_min = m.sigma_min
+        bad = np.flatnonzero(sigma_min < self.sigma_reject)
+        worst = int(np.argmin(sigma_min))
+        return ConditioningScore(index=int(bad[0]) if bad.size else -1,
+                                 worst=worst,
+                                 sigma_min=float(sigma_min[worst]),
+                                 manipulability=float(m.manipulability.min()),
+                                 condition=float(m.condition.max()),
+                                 scale=float(self.slowdown(sigma_min).max()))
+
+    def retime(self, trajectory: ArrayLike, dt: float, smoothing: float = 0.2) -> tuple[np.ndarray, ConditioningScore]:
+        """
+        Замедляет участки рядом с сингулярностью (timing.retime), остальное — без изменений.
+
+        :param smoothing: окно сглаживания множителей замедления, с
+        :return: траектория (исходная, если замедлять нечего или она отклонена)
+                 и оценка исходной траектории
+        """
+        q = np.asarray(trajectory, dtype=float)
+        if len(q) == 0:
+            return q, ConditioningScore()
+        m = self.metrics(q)
+        result = self._score(m)
+        if result.singular or result.scale <= 1.0:
+            return q, result
+        return retime(q, self.slowdown(m.sigma_min), max(1, int(round(smoothing / dt)))), result
+
+
+def conditioning_of(robot) -> Conditioning:
+    """Возвращает (и кэширует на модели) оценку обусловленности с параметрами по умолчанию."""
+    cond = getattr(robot, "_conditioning", None)
+    if cond is None:
+        cond = Conditioning.from_robot(robot)
+        robot._conditioning = cond
+    return cond
@@ -0,0 +1,186 @@
+import hashlib
+import numpy as np
+
+from numpy.typing import ArrayLike
+
+from .collision import LinkCapsules
+
+
+def _box_sdf(points: np.ndarray, pose: np.ndarray, half: np.ndarray) -> np.ndarray:
+    local = np.abs((points - pose[:3, 3]) @ pose[:3, :3]) - half
+    outside = np.linalg.norm(np.maximum(local, 0.0), axis=-1)
+    inside = np.minimum(np.max(local, axis=-1), 0.0)
+    return outside + inside
+
+
+def _cylinder_sdf(points: np.ndarray, pose: np.ndarray, radius: float, half_h: float) -> np.ndarray:
+    local = (points - pose[:3, 3]) @ pose[:3, :3]
+    d = np.stack([np.linalg.norm(local[..., :2], axis=-1) - radius, np.abs(local[..., 2]) - half_h], axis=-1)
+    outside = np.linalg.norm(np.maximum(d, 0.0), axis=-1)
+    inside = np.minimum(np.max(d, axis=-1), 0.0)
+    return outside + inside
+
+
+class DistanceField:
+    """
+    Поле расстояний со знаком (ESDF) рабочей ячейки в системе базы робота:
+    регулярная сетка float32 с шагом ``resolution``, значение в узле — расстояние
+    до ближайшего препятствия (внутри — отрицательное), усечённое сверху до ``truncation``.
+
+    Препятствия — те же примитивы, что в CollisionWorld (параллелепипеды и цилиндры,
+    ось цилиндра — z позы). Узлы считаются по точному SDF примитива, поле — минимум
+    по препятствиям. Добавление и удаление препятствия пересчитывает только его окрестность
+    (габарит + truncation), так что спавн объекта не требует перестройки всего поля.
+
+    Запрос — трилинейная интерполяция между узлами, пачкой точек произвольной формы (..., 3).
+    Точки вне сетки прижимаются к её границе.
+    """
+
+    def __init__(self,
+                 lower: ArrayLike,
+                 upper: ArrayLike,
+                 resolution: float = 0.02,
+                 truncation: float = 0.3):
+        """
+        :param lower: нижний угол области (x, y, z), м
+        :param upper: верхний угол области (x, y, z), м
+        :param resolution: шаг сетки, м
+        :param truncation: расстояния больше этого не уточняются, м
+        """
+        self.lower = np.asarray(lower, dtype=float).reshape(3)
+        self.resolution = float(resolution)
+        self.truncation = float(truncation)
+        shape = np.ceil((np.asarray(upper, dtype=float) - self.lower) / self.resolution - 1e-9).astype(int) + 1
+        self.grid = np.full(tuple(shape), self.truncation, dtype=np.float32)
+
+        self._obstacles: dict[str, tuple] = {}
+        self._flat = self.grid.reshape(-1)
+        self._strides = np.array([shape[1] * shape[2], shape[2], 1])
+        self._max_index = shape - 2
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return self.grid.shape
+
+    @property
+    def upper(self) -> np.ndarray:
+        return self.lower + (np.array(self.grid.shape) - 1) * self.resolution
+
+    @property
+    def signature(self) -> str:
+        """Хэш сетки и её значений — для ключей кэша траекторий."""
+        h = hashlib.sha1(np.array([*self.lower, self.resolution, self.truncation]).tobytes())
+        h.update(self.grid.tobytes())
+        return h.hexdigest()
+
+    # ------------- препятствия --------------
+    def add_box(self, name: str, pose: ArrayLike, size: ArrayLike):
+        """
+        :param name: имя препятствия (например, DEF в Webots)
+        :param pose: поза центра 4x4 в системе базы робота
+        :param size: габариты (sx, sy, sz), м
+        """
+        pose, half = np.asarray(pose, dtype=float), 0.5 * np.asarray(size, dtype=float)
+        self._add(name, pose, np.abs(pose[:3, :3]) @ half, lambda p: _box_sdf(p, pose, half))
+
+    def add_cylinder(self, name: str, pose: ArrayLike, radius: float, height: float):
+        """
+        :param pose: поза центра 4x4 в системе базы робота; ось цилиндра — ось z позы
+        :param radius: радиус, м
+        :param height: высота, м
+        """
+        pose, radius, half_h = np.asarray(pose, dtype=float), float(radius), 0.5 * float(height)
+        self._add(name, pose, np.abs(pose[:3, :3]) @ np.array([radius, radius, half_h]),
+                  lambda p: _cylinder_sdf(p, pose, radius, half_h))
+
+    def _add(self, name: str, pose: np.ndarray, extent: np.ndarray, sdf):
+        self.remove(name)
+        region = self._region(pose[:3, 3] - extent, pose[:3, 3] + extent)
+        self._obstacles[name] = (sdf, region)
+        if region is not None:
+            self._paint(sdf, region)
+
+    def remove(self, name: str) -> bool:
+        """Удаляет препятствие и пересчитывает его окрестность по оставшимся."""
+        item = self._obstacles.pop(name, None)
+        if item is None:
+            return False
+        region = item[1]
+        if region is not None:
+            self.grid[region] = self.truncation
+            for sdf, other in self._obstacles.values():
+                common = self._intersect(region, other)
+                if common is not None:
+                    self._paint(sdf, common)
+        return True
+
+    def clear(self):
+        self._obstacles.clear()
+        self.grid.fill(self.truncation)
+
+    def __len__(self) -> int:
+        return len(self._obstacles)
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._obstacles)
+
+    def _region(self, lo: np.ndarray, hi: np.ndarray) -> tuple[slice, slice, slice] | None:
+        """Узлы сетки в габарите [lo, hi], расширенном на truncation."""
+        i0 = np.floor((lo - self.truncation - self.lower) / self.resolution).astype(int)
+        i1 = np.ceil((hi + self.truncation - self.lower) / self.resolution).astype(int) + 1
+        i0, i1 = np.maximum(i0, 0), np.minimum(i1, self.grid.shape)
+        if np.any(i1 <= i0):
+            return None
+        return tuple(slice(a, b) for a, b in zip(i0, i1))
+
+    @staticmethod
+    def _intersect(a, b) -> tuple[slice, slice, slice] | None:
+        if b is None:
+            return None
+        out = tuple(slice(max(u.start, v.start), min(u.stop, v.stop)) for u, v in zip(a, b))
+        return None if any(s.stop <= s.start for s in out) else out
+
+    def _paint(self, sdf, region: tuple[slice, slice, slice]):
+        axes = [self.lower[k] + np.arange(s.start, s.stop) * self.resolution for k, s in enumerate(region)]
+        points = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1)
+        values = np.minimum(sdf(points), self.truncation).astype(np.float32)
+        np.minimum(self.grid[region], values, out=self.grid[region])
+
+    # ------------- запросы --------------
+    def distance(self, points: ArrayLike) -> np.ndarray:
+        """
+        :param points: точки (..., 3) в системе базы робота
+        :return: расстояния со знаком (...,), м
+        """
+        points = np.asarray(points, dtype=float)
+        u = (points.reshape(-1, 3) - self.lower) / self.resolution
+        i = np.clip(np.floor(u).astype(int), 0, self._max_index)
+        f = np.clip(u - i, 0.0, 1.0)
+        base = i @ self._strides
+
+        g = self._flat
+        sx, sy, sz = self._strides
+        fx, fy, fz = f[:, 0], f[:, 1], f[:, 2]
+        c00 = g[base] * (1 - fz) + g[base + sz] * fz
+        c01 = g[base + sy] * (1 - fz) + g[base + sy + sz] * fz
+        c10 = g[base + sx] * (1 - fz) + g[base + sx + sz] * fz
+        c11 = g[base + sx + sy] * (1 - fz) + g[base + sx + sy + sz] * fz
+        c0 = c00 * (1 - fy) + c01 * fy
+        c1 = c10 * (1 - fy) + c11 * fy
+        return (c0 * (1 - fx) + c1 * fx).reshape(points.shape[:-1])
+
+    def clearance(self, q: ArrayLike, capsules: LinkCapsules, points_per_link: int = 5) -> np.ndarray:
+        """
+        Зазор звеньев до препятствий: минимум поля по точкам вдоль оси капсулы минус её радиус.
+        Между точками зазор может быть меньше на величину до половины шага точек.
+
+        :param q: конфигурации (N, n)
+        :param capsules: капсулы звеньев (например, CollisionWorld.link_capsules)
+        :param points_per_link: число точек на капсулу
+        :return: (N, C) зазоры капсул, м (порядок как в capsules.names)
+        """
+        a, b = capsules.segments(q)
+        t = np.linspace(0.0, 1.0, max(2, int(points_per_link)))[None, None, :, None]
+        points = a[:, :, None] + t * (b - a)[:, :, None]
+        return np.min(self.distance(points), axis=-1) - capsules.radii
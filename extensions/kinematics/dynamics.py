@@ -0,0 +1,262 @@
+import hashlib
+import numpy as np
+
+from typing import NamedTuple
+from numpy.typing import ArrayLike
+
+from .timing import resample
+
+
+class TorqueCheck(NamedTuple):
+    """
+    Проверка моментов на траектории: index = -1, если пределы не превышены.
+    scale — во сколько раз растянуть движение во времени, чтобы уложиться в пределы
+    (inf — не помогает: пределы превышает уже статическая нагрузка).
+    """
+    index: int
+    joint: int = -1
+    ratio: float = 0.0
+    scale: float = 1.0
+
+    @property
+    def exceeds(self) -> bool:
+        return self.index >= 0
+
+
+def _cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    out = np.empty(np.broadcast_shapes(a.shape, b.shape))
+    out[..., 0] = a[..., 1] * b[..., 2] - a[..., 2] * b[..., 1]
+    out[..., 1] = a[..., 2] * b[..., 0] - a[..., 0] * b[..., 2]
+    out[..., 2] = a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+    return out
+
+
+class DHDynamics:
+    """
+    Векторизованная обратная динамика (рекурсивный Ньютон — Эйлер) по стандартной
+    таблице DH для пачки состояний (N, n): моменты в суставах по q, q̇, q̈.
+
+    Параметры звеньев — масса, центр масс и тензор инерции в системе звена (как в
+    roboticstoolbox). Трение и инерция роторов не учитываются, на фланце нагрузки нет.
+    """
+
+    def __init__(self,
+                 d: ArrayLike,
+                 a: ArrayLike,
+                 alpha: ArrayLike,
+                 m: ArrayLike,
+                 r: ArrayLike,
+                 I: ArrayLike,
+                 offset: ArrayLike | None = None,
+                 gravity: ArrayLike = (0.0, 0.0, -9.81),
+                 tau_max: ArrayLike | None = None):
+        """
+        :param d, a, alpha: таблица DH (n,)
+        :param m: массы звеньев (n,), кг
+        :param r: центры масс в системах звеньев (n, 3), м
+        :param I: тензоры инерции относительно центра масс (n, 3, 3), кг·м²
+        :param offset: смещения нуля суставов (n,)
+        :param gravity: ускорение свободного падения в системе базы, м/с²
+        :param tau_max: предельные моменты приводов (n,), Н·м; None — без проверки
+        """
+        self.d = np.asarray(d, dtype=float)
+        self.a = np.asarray(a, dtype=float)
+        self.alpha = np.asarray(alpha, dtype=float)
+        self.m = np.asarray(m, dtype=float)
+        self.r = np.asarray(r, dtype=float).reshape(-1, 3)
+        self.I = np.asarray(I, dtype=float).reshape(-1, 3, 3)
+        self.offset = np.zeros_like(self.d) if offset is None else np.asarray(offset, dtype=float)
+        self.gravity = np.asarray(gravity, dtype=float)
+        self.tau_max = None if tau_max is None else np.asarray(tau_max, dtype=float)
+
+        self._ca = np.cos(self.alpha)
+        self._sa = np.sin(self.alpha)
+        # начало системы i относительно системы i - 1, в системе i
+        self._pstar = np.stack([self.a, self.d * self._sa, self.d * self._ca], axis=1)
+
+    @classmethod
+    def from_robot(cls, robot) -> "DHDynamics":
+        """Собирает ядро из модели (DHModel или DHRobot); пределы моментов — robot.tau_max, если есть."""
+        links = robot.links
+        return cls(d=[L.d for L in links],
+                   a=[L.a for L in links],
+                   alpha=[L.alpha for L in links],
+                   m=[L.m for L in links],
+                   r=[np.asarray(L.r, dtype=float).reshape(3) for L in links],
+                   I=[np.asarray(L.I, dtype=float) for L in links],
+                   offset=[L.offset for L in links],
+                   gravity=np.asarray(robot.gravity, dtype=float),
+                   tau_max=getattr(robot, "tau_max", None))
+
+    @property
+    def n(self) -> int:
+        return len(self.d)
+
+    @property
+    def signature(self) -> str:
+        """Хэш динамических параметров и пределов моментов — для ключей кэша траекторий."""
+        h = hashlib.sha1()
+        for arr in (self.d, self.a, self.alpha, self.offset, self.m, self.r, self.I, self.gravity):
+            h.update(np.ascontiguousarray(arr, dtype=float).tobytes())
+        if self.tau_max is not None:
+            h.update(b"tau" + np.ascontiguousarray(self.tau_max, dtype=float).tobytes())
+        return h.hexdigest()
+
+    def rne(self, q: ArrayLike, qd: ArrayLike, qdd: ArrayLike, gravity: bool = True) -> np.ndarray:
+        """
+        Моменты в суставах.
+
+        :param q, qd, qdd: положения, скорости и ускорения (n,) или (N, n)
+        :param gravity: учитывать силу тяжести
+        :return: (n,) или (N, n), Н·м
+        """
+        q = np.asarray(q, dtype=float)
+        single = q.ndim == 1
+        q = q.reshape(-1, self.n)
+        qd = np.asarray(qd, dtype=float).reshape(q.shape)
+        qdd = np.asarray(qdd, dtype=float).reshape(q.shape)
+        N = q.shape[0]
+
+        theta = q + self.offset
+        ct, st = np.cos(theta), np.sin(theta)
+
+        # повороты Rz(θ) Rx(α) системы i относительно i - 1 раскрыты поэлементно
+        def to_link(i, v):
+            """v из системы i - 1 в систему i (Rᵀ v)."""
+            c, s, ca, sa = ct[:, i], st[:, i], self._ca[i], self._sa[i]
+            x = c * v[:, 0] + s * v[:, 1]
+            y = -s * v[:, 0] + c * v[:, 1]
+            return np.stack([x, ca * y + sa * v[:, 2], -sa * y + ca * v[:, 2]], axis=1)
+
+        def to_parent(i, v):
+            """v из системы i в систему i - 1 (R v)."""
+            c, s, ca, sa = ct[:, i], st[:, i], self._ca[i], self._sa[i]
+            y = ca * v[:, 1] - sa * v[:, 2]
+            return np.stack([c * v[:, 0] - s * y, s * v[:, 0] + c * y, sa * v[:, 1] + ca * v[:, 2]], axis=1)
+
+        # прямой проход: скорости и ускорения звеньев в их системах
+        w = np.zeros((N, 3))
+        wd = np.zeros((N, 3))
+        vd = np.tile(-self.gravity if gravity else np.zeros(3), (N, 1))
+        F = np.empty((N, self.n, 3))
+        Nm = np.empty((N, self.n, 3))
+        for i in range(self.n):
+            # ω̇ + ω × (z q̇) + z q̈ и ω + z q̇ в системе i - 1
+            wd_z = wd.copy()
+            wd_z[:, 0] += w[:, 1] * qd[:, i]
+            wd_z[:, 1] -= w[:, 0] * qd[:, i]
+            wd_z[:, 2] += qdd[:, i]
+            w_z = w.copy()
+            w_z[:, 2] += qd[:, i]
+            wd, w = to_link(i, wd_z), to_link(i, w_z)
+
+            p = self._pstar[i]
+            vd = _cross(wd, p) + _cross(w, _cross(w, p)) + to_link(i, vd)
+            vc = _cross(wd, self.r[i]) + _cross(w, _cross(w, self.r[i])) + vd
+            F[:, i] = self.m[i] * vc
+            Nm[:, i] = wd @ self.I[i].T + _cross(w, w @ self.I[i].T)
+
+        # обратный проход: силы и моменты в сочленениях (в системе звена)
+        f = np.zeros((N, 3))
+        nn = np.zeros((N, 3))
+        tau = np.empty((N, self.n))
+        for i in reversed(range(self.n)):
+            p = self._pstar[i]
+            nn = nn + _cross(p + self.r[i], F[:, i]) + _cross(p, f) + Nm[:, i]
+            f = f + F[:, i]
+            # ось сустава i — z системы i - 1: в системе i это (0, sin α, cos α)
+            tau[:, i] = self._sa[i] * nn[:, 1] + self._ca[i] * nn[:, 2]
+            if i > 0:
+                nn, f = to_parent(i, nn), to_parent(i, f)
+        return tau[0] if single else tau
+
+    def gravload(self, q: ArrayLike) -> np.ndarray:
+        """Гравитационные моменты (n,) или (N, n)."""
+        q = np.asarray(q, dtype=float)
+        return self.rne(q, np.zeros_like(q), np.zeros_like(q))
+
+    # ------------- траектории --------------
+    @staticmethod
+    def derivatives(trajectory: ArrayLike, dt: float) -> tuple[np.ndarray, np.ndarray]:
+        """Скорости и ускорения отсчётов траектории (центральные разности), (N, n) каждое."""
+        q = np.asarray(trajectory, dtype=float)
+        if len(q) < 2:
+            return np.zeros_like(q), np.zeros_like(q)
+        qd = np.gradient(q, dt, axis=0)
+        return qd, np.gradient(qd, dt, axis=0)
+
+    def torques(self, trajectory: ArrayLike, dt: float) -> np.ndarray:
+        """Моменты вдоль траектории (N, n) с q̇, q̈ по разностям отсчётов."""
+        q = np.asarray(trajectory, dtype=float)
+        return self.rne(q, *self.derivatives(q, dt))
+
+    def check(self, trajectory: ArrayLike, dt: float) -> TorqueCheck:
+        """
+        Сравнение моментов с tau_max. Скоростные и инерционные моменты при растяжении
+        движения в k раз уменьшаются в k² раз, гравитационные не меняются — отсюда scale.
+        """
+        if self.tau_max is None or len(trajectory) == 0:
+            return TorqueCheck(-1)
+        q = np.asarray(trajectory, dtype=float)
+        qd, qdd = self.derivatives(q, dt)
+        # один проход на обе части: статическая (q̇ = q̈ = 0) и полная
+        both = self.rne(np.vstack([q, q]), np.vstack([np.zeros_like(qd), qd]), np.vstack([np.zeros_like(qdd), qdd]))
+        tau_g, tau = both[:len(q)], both[len(q):]
+        tau_dyn = tau - tau_g
+        ratio = np.abs(tau) / self.tau_max
+        over = ratio > 1.0
+        if not np.any(over):
+            return TorqueCheck(-1, ratio=float(ratio.max()))
+
+        index = int(np.flatnonzero(over.any(axis=1))[0])
+        joint = int(np.argmax(ratio[index]))
+
+        # |tau_g + tau_dyn / k²| <= tau_max  →  k² >= tau_dyn / (±tau_max - tau_g)
+        room = np.where(tau_dyn > 0, self.tau_max - tau_g, self.tau_max + tau_g)
+        if np.any(room[over] <= 0):
+            scale = np.inf
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                need = np.where(over, np.abs(tau_dyn) / room, 1.0)
+            scale = float(np.sqrt(need.max()))
+        return TorqueCheck(index, joint, float(ratio[index, joint]), scale)
+
+    def time_scale(self,
+                   trajectory: ArrayLike,
+                   dt: float,
+                   margin: float = 1.02,
+                   attempts: int = 3) -> tuple[np.ndarray, TorqueCheck]:
+        """
+        Растягивает движение во времени, если моменты превышают пределы: путь в суставах
+        не меняется, отсчёты — с тем же шагом dt (кубическая интерполяция Эрмита по исходным).
+        Разностные ускорения редкой траектории после растяжения немного отличаются
+        от оценки, поэтому проверка повторяется до ``attempts`` раз.
+
+        :param margin: запас к необходимому растяжению
+        :return: траектория (исходная, если растяжение не нужно или не помогает)
+                 и результат её проверки
+        """
+        q = np.asarray(trajectory, dtype=float)
+        result = self.check(q, dt)
+        for _ in range(attempts):
+            if not result.exceeds or not np.isfinite(result.scale):
+                break
+            q = _stretch(q, result.scale * margin)
+            result = self.check(q, dt)
+        return q, result
+
+
+def _stretch(q: np.ndarray, k: float) -> np.ndarray:
+    """Траектория, растянутая во времени в k раз (Эрмит по отсчётам и разностным скоростям)."""
+    t = np.arange(int(np.ceil((len(q) - 1) * k)) + 1) / k
+    t[-1] = len(q) - 1
+    return resample(q, t)
+
+
+def dynamics_of(robot) -> DHDynamics:
+    """Возвращает (и кэширует на модели) ядро обратной динамики для DHModel/DHRobot."""
+    dyn = getattr(robot, "_dh_dynamics", None)
+    if dyn is None:
+        dyn = DHDynamics.from_robot(robot)
+        robot._dh_dynamics = dyn
+    return dyn
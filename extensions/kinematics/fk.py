@@ -0,0 +1,249 @@
+import hashlib
+import numpy as np
+
+from numpy.typing import ArrayLike
+
+
+def rpy_to_rot(rpy: ArrayLike) -> np.ndarray:
+    """
+    Пакетный аналог ``SE3.RPY(rpy, order="xyz")``: R = Rx(rpy[2]) @ Ry(rpy[1]) @ Rz(rpy[0]).
+
+    :param rpy: углы (3,) или (N, 3) в радианах
+    :return: матрицы поворота (3, 3) или (N, 3, 3)
+    """
+    rpy = np.asarray(rpy, dtype=float)
+    single = rpy.ndim == 1
+    rpy = rpy.reshape(-1, 3)
+
+    ca, sa = np.cos(rpy[:, 0]), np.sin(rpy[:, 0])
+    cb, sb = np.cos(rpy[:, 1]), np.sin(rpy[:, 1])
+    cc, sc = np.cos(rpy[:, 2]), np.sin(rpy[:, 2])
+
+    R = np.empty((rpy.shape[0], 3, 3))
+    R[:, 0, 0] = cb * ca
+    R[:, 0, 1] = -cb * sa
+    R[:, 0, 2] = sb
+    R[:, 1, 0] = sc * sb * ca + cc * sa
+    R[:, 1, 1] = -sc * sb * sa + cc * ca
+    R[:, 1, 2] = -sc * cb
+    R[:, 2, 0] = -cc * sb * ca + sc * sa
+    R[:, 2, 1] = cc * sb * sa + sc * ca
+    R[:, 2, 2] = cc * cb
+    return R[0] if single else R
+
+
+def rot_to_rpy(R: ArrayLike) -> np.ndarray:
+    """
+    Пакетный аналог ``tr2rpy(R, order="xyz")`` (включая обработку вырождения).
+
+    :param R: матрицы поворота/однородные (…, 3, 3) или (…, 4, 4)
+    :return: углы [roll, pitch, yaw] формы (…, 3)
+    """
+    R = np.asarray(R, dtype=float)[..., :3, :3]
+
+    rpy = np.empty(R.shape[:-2] + (3,))
+    rpy[..., 0] = -np.arctan2(R[..., 0, 1], R[..., 0, 0])
+    rpy[..., 1] = np.arctan2(R[..., 0, 2], np.hypot(R[..., 0, 0], R[..., 0, 1]))
+    rpy[..., 2] = -np.arctan2(R[..., 1, 2], R[..., 2, 2])
+
+    # вырождение |R13| == 1: roll = 0, весь поворот уходит в yaw
+    singular = np.abs(np.abs(R[..., 0, 2]) - 1.0) < 20 * np.finfo(float).eps
+    if np.any(singular):
+        Rs = R[singular]
+        yaw = np.where(Rs[:, 0, 2] > 0,
+                       np.arctan2(Rs[:, 2, 1], Rs[:, 1, 1]),
+                       -np.arctan2(Rs[:, 1, 0], Rs[:, 2, 0]))
+        rpy[singular, 0] = 0.0
+        rpy[singular, 1] = np.arcsin(np.clip(Rs[:, 0, 2], -1.0, 1.0))
+        rpy[singular, 2] = yaw
+    return rpy
+
+
+class DHKinematics:
+    """
+    Векторизованная прямая кинематика по стандартной таблице DH.
+
+    Считает позы сразу для пачки конфигураций (N, n) без создания SE3
+    и других объектов на каждую конфигурацию.
+    """
+
+    def __init__(self,
+                 d: ArrayLike,
+                 a: ArrayLike,
+                 alpha: ArrayLike,
+                 offset: ArrayLike | None = None,
+                 base: ArrayLike | None = None,
+                 tool: ArrayLike | None = None):
+        """
+        :param d: смещения d по звеньям (n,)
+        :param a: длины a по звеньям (n,)
+        :param alpha: скрутки alpha по звеньям (n,)
+        :param offset: смещения нуля суставов (n,)
+        :param base: поза базы 4x4
+        :param tool: поза инструмента относительно фланца 4x4
+        """
+        self.d = np.asarray(d, dtype=float)
+        self.a = np.asarray(a, dtype=float)
+        self.alpha = np.asarray(alpha, dtype=float)
+        self.offset = np.zeros_like(self.d) if offset is None else np.asarray(offset, dtype=float)
+        self.base = np.eye(4) if base is None else np.asarray(base, dtype=float)
+        self.tool = np.eye(4) if tool is None else np.asarray(tool, dtype=float)
+
+        self._ca = np.cos(self.alpha)
+        self._sa = np.sin(self.alpha)
+
+    @classmethod
+    def from_robot(cls, robot) -> "DHKinematics":
+        """Собирает ядро из модели (DHModel или DHRobot roboticstoolbox), включая base и tool."""
+        links = robot.links
+        return cls(d=[L.d for L in links],
+                   a=[L.a for L in links],
+                   alpha=[L.alpha for L in links],
+                   offset=[L.offset for L in links],
+                   base=np.asarray(getattr(robot.base, "A", robot.base)),
+                   tool=np.asarray(getattr(robot.tool, "A", robot.tool)))
+
+    @property
+    def n(self) -> int:
+        return len(self.d)
+
+    def _as_batch(self, q: ArrayLike) -> tuple[np.ndarray, bool]:
+        q = np.asarray(q, dtype=float)
+        single = q.ndim == 1
+        q = q.reshape(-1, self.n)
+        return q, single
+
+    def _chain(self,
+               q: np.ndarray,
+               frames: np.ndarray | None = None,
+               axes: np.ndarray | None = None,
+               origins: np.ndarray | None = None) -> np.ndarray:
+        """
+        Проход по цепи DH: T_{i+1} = T_i @ Rz(θ) Tz(d) Tx(a) Rx(α).
+
+        Матричное произведение раскрыто по столбцам (x, y, z, p) пачки (N, 3),
+        поэтому на сустав приходится десяток поэлементных операций.
+        Если передан ``frames`` (N, n + 2, 4, 4) — туда пишутся все промежуточные системы;
+        ``axes``/``origins`` (N, n + 1, 3) получают только оси z и начала систем (для якобиана).
+
+        :return: поза фланца (N, 4, 4) без учёта tool
+        """
+        theta = q + self.offset
+        ct, st = np.cos(theta), np.sin(theta)
+
+        N = q.shape[0]
+        x = np.broadcast_to(self.base[:3, 0], (N, 3))
+        y = np.broadcast_to(self.base[:3, 1], (N, 3))
+        z = np.broadcast_to(self.base[:3, 2], (N, 3))
+        p = np.broadcast_to(self.base[:3, 3], (N, 3))
+        if frames is not None:
+            frames[:, 0] = self.base
+        if axes is not None:
+            axes[:, 0], origins[:, 0] = z, p
+
+        for i in range(self.n):
+            c, s = ct[:, i:i + 1], st[:, i:i + 1]
+            ca, sa = self._ca[i], self._sa[i]
+            x_new = x * c + y * s
+            y_rot = y * c - x * s
+            y_new = y_rot * ca + z * sa
+            z_new = z * ca - y_rot * sa
+            p = p + self.a[i] * x_new + self.d[i] * z
+            x, y, z = x_new, y_new, z_new
+
+            if frames is not None:
+                F = frames[:, i + 1]
+                F[:, :3, 0], F[:, :3, 1], F[:, :3, 2], F[:, :3, 3] = x, y, z, p
+                F[:, 3] = (0.0, 0.0, 0.0, 1.0)
+            if axes is not None:
+                axes[:, i + 1], origins[:, i + 1] = z, p
+
+        T = np.empty((N, 4, 4))
+        T[:, :3, 0], T[:, :3, 1], T[:, :3, 2], T[:, :3, 3] = x, y, z, p
+        T[:, 3] = (0.0, 0.0, 0.0, 1.0)
+        return T
+
+    def link_frames(self, q: ArrayLike) -> np.ndarray:
+        """
+        Позы всех систем координат цепи.
+
+        :param q: суставные углы (n,) или (N, n)
+        :return: (N, n + 2, 4, 4): база, системы после каждого сустава, TCP с инструментом
+        """
+        q, single = self._as_batch(q)
+        frames = np.empty((q.shape[0], self.n + 2, 4, 4))
+        self._chain(q, frames)
+        np.matmul(frames[:, self.n], self.tool, out=frames[:, self.n + 1])
+        return frames[0] if single else frames
+
+    def fkine(self, q: ArrayLike, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Поза TCP (с учётом tool).
+
+        :param q: суставные углы (n,) или (N, n)
+        :param out: необязательный буфер (N, 4, 4) для результата
+        :return: (4, 4) или (N, 4, 4)
+        """
+        q, single = self._as_batch(q)
+        T = np.matmul(self._chain(q), self.tool, out=out)
+        return T[0] if single else T
+
+    def fkine_xyzrpy(self, q: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Позиция и ориентация TCP в виде XYZ + RPY (order="xyz").
+
+        :return: xyz (3,)/(N, 3) и rpy (3,)/(N, 3)
+        """
+        T = self.fkine(q)
+        return T[..., :3, 3].copy(), rot_to_rpy(T)
+
+    def fkine_jacob0(self, q: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Поза TCP и геометрический якобиан в системе базы за один проход по цепи.
+
+        :param q: суставные углы (n,) или (N, n)
+        :return: T (N, 4, 4) и J (N, 6, n): строки [v; ω]
+        """
+        q, single = self._as_batch(q)
+        axes = np.empty((q.shape[0], self.n + 1, 3))
+        origins = np.empty_like(axes)
+        T = np.matmul(self._chain(q, axes=axes, origins=origins), self.tool)
+
+        # ось и начало сустава i — z и p системы i - 1
+        z = axes[:, :self.n]
+        r = T[:, None, :3, 3] - origins[:, :self.n]
+
+        J = np.empty((q.shape[0], 6, self.n))
+        J[:, 0] = z[..., 1] * r[..., 2] - z[..., 2] * r[..., 1]
+        J[:, 1] = z[..., 2] * r[..., 0] - z[..., 0] * r[..., 2]
+        J[:, 2] = z[..., 0] * r[..., 1] - z[..., 1] * r[..., 0]
+        J[:, 3:] = z.transpose(0, 2, 1)
+        return (T[0], J[0]) if single else (T, J)
+
+    def jacob0(self, q: ArrayLike) -> np.ndarray:
+        """Геометрический якобиан TCP в системе базы: (6, n) или (N, 6, n)."""
+        return self.fkine_jacob0(q)[1]
+
+
+def kinematics_of(robot) -> DHKinematics:
+    """
+    Возвращает (и кэширует на модели) векторизованное ядро для DHModel/DHRobot —
+    сгенерированное под таблицу DH модели (compiled.CompiledKinematics).
+    """
+    kin = getattr(robot, "_dh_kinematics", None)
+    if kin is None:
+        from .compiled import CompiledKinematics
+        kin = CompiledKinematics.from_robot(robot)
+        robot._dh_kinematics = kin
+    return kin
+
+
+def model_hash(robot) -> str:
+    """Хэш кинематических параметров модели (DH, base/tool, qlim, qd) — для файлов, построенных по модели."""
+    kin = kinematics_of(robot)
+    h = hashlib.sha1()
+    for arr in (kin.d, kin.a, kin.alpha, kin.offset, kin.base, kin.tool,
+                np.asarray(robot.qlim, dtype=float),
+                np.asarray(getattr(robot, "qd", np.zeros(kin.n)), dtype=float)):
+        h.update(np.ascontiguousarray(arr, dtype=float).tobytes())
+    return h.hexdigest()
@@ -0,0 +1,169 @@
+import numpy as np
+
+from typing import Sequence
+from numpy.typing import ArrayLike
+
+
+def _inertia(I: ArrayLike | None) -> np.ndarray:
+    """Тензор инерции 3x3 из записи roboticstoolbox: (3,) — диагональ, (6,) — [Ixx, Iyy, Izz, Ixy, Iyz, Ixz]."""
+    if I is None:
+        return np.zeros((3, 3))
+    I = np.asarray(I, dtype=float)
+    if I.shape == (3, 3):
+        return I.copy()
+    if I.shape == (3,):
+        return np.diag(I)
+    if I.shape == (6,):
+        xx, yy, zz, xy, yz, xz = I
+        return np.array([[xx, xy, xz], [xy, yy, yz], [xz, yz, zz]])
+    raise ValueError(f"Тензор инерции: ожидается (3,), (6,) или (3, 3), получено {I.shape}")
+
+
+class RevoluteLink:
+    """Звено с вращательным суставом по стандартной DH — параметры как у ``rtb.RevoluteDH``."""
+
+    def __init__(self,
+                 d: float = 0.0,
+                 a: float = 0.0,
+                 alpha: float = 0.0,
+                 offset: float = 0.0,
+                 qlim: ArrayLike | None = None,
+                 m: float = 0.0,
+                 r: ArrayLike | None = None,
+                 I: ArrayLike | None = None,
+                 G: float = 1.0):
+        """
+        :param d, a, alpha: параметры DH
+        :param offset: смещение нуля сустава
+        :param qlim: пределы сустава [min, max]; None — ±π
+        :param m: масса, кг
+        :param r: центр масс в системе звена, м
+        :param I: тензор инерции относительно центра масс (см. _inertia)
+        :param G: передаточное число привода
+        """
+        self.d = float(d)
+        self.a = float(a)
+        self.alpha = float(alpha)
+        self.offset = float(offset)
+        self.qlim = np.array([-np.pi, np.pi] if qlim is None else qlim, dtype=float)
+        self.m = float(m)
+        self.r = np.zeros(3) if r is None else np.asarray(r, dtype=float).reshape(3)
+        self.I = _inertia(I)
+        self.G = float(G)
+
+
+class DHModel:
+    """
+    Модель манипулятора по таблице DH на NumPy: звенья, пределы, base/tool, именованные
+    конфигурации, имена моторов суставов, FK/якобиан/динамика через векторизованные
+    ядра (fk, dynamics). Импортируется за миллисекунды — roboticstoolbox не нужен.
+    Модели из YAML/URDF загружает registry.load_model.
+
+    roboticstoolbox подгружается лениво, только если нужна его функциональность:
+    ``ikine_LM`` и ``to_rtb()`` (DHRobot с теми же параметрами).
+    """
+
+    def __init__(self,
+                 links: Sequence[RevoluteLink],
+                 name: str = "",
+                 manufacturer: str = "",
+                 base: ArrayLike | None = None,
+                 tool: ArrayLike | None = None,
+                 gravity: ArrayLike = (0.0, 0.0, -9.81),
+                 joint_names: Sequence[str] | None = None,
+                 configurations: dict[str, ArrayLike] | None = None,
+                 **attributes):
+        """
+        :param joint_names: имена моторов суставов в Webots; None — q1…qn
+        :param configurations: именованные конфигурации {имя: q} (доступны и как атрибуты)
+        :param attributes: прочие параметры модели — атрибуты (qd, qdd, qddd, tau_max,
+                           link_radii, tool_capsules, collision_exclusions, …)
+        """
+        self.links = list(links)
+        self.name = name
+        self.manufacturer = manufacturer
+        self._base = np.eye(4) if base is None else np.asarray(base, dtype=float)
+        self._tool = np.eye(4) if tool is None else np.asarray(tool, dtype=float)
+        self.gravity = np.asarray(gravity, dtype=float)
+        self.joint_names = list(joint_names) if joint_names is not None else [f"q{i + 1}" for i in range(self.n)]
+        if len(self.joint_names) != self.n:
+            raise ValueError(f"Имён суставов {len(self.joint_names)}, а звеньев {self.n}")
+        self.configs: dict[str, np.ndarray] = {}
+        self._rtb = None
+        for key, value in attributes.items():
+            setattr(self, key, value)
+        for key, q in (configurations or {}).items():
+            self.addconfiguration(key, q)
+
+    @property
+    def n(self) -> int:
+        return len(self.links)
+
+    @property
+    def qlim(self) -> np.ndarray:
+        """Пределы суставов (2, n): строка минимумов и строка максимумов."""
+        return np.array([L.qlim for L in self.links]).T
+
+    # base и tool входят в ядра FK — при замене кэши сбрасываются
+    @property
+    def base(self) -> np.ndarray:
+        return self._base
+
+    @base.setter
+    def base(self, T: ArrayLike):
+        self._base = np.asarray(getattr(T, "A", T), dtype=float)
+        self._invalidate()
+
+    @property
+    def tool(self) -> np.ndarray:
+        return self._tool
+
+    @tool.setter
+    def tool(self, T: ArrayLike):
+        self._tool = np.asarray(getattr(T, "A", T), dtype=float)
+        self._invalidate()
+
+    def _invalidate(self):
+        for attr in ("_dh_kinematics", "_dh_dynamics", "_conditioning"):
+            self.__dict__.pop(attr, None)
+        self._rtb = None
+
+    def addconfiguration(self, name: str, q: ArrayLike):
+        self.configs[name] = np.asarray(q, dtype=float).reshape(self.n)
+        setattr(self, name, self.configs[name])
+
+    # ------------- кинематика и динамика (NumPy) --------------
+    def fkine(self, q: ArrayLike) -> np.ndarray:
+        """Поза TCP: (4, 4) или (N, 4, 4)."""
+        from .fk import kinematics_of
+        return kinematics_of(self).fkine(q)
+
+    def jacob0(self, q: ArrayLike) -> np.ndarray:
+        """Геометрический якобиан TCP в системе базы: (6, n) или (N, 6, n)."""
+        from .fk import kinematics_of
+        return kinematics_of(self).jacob0(q)
+
+    def rne(self, q: ArrayLike, qd: ArrayLike, qdd: ArrayLike) -> np.ndarray:
+        """Моменты в суставах (обратная динамика)."""
+        from .dynamics import dynamics_of
+        return dynamics_of(self).rne(q, qd, qdd)
+
+    # ------------- roboticstoolbox (лениво) --------------
+    def to_rtb(self):
+        """DHRobot roboticstoolbox с теми же параметрами (строится при первом вызове)."""
+        if self._rtb is None:
+            import roboticstoolbox as rtb
+
+            links = [rtb.RevoluteDH(d=L.d, a=L.a, alpha=L.alpha, offset=L.offset, qlim=L.qlim,
+                                    m=L.m, r=L.r, I=L.I, G=L.G)
+                     for L in self.links]
+            robot = rtb.DHRobot(links, name=self.name, manufacturer=self.manufacturer,
+                                base=self._base, tool=self._tool, gravity=self.gravity)
+            for name, q in self.configs.items():
+                robot.addconfiguration(name, q)
+            self._rtb = robot
+        return self._rtb
+
+    def ikine_LM(self, Tep, **kwargs):
+        """``DHRobot.ikine_LM``; Tep — SE3 или матрица 4x4."""
+        return self.to_rtb().ikine_LM(np.asarray(getattr(Tep, "A", Tep), dtype=float), **kwargs)
@@ -1,27 +1,326 @@
+import time
+import hashlib
 import numpy as np
 
-from typing import Tuple
-from spatialmath import SE3
-from roboticstoolbox import DHRobot, jtraj
+from typing import Mapping, Sequence, Tuple
+from numpy.typing import ArrayLike
+
+from .batch_ik import BatchIKSolver, BatchIKResult, interpolate_poses, pose_error
+from .fk import kinematics_of, rpy_to_rot
+from .cache import IKCache
+from .collision import CollisionResult, CollisionWorld, LinkCapsules
+from .conditioning import Conditioning, ConditioningScore
+from .distance_field import DistanceField
+from .dynamics import DHDynamics
+from .model import DHModel
+from .reachability import ReachabilityMap
+from .seeds import IKSeedTable
+from .timing import blend_profile, jtraj, ptp_profile, scurve
+from ..core.ik import BaseIKSolver
+
+
+class _Tree:
+    """Дерево RRT: узлы в непрерывном массиве, ссылки на родителей — индексы."""
+
+    def __init__(self, root: np.ndarray, capacity: int = 1024):
+        self.nodes = np.empty((capacity, root.shape[0]))
+        self.parent = np.empty(capacity, dtype=int)
+        self.nodes[0], self.parent[0] = root, -1
+        self.size = 1
+
+    def add(self, q: np.ndarray, parent: int) -> int:
+        if self.size == self.nodes.shape[0]:
+            self.nodes = np.vstack([self.nodes, np.empty_like(self.nodes)])
+            self.parent = np.concatenate([self.parent, np.empty_like(self.parent)])
+        self.nodes[self.size], self.parent[self.size] = q, parent
+        self.size += 1
+        return self.size - 1
+
+    def nearest(self, q: np.ndarray) -> int:
+        return int(np.argmin(np.sum((self.nodes[:self.size] - q) ** 2, axis=1)))
+
+    def path(self, index: int) -> list[np.ndarray]:
+        """Путь от корня до узла index."""
+        out = []
+        while index >= 0:
+            out.append(self.nodes[index])
+            index = self.parent[index]
+        return out[::-1]
+
+
+class RRTConnect:
+    """
+    Планировщик пути в пространстве суставов в обход препятствий (RRT-Connect)
+    со сглаживанием срезками.
+
+    Рёбра проверяются пакетно: отрезок дискретизируется с шагом ``resolution``
+    и все точки уходят в CollisionWorld одним вызовом; случайные конфигурации
+    тоже генерируются и проверяются пачками.
+    """
+
+    def __init__(self,
+                 robot: DHModel,
+                 collision: CollisionWorld,
+                 step: float = 0.3,
+                 resolution: float = 0.02,
+                 seed: int | None = 0):
+        """
+        :param robot: модель робота (пределы суставов — robot.qlim)
+        :param collision: препятствия
+        :param step: наибольший шаг роста дерева (норма по суставам), рад
+        :param resolution: шаг проверки рёбер (сумма модулей приращений суставов), рад
+        :param seed: зерно генератора (None — случайное); по умолчанию пути воспроизводимы
+        """
+        self._collision = collision
+        self._qlim = np.asarray(robot.qlim, dtype=float)
+        self.step = float(step)
+        self.resolution = float(resolution)
+        self._rng = np.random.default_rng(seed)
+        # между проверками точка звена смещается не больше чем на resolution · reach
+        # (при сумме приращений суставов <= resolution): запас в половину смещения
+        # делает проверку ребра сплошной
+        self._padding = 0.5 * self.resolution * collision.reach
+
+    def _free_fraction(self, q_a: np.ndarray, q_b: np.ndarray) -> float:
+        """Доля отрезка q_a → q_b от начала, свободная от столкновений (1.0 — весь отрезок)."""
+        count = max(1, int(np.ceil(np.sum(np.abs(q_b - q_a)) / self.resolution)))
+        s = np.arange(1, count + 1) / count
+        hits = self._collision.in_collision(q_a + s[:, None] * (q_b - q_a), self._padding)
+        if not np.any(hits):
+            return 1.0
+        first = int(np.argmax(hits))
+        return s[first - 1] if first > 0 else 0.0
+
+    def edge_free(self, q_a: ArrayLike, q_b: ArrayLike) -> bool:
+        return self._free_fraction(np.asarray(q_a, dtype=float), np.asarray(q_b, dtype=float)) == 1.0
+
+    def edges_free(self, q_a: np.ndarray, q_b: np.ndarray) -> np.ndarray:
+        """Свободны ли рёбра q_a → q_b[k] (K, n): все рёбра — одним вызовом проверки."""
+        counts = np.maximum(1, np.ceil(np.sum(np.abs(q_b - q_a), axis=1) / self.resolution)).astype(int)
+        edge = np.repeat(np.arange(len(q_b)), counts)
+        s = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + 1) / counts[edge]
+        hits = self._collision.in_collision(q_a + s[:, None] * (q_b[edge] - q_a), self._padding)
+        return ~np.bincount(edge[hits], minlength=len(q_b)).astype(bool)
+
+    def _samples(self, count: int = 64):
+        """Бесконечный поток случайных свободных конфигураций (проверка пачками)."""
+        while True:
+            q = self._rng.uniform(self._qlim[0], self._qlim[1], (count, self._qlim.shape[1]))
+            yield from q[~self._collision.in_collision(q, self._padding)]
+
+    def _grow(self, tree: _Tree, q_target: np.ndarray, connect: bool) -> tuple[bool, int]:
+        """
+        Рост дерева к q_target: на один шаг (extend) или до упора (connect).
+
+        :return: (достигнута ли q_target, индекс последнего добавленного узла или -1)
+        """
+        index = tree.nearest(q_target)
+        q_near = tree.nodes[index]
+        delta = q_target - q_near
+        dist = np.linalg.norm(delta)
+        if dist < 1e-9:
+            return True, index
+
+        full = connect or dist <= self.step
+        q_to = q_target if full else q_near + delta * (self.step / dist)
+        frac = self._free_fraction(q_near, q_to)
+        if frac == 0.0:
+            return False, -1
+
+        # свободная часть отрезка — цепочкой узлов не длиннее step
+        q_end = q_near + frac * (q_to - q_near)
+        pieces = max(1, int(np.ceil(frac * np.linalg.norm(q_to - q_near) / self.step)))
+        for k in range(1, pieces + 1):
+            index = tree.add(q_near + (k / pieces) * (q_end - q_near), index)
+        return full and frac == 1.0, index
+
+    def plan(self, q_start: ArrayLike, q_goal: ArrayLike, time_budget: float = 0.5) -> np.ndarray | None:
+        """
+        :param q_start: начальная конфигурация
+        :param q_goal: целевая конфигурация
+        :param time_budget: время на поиск и сглаживание, с
+        :return: точки пути (M, n) от q_start до q_goal или None, если путь не найден
+        """
+        q_start = np.asarray(q_start, dtype=float)
+        q_goal = np.asarray(q_goal, dtype=float)
+        deadline = time.perf_counter() + time_budget
+        if np.any(self._collision.in_collision(np.array([q_start, q_goal]), self._padding)):
+            return None
+        if self.edge_free(q_start, q_goal):
+            return np.array([q_start, q_goal])
+
+        tree_a, tree_b = _Tree(q_start), _Tree(q_goal)
+        swapped = False
+        samples = self._samples()
+        while time.perf_counter() < deadline:
+            _, index_a = self._grow(tree_a, next(samples), connect=False)
+            if index_a >= 0:
+                reached, index_b = self._grow(tree_b, tree_a.nodes[index_a], connect=True)
+                if reached:
+                    # узел index_b совпадает с index_a — в путь входит один раз
+                    path = tree_a.path(index_a) + tree_b.path(index_b)[::-1][1:]
+                    if swapped:
+                        path = path[::-1]
+                    return self.shortcut(np.array(path), deadline)
+            tree_a, tree_b = tree_b, tree_a
+            swapped = not swapped
+        return None
+
+    def shortcut(self, path: np.ndarray, deadline: float | None = None, attempts: int = 30) -> np.ndarray:
+        """
+        Сглаживание: жадно соединяет каждую точку с самой дальней видимой,
+        затем пробует случайные срезки между точками на соседних и дальних отрезках.
+        """
+        out = [path[0]]
+        i = 0
+        while i < len(path) - 1:
+            free = self.edges_free(path[i], path[i + 2:])
+            j = i + 1 + (int(np.flatnonzero(free)[-1]) + 1 if np.any(free) else 0)
+            out.append(path[j])
+            i = j
+        path = np.array(out)
+
+        for _ in range(attempts):
+            if len(path) < 3 or (deadline is not None and time.perf_counter() > deadline):
+                break
+            i, j = np.sort(self._rng.choice(len(path) - 1, 2, replace=False))
+            q_i = path[i] + self._rng.uniform() * (path[i + 1] - path[i])
+            q_j = path[j] + self._rng.uniform() * (path[j + 1] - path[j])
+            if self.edge_free(q_i, q_j):
+                path = np.vstack([path[:i + 1], q_i, q_j, path[j + 1:]])
+        return path
 
 
 class TrajectoryPlannerComponent:
     def __init__(self,
-                 robot: DHRobot,
-                 dt: float = 0.01):
+                 robot: DHModel,
+                 dt: float = 0.01,
+                 ik_solver: BaseIKSolver | None = None,
+                 ik_cache: IKCache | None = None,
+                 reachability: ReachabilityMap | None = None,
+                 seed_table: IKSeedTable | None = None,
+                 profile: str = "jtraj",
+                 collision: CollisionWorld | None = None,
+                 detour_time: float = 0.5,
+                 dynamics: DHDynamics | None = None,
+                 conditioning: Conditioning | None = None,
+                 ik_objective: str | Mapping[str, float] | None = None,
+                 distance_field: DistanceField | None = None,
+                 min_clearance: float = 0.0):
         """
-        :param robot: модель робота (DHRobot)
+        :param robot: модель робота (DHModel)
         :param dt: шаг симуляции в секундах (например, 0.01 для 10 мс)
+        :param ik_solver: решатель IK вместо ikine_LM (например, AnalyticIKSolver)
+        :param ik_cache: кэш решений IK (для plan и solve_targets)
+        :param reachability: карта досягаемости — недостижимые цели отбрасываются до IK
+        :param seed_table: таблица начальных приближений для ikine_LM
+        :param profile: профиль скорости PTP:
+                        "jtraj" — полином 5-й степени, время по средней скорости qd;
+                        "trapezoid" — быстрейший по qd и robot.qdd;
+                        "scurve" — быстрейший по qd, robot.qdd и robot.qddd (ограничен рывок)
+        :param collision: препятствия — траектория, задевающая их, отклоняется
+        :param detour_time: время на поиск обхода препятствий (RRT-Connect) для PTP и сопряжённых
+                            движений, с; 0 — без обхода
+        :param dynamics: обратная динамика (dynamics_of(robot)) — траектория, на которой моменты
+                         превышают tau_max, замедляется; None — без проверки моментов
+        :param conditioning: обусловленность якобиана (conditioning_of(robot)) — каждая траектория
+                             получает оценку (score); участки LIN рядом с сингулярностью замедляются,
+                             LIN через сингулярность отклоняется
+        :param ik_objective: критерий выбора избыточности в пакетной IK (solve_targets):
+                             "limits", "qr", "manipulability" или {имя: вес}, см. BatchIKSolver
+        :param distance_field: поле расстояний рабочей ячейки (стол, ограждения) — траектория,
+                               на которой зазор звеньев (кроме первого, стоящего на столе) меньше
+                               min_clearance, отклоняется
+        :param min_clearance: наименьший допустимый зазор до distance_field, м
         """
+        if profile not in ("jtraj", "trapezoid", "scurve"):
+            raise ValueError(f"Неизвестный профиль скорости: {profile}")
         self._robot = robot
+        self._ik_solver = ik_solver
+        self._ik_cache = ik_cache
+        self._reachability = reachability
+        self._seed_table = seed_table
+        self._profile = profile
+        self._collision = collision
+        self._detour_time = float(detour_time)
+        self._rrt = RRTConnect(robot, collision) if collision is not None and detour_time > 0 else None
+        self._dynamics = dynamics
+        self._conditioning = conditioning
+        self._distance_field = distance_field
+        self._min_clearance = float(min_clearance)
+        self._capsules = collision.link_capsules if collision is not None else LinkCapsules(robot)
+        self._score: ConditioningScore | None = None
         self._trajectory: np.ndarray = np.zeros((0, robot.n))
+        self._waypoint_index: list[int] = []
         self._last_q: np.ndarray = np.zeros(robot.n)
         self._dt = dt
+        self._batch_ik = BatchIKSolver(robot, objective=ik_objective)
+
+    def _pose(self,
+              xyz: Tuple[float, float, float],
+              rpy: Tuple[float, float, float]) -> np.ndarray:
+        T = np.eye(4)
+        T[:3, :3] = rpy_to_rot(rpy)
+        T[:3, 3] = xyz
+        return T
 
-    def _euler_to_se3(self,
-                      xyz: Tuple[float, float, float],
-                      rpy: Tuple[float, float, float]) -> SE3:
-        return SE3(*xyz) * SE3.RPY(rpy, order="xyz")
+    def _solve_ik(self,
+                  current_q: np.ndarray,
+                  target_xyz: Tuple[float, float, float],
+                  target_rpy: Tuple[float, float, float]) -> np.ndarray | None:
+        if self._ik_cache is not None:
+            key = self._ik_cache.key(current_q, target_xyz, target_rpy)
+            found, q = self._ik_cache.lookup(key)
+            if not found:
+                q = self._with_objective(self._solve_ik_uncached(current_q, target_xyz, target_rpy),
+                                         target_xyz, target_rpy)
+                self._ik_cache.store(key, q)
+            return q
+        return self._with_objective(self._solve_ik_uncached(current_q, target_xyz, target_rpy),
+                                    target_xyz, target_rpy)
+
+    def _with_objective(self,
+                        q: np.ndarray | None,
+                        target_xyz: Tuple[float, float, float],
+                        target_rpy: Tuple[float, float, float]) -> np.ndarray | None:
+        """
+        Одиночное решение, сдвинутое по критерию ik_objective, как решения solve_targets:
+        кэш IK общий для обоих путей. Сдвинутое решение с самопересечением не берётся.
+        """
+        if q is None or not self._batch_ik.objective:
+            return q
+        q_opt = self._batch_ik.refine(q, self._pose(target_xyz, target_rpy))
+        return q if self._self_collides(q_opt) else q_opt
+
+    def _solve_ik_uncached(self,
+                           current_q: np.ndarray,
+                           target_xyz: Tuple[float, float, float],
+                           target_rpy: Tuple[float, float, float]) -> np.ndarray | None:
+        if self._ik_solver is not None:
+            q = self._ik_solver.solve(current_q, target_xyz, target_rpy)
+            return None if q is None or self._self_collides(q) else q
+
+        T_goal = self._pose(target_xyz, target_rpy)
+        q0 = current_q
+        if self._seed_table is not None:
+            q0 = self._seed_table.seeds(self._robot, current_q, target_xyz, target_rpy)
+        sol = self._robot.ikine_LM(T_goal, q0=q0, joint_limits=True)
+        if not sol.success:
+            return None
+        if not self._self_collides(sol.q):
+            return sol.q
+
+        # решение с самопересечением — перебираем приближения по одному (другие ветви IK)
+        for q_seed in np.atleast_2d(q0)[1:]:
+            sol = self._robot.ikine_LM(T_goal, q0=q_seed, joint_limits=True)
+            if sol.success and not self._self_collides(sol.q):
+                return sol.q
+        return None
+
+    def _self_collides(self, q: np.ndarray) -> bool:
+        if self._collision is None or self._collision.self_collision is None:
+            return False
+        return bool(self._collision.self_collision.in_collision(q)[0])
 
     def plan(self,
              current_q: np.ndarray,
@@ -47,31 +346,527 @@ class TrajectoryPlannerComponent:
                 print("[PLAN ERROR] Не заданы ни q_target, ни target_xyz+target_rpy")
                 return False
 
-            T_goal = self._euler_to_se3(target_xyz, target_rpy)
-            sol = self._robot.ikine_LM(T_goal, q0=current_q, joint_limits=True)
-            if not sol.success:
-                print(f"[IK WARNING] IK не решена для: {target_xyz}, {target_rpy}")
+            q_target = self._target_q(current_q, target_xyz, target_rpy)
+            if q_target is None:
                 return False
-            q_target = sol.q
         else:
             q_target = np.array(q_target)
 
-        # Используем robot.qd как предел скорости
-        qd = getattr(self._robot, "qd", np.ones_like(current_q))
-        delta = np.abs(q_target - current_q)
-        move_time = np.max(delta / (qd * velocity))
-        steps = max(2, int(move_time / self._dt))
+        qd, qdd, qddd = self._limits(velocity)
+        if self._profile == "jtraj":
+            delta = np.abs(q_target - current_q)
+            move_time = np.max(delta / qd)
+            steps = max(2, int(move_time / self._dt))
+            trajectory = jtraj(current_q, q_target, steps)
+        else:
+            trajectory = ptp_profile(current_q, q_target, qd, qdd, qddd, self._dt)[0]
+        trajectory = self._avoid_obstacles(trajectory, [np.asarray(current_q, dtype=float), q_target],
+                                           velocity, "PTP")
+        if trajectory is not None:
+            trajectory = self._within_torque(trajectory, "PTP")
+        if trajectory is None:
+            return False
 
-        traj = jtraj(current_q, q_target, steps)
-        self._trajectory = traj.q
+        self._trajectory = trajectory
+        self._score = self._score_of(trajectory)
+        self._waypoint_index = [len(self._trajectory) - 1]
         self._last_q = q_target
 
         return True
 
+    def plan_waypoints(self,
+                       current_q: np.ndarray,
+                       targets: Sequence[Sequence[float]],
+                       speed_scale: float = 1.0,
+                       q_targets: Sequence[np.ndarray | None] | None = None) -> bool:
+        """
+        Планирует одну непрерывную траекторию через последовательность поз:
+        в промежуточных точках робот не останавливается (сопряжения по пределам
+        qdd/qddd, путь срезает углы), остановка — только в последней точке.
+
+        :param current_q: текущие суставные углы
+        :param targets: позы [x, y, z, roll, pitch, yaw]
+        :param speed_scale: масштаб скорости (0.01–1.0)
+        :param q_targets: готовые решения IK для поз (например, из solve_targets); None — решить IK
+        :return: True, если достигнута хотя бы одна точка; недостижимые точки пропускаются
+        """
+        self._last_q = current_q.copy()
+        velocity = max(0.01, min(speed_scale, 1.0))
+
+        waypoints = [np.asarray(current_q, dtype=float)]
+        for i, target in enumerate(targets):
+            q_i = None if q_targets is None else q_targets[i]
+            if q_i is None:
+                q_i = self._target_q(waypoints[-1], target[:3], target[3:])
+                if q_i is None:
+                    continue
+            waypoints.append(np.asarray(q_i, dtype=float))
+
+        if len(waypoints) < 2:
+            return False
+
+        qd, qdd, qddd = self._limits(velocity)
+        trajectory = blend_profile(np.array(waypoints), qd, qdd, qddd, self._dt)[0]
+        trajectory = self._avoid_obstacles(trajectory, waypoints, velocity, "сопряжённое движение")
+        if trajectory is not None:
+            trajectory = self._within_torque(trajectory, "сопряжённое движение")
+        if trajectory is None:
+            return False
+        self._trajectory = trajectory
+        self._score = self._score_of(trajectory)
+
+        # ближайший к каждой точке отсчёт траектории (точки проходятся по порядку)
+        self._waypoint_index = []
+        start = 0
+        for w in waypoints[1:]:
+            start += int(np.argmin(np.linalg.norm(self._trajectory[start:] - w, axis=1)))
+            self._waypoint_index.append(start)
+        self._waypoint_index[-1] = len(self._trajectory) - 1
+        self._last_q = waypoints[-1]
+
+        return True
+
+    def plan_linear(self,
+                    current_q: np.ndarray,
+                    target_xyz: Tuple[float, float, float],
+                    target_rpy: Tuple[float, float, float],
+                    speed_scale: float = 1.0,
+                    linear_speed: float = 0.25,
+                    angular_speed: float = 1.0,
+                    jump_tol: float = 0.1,
+                    singular_tol: float = 1e-2) -> bool:
+        """
+        Планирует прямолинейное движение TCP от текущей позы к целевой (LIN).
+
+        Отрезок дискретизируется по S-профилю с шагом dt, IK для всех отсчётов решается
+        пакетно (BatchIKSolver.solve_path). Если скорости суставов превышают qd,
+        движение замедляется и пересчитывается.
+
+        :param linear_speed: предельная скорость TCP, м/с
+        :param angular_speed: предельная угловая скорость TCP, рад/с
+        :param jump_tol: скачок сустава между соседними отсчётами, рад, считающийся сменой ветви
+        :param singular_tol: порог минимального сингулярного числа якобиана для предупреждения
+                             (без conditioning; с ним — замедление и отклонение по его порогам)
+        :return: False, если IK не решена вдоль отрезка, решение скачет между ветвями
+                 или проходит через сингулярность
+        """
+        self._last_q = current_q.copy()
+        velocity = max(0.01, min(speed_scale, 1.0))
+        current_q = np.asarray(current_q, dtype=float)
+
+        if self._reachability is not None and not self._reachability.is_reachable(target_xyz, target_rpy):
+            print(f"[IK WARNING] Цель вне зоны досягаемости: {target_xyz}, {target_rpy}")
+            return False
+
+        kin = kinematics_of(self._robot)
+        T_start = kin.fkine(current_q)
+        T_goal = np.eye(4)
+        T_goal[:3, :3] = rpy_to_rot(target_rpy)
+        T_goal[:3, 3] = target_xyz
+        length = np.linalg.norm(T_goal[:3, 3] - T_start[:3, 3])
+        angle = np.linalg.norm(pose_error(T_start[None], T_goal[None])[0, 3:])
+        qd = self._limits(velocity)[0]
+
+        # скорость/ускорение по параметру пути s: лимитирует линейная или угловая часть
+        v = min(linear_speed * velocity / max(length, 1e-9), angular_speed * velocity / max(angle, 1e-9))
+        for attempt in range(6):
+            s_path = scurve(1.0, v, 4.0 * v, np.inf, self._dt)[0]
+            sol = self._batch_ik.solve_path(current_q, interpolate_poses(T_start, T_goal, s_path))
+            if not np.all(sol.success):
+                bad = np.flatnonzero(~sol.success)[0]
+                print(f"[IK WARNING] LIN: IK не решена вдоль отрезка (s = {s_path[bad]:.3f}): {target_xyz}, {target_rpy}")
+                return False
+
+            q = sol.q
+            q[0] = current_q
+            step = np.abs(np.diff(q, axis=0))
+            if np.any(step > jump_tol):
+                bad = int(np.argmax(np.max(step, axis=1)))
+                print(f"[PLAN WARNING] LIN: скачок суставов на s = {s_path[bad]:.3f} — смена ветви IK: "
+                      f"{target_xyz}, {target_rpy}")
+                return False
+
+            # скорости суставов в пределах qd — иначе замедляем движение (с запасом 2 %:
+            # после замедления IK решается заново, и скорости чуть смещаются)
+            ratio = np.max(step / (qd * self._dt))
+            if ratio <= 1.0 + 1e-9:
+                break
+            if attempt == 5:
+                print(f"[PLAN WARNING] LIN: скорости суставов превышают qd в {ratio:.3f} раза "
+                      f"и после замедления: {target_xyz}, {target_rpy}")
+                return False
+            v /= 1.02 * ratio
+
+        if self._conditioning is None:
+            sigma = np.linalg.svd(kin.jacob0(q), compute_uv=False)[:, -1]
+            if np.any(sigma < singular_tol):
+                bad = int(np.argmin(sigma))
+                print(f"[PLAN WARNING] LIN: близость к сингулярности на s = {s_path[bad]:.3f} "
+                      f"(σ_min = {sigma[bad]:.2e}): {target_xyz}, {target_rpy}")
+        else:
+            q = self._well_conditioned(q, "LIN")
+            if q is None:
+                return False
+
+        if not self._collision_free(q, "LIN"):
+            return False
+        q = self._within_torque(q, "LIN")
+        if q is None:
+            return False
+
+        self._trajectory = q
+        self._waypoint_index = [len(q) - 1]
+        self._last_q = q[-1]
+        return True
+
+    def _collision_free(self, trajectory: np.ndarray, label: str) -> bool:
+        """Проверка траектории по препятствиям и полю расстояний; при столкновении печатает предупреждение."""
+        if self._collision is not None:
+            hit = self._collision.check(trajectory)
+            if hit.collides:
+                print(f"[PLAN WARNING] {label}: {self._describe(hit)} "
+                      f"(шаг {hit.index} из {len(trajectory)})")
+                return False
+        return self._clear_of_field(trajectory, label)
+
+    def _clear_of_field(self, trajectory: np.ndarray, label: str) -> bool:
+        """Зазор звеньев до distance_field не меньше min_clearance; звено 1 стоит на столе и не учитывается."""
+        if self._distance_field is None:
+            return True
+        gaps = self._distance_field.clearance(trajectory, self._capsules)[:, 1:]
+        index, link = np.unravel_index(np.argmin(gaps), gaps.shape)
+        if gaps[index, link] >= self._min_clearance:
+            return True
+        print(f"[PLAN WARNING] {label}: зазор звена {self._capsules.names[link + 1]} до рабочей ячейки "
+              f"{gaps[index, link]:.3f} м < {self._min_clearance:.3f} м (шаг {index} из {len(trajectory)})")
+        return False
+
+    def _within_torque(self, trajectory: np.ndarray, label: str) -> np.ndarray | None:
+        """
+        Проверка моментов приводов; если пределы превышены — движение растягивается во времени
+        (путь тот же). None — не помогает и замедление: пределы превышает статическая нагрузка.
+        """
+        if self._dynamics is None:
+            return trajectory
+        scaled, result = self._dynamics.time_scale(trajectory, self._dt)
+        if result.exceeds:
+            print(f"[PLAN WARNING] {label}: момент сустава A{result.joint + 1} превышает предел "
+                  f"в {result.ratio:.2f} раза (шаг {result.index} из {len(scaled)})")
+            return None
+        if len(scaled) > len(trajectory):
+            print(f"[INFO] {label}: моменты приводов выше пределов — движение замедлено "
+                  f"в {(len(scaled) - 1) / max(1, len(trajectory) - 1):.2f} раза")
+        return scaled
+
+    def _score_of(self, trajectory: np.ndarray) -> ConditioningScore | None:
+        return None if self._conditioning is None else self._conditioning.score(trajectory)
+
+    def _well_conditioned(self, trajectory: np.ndarray, label: str) -> np.ndarray | None:
+        """
+        Обусловленность вдоль траектории: участки рядом с сингулярностью замедляются,
+        траектория через сингулярность (σ_min < sigma_reject) отклоняется — None.
+        """
+        q, result = self._conditioning.retime(trajectory, self._dt)
+        self._score = result
+        if result.singular:
+            print(f"[PLAN WARNING] {label}: сингулярность на шаге {result.index} из {len(trajectory)} "
+                  f"(σ_min = {result.sigma_min:.2e})")
+            return None
+        if len(q) > len(trajectory):
+            print(f"[INFO] {label}: участок у сингулярности (σ_min = {result.sigma_min:.2e}) замедлен "
+                  f"до {result.scale:.1f} раза, +{(len(q) - len(trajectory)) * self._dt:.2f} с")
+        return q
+
+    def _describe(self, hit: CollisionResult) -> str:
+        if hit.obstacle in self._collision.link_capsules.names:
+            return f"звено {hit.link} задевает звено {hit.obstacle}"
+        return f"звено {hit.link} задевает препятствие '{hit.obstacle}'"
+
+    def _avoid_obstacles(self,
+                         trajectory: np.ndarray,
+                         waypoints: Sequence[np.ndarray],
+                         velocity: float,
+                         label: str) -> np.ndarray | None:
+        """
+        Проверка траектории по препятствиям; если она их задевает — обход:
+        прямые участки между точками, пересекающие препятствия, заменяются путями
+        RRT-Connect, маршрут проходится с сопряжениями, а если сопряжения срезают
+        углы в препятствие — с остановками в каждой точке маршрута.
+
+        :return: траектория без столкновений или None
+        """
+        if self._rrt is None:
+            return trajectory if self._collision_free(trajectory, label) else None
+        hit = self._collision.check(trajectory)
+        if not hit.collides:
+            return trajectory if self._clear_of_field(trajectory, label) else None
+
+        blocked = self._collision.in_collision(np.array(waypoints))
+        if np.any(blocked):
+            print(f"[PLAN WARNING] {label}: точка маршрута {int(np.argmax(blocked))} в столкновении "
+                  f"— обход невозможен")
+            return None
+
+        print(f"[INFO] {label}: {self._describe(hit)} — строю обход")
+        route = [waypoints[0]]
+        for q_b in waypoints[1:]:
+            path = self._rrt.plan(route[-1], q_b, self._detour_time)
+            if path is None:
+                print(f"[PLAN WARNING] {label}: обход препятствий не найден за {self._detour_time} с")
+                return None
+            route.extend(path[1:])
+        route = np.array(route)
+
+        qd, qdd, qddd = self._limits(velocity)
+        detour = blend_profile(route, qd, qdd, qddd, self._dt)[0]
+        if self._collision.check(detour).collides:
+            parts = [ptp_profile(route[k], route[k + 1], qd, qdd, qddd, self._dt)[0] for k in range(len(route) - 1)]
+            detour = np.vstack([parts[0]] + [part[1:] for part in parts[1:]])
+        return detour if self._collision_free(detour, label) else None
+
+    def _limits(self, velocity: float) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+        """
+        Пределы qd, qdd, qddd модели с учётом speed_scale: движение растягивается
+        во времени (скорости ×k, ускорения ×k², рывки ×k³). Рывок ограничивается
+        только в профиле "scurve".
+        """
+        # Используем robot.qd как предел скорости
+        qd = np.asarray(getattr(self._robot, "qd", np.ones(self._robot.n)), dtype=float)
+        qdd = np.asarray(getattr(self._robot, "qdd", 5 * qd), dtype=float)
+        qddd = np.asarray(getattr(self._robot, "qddd", 25 * qd), dtype=float) if self._profile == "scurve" else None
+        return (qd * velocity,
+                qdd * velocity ** 2,
+                None if qddd is None else qddd * velocity ** 3)
+
+    def _target_q(self,
+                  current_q: np.ndarray,
+                  target_xyz: Tuple[float, float, float],
+                  target_rpy: Tuple[float, float, float]) -> np.ndarray | None:
+        """IK для позы с проверкой по карте досягаемости; при неудаче печатает предупреждение."""
+        if self._reachability is not None and not self._reachability.is_reachable(target_xyz, target_rpy):
+            print(f"[IK WARNING] Цель вне зоны досягаемости: {target_xyz}, {target_rpy}")
+            return None
+
+        q_target = self._solve_ik(current_q, target_xyz, target_rpy)
+        if q_target is None:
+            print(f"[IK WARNING] IK не решена для: {target_xyz}, {target_rpy}")
+        return q_target
+
+    def solve_targets(self,
+                      current_q: np.ndarray,
+                      targets: Sequence[Sequence[float]]) -> BatchIKResult:
+        """
+        Пакетная IK для всех декартовых целей программы сразу.
+
+        Цели решаются одним векторизованным проходом, каждая уточняется из решения
+        предыдущей (как при последовательном вызове plan). Найденные q передаются
+        в plan через q_target; для целей с success=False plan решает IK сам
+        (в том числе для решений с самопересечением — они отбрасываются до записи
+        в кэш IK и не служат приближением следующей цели). Число досягаемых целей,
+        оставленных plan, печатается строкой [INFO].
+
+        :param current_q: стартовые суставные углы программы
+        :param targets: список поз [x, y, z, roll, pitch, yaw]
+        """
+        targets = np.asarray(targets, dtype=float).reshape(-1, 6)
+        result = None
+        reachable = np.ones(targets.shape[0], dtype=bool)
+        if self._reachability is not None:
+            reachable = self._reachability.reachable_mask(targets[:, :3], targets[:, 3:])
+            if not np.all(reachable):
+                result = self._solve_reachable(current_q, targets, reachable)
+        if result is None:
+            result = self._solve_all(current_q, targets)
+
+        # досягаемые цели без решения plan решает по одной
+        fallback = int(np.sum(reachable & ~result.success))
+        if fallback:
+            solver = type(self._ik_solver).__name__ if self._ik_solver is not None else "ikine_LM"
+            print(f"[INFO] Пакетная IK: {fallback} из {len(targets)} целей не решены, "
+                  f"plan решит их по одной ({solver})")
+        return result
+
+    def _self_colliding(self, q: np.ndarray) -> np.ndarray:
+        """Маска решений IK (M, n) с самопересечением; без модели самопересечений — все False."""
+        if self._collision is None or self._collision.self_collision is None:
+            return np.zeros(len(q), dtype=bool)
+        return self._collision.self_collision.in_collision(q)
+
+    def _solve_all(self, current_q: np.ndarray, targets: np.ndarray) -> BatchIKResult:
+        if self._ik_cache is None:
+            return self._batch_ik.solve_sequence(current_q, targets[:, :3], targets[:, 3:],
+                                                 reject=self._self_colliding)
+
+        # повтор программы: цепочка ключей (цель, решение предыдущей цели) уже в кэше
+        M = targets.shape[0]
+        q = np.zeros((M, self._robot.n))
+        success = np.zeros(M, dtype=bool)
+        residual = np.zeros(M)          # у решений из кэша невязка уже в допуске
+        iterations = np.zeros(M, dtype=int)
+        seed = np.asarray(current_q, dtype=float)
+        start = M
+        for i, t in enumerate(targets):
+            found, q_i = self._ik_cache.lookup(self._ik_cache.key(seed, t[:3], t[3:]))
+            # запись из старого кэша с самопересечением — решаем заново
+            if not found or (q_i is not None and self._self_colliding(q_i[None])[0]):
+                start = i
+                break
+            if q_i is not None:
+                q[i], success[i] = q_i, True
+                seed = q_i
+            else:
+                residual[i] = np.inf
+
+        if start < M:
+            rest = self._batch_ik.solve_sequence(seed, targets[start:, :3], targets[start:, 3:],
+                                                 reject=self._self_colliding)
+            q[start:], success[start:] = rest.q, rest.success
+            residual[start:], iterations[start:] = rest.residual, rest.iterations
+            for i in range(start, M):
+                t = targets[i]
+                self._ik_cache.store(self._ik_cache.key(seed, t[:3], t[3:]),
+                                     q[i] if success[i] else None)
+                if success[i]:
+                    seed = q[i]
+
+        return BatchIKResult(q=q, success=success, residual=residual, iterations=iterations)
+
+    def _solve_reachable(self,
+                         current_q: np.ndarray,
+                         targets: np.ndarray,
+                         reachable: np.ndarray) -> BatchIKResult:
+        """Решает только досягаемые цели; остальные помечаются неудачными без запуска IK."""
+        M = targets.shape[0]
+        q = np.tile(np.asarray(current_q, dtype=float), (M, 1))
+        success = np.zeros(M, dtype=bool)
+        residual = np.full(M, np.inf)
+        iterations = np.zeros(M, dtype=int)
+
+        for i in np.flatnonzero(~reachable):
+            print(f"[IK WARNING] Цель вне зоны досягаемости: {targets[i, :3]}, {targets[i, 3:]}")
+
+        idx = np.flatnonzero(reachable)
+        if idx.size:
+            sub = self._solve_all(current_q, targets[idx])
+            q[idx], success[idx] = sub.q, sub.success
+            residual[idx], iterations[idx] = sub.residual, sub.iterations
+        return BatchIKResult(q=q, success=success, residual=residual, iterations=iterations)
+
+    @property
+    def signature(self) -> str:
+        """
+        Настройки планировщика, от которых зависит траектория: профиль, пределы qd/qdd/qddd,
+        обход препятствий, препятствия, поле расстояний, динамика, обусловленность, решатель IK,
+        таблица приближений, карта досягаемости и критерий IK — одной строкой для ключа кэша траекторий.
+        """
+        h = hashlib.sha1()
+        h.update(f"{self._profile}/{self._dt:g}/{self._detour_time:g}/{self._batch_ik.objective}".encode())
+        h.update(self._ik_solver.signature.encode() if self._ik_solver is not None else b"ikine_LM")
+        for limit in self._limits(1.0):
+            if limit is not None:
+                h.update(np.ascontiguousarray(limit, dtype=float).tobytes())
+        h.update(f"{self._min_clearance:g}".encode())
+        for part in (self._seed_table, self._reachability,
+                     self._collision, self._dynamics, self._conditioning, self._distance_field):
+            h.update(b"|" + (part.signature.encode() if part is not None else b"-"))
+        return h.hexdigest()
+
+    @property
+    def score(self) -> ConditioningScore | None:
+        """Оценка обусловленности последней траектории (None — без conditioning)."""
+        return self._score
+
     @property
     def trajectory(self) -> np.ndarray:
         return self._trajectory
 
+    @property
+    def waypoint_index(self) -> list[int]:
+        """Индексы отсчётов trajectory, ближайших к точкам последнего plan/plan_waypoints."""
+        return self._waypoint_index
+
     @property
     def current_q(self) -> np.ndarray:
         return self._last_q
+
+
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import os
+    import tempfile
+    from .robot_models import LBRiiwaR800Model
+
+    model = LBRiiwaR800Model()
+    kin = kinematics_of(model)
+    rng = np.random.default_rng(0)
+
+    # цели из конфигураций с самопересечением: такие решения не попадают ни в результат, ни в кэш IK
+    world = CollisionWorld(model)
+    q_bad = rng.uniform(model.qlim[0], model.qlim[1], (4000, model.n))
+    q_bad = q_bad[world.self_collision.in_collision(q_bad)]
+    ik_cache = IKCache(model=model)
+    planer = TrajectoryPlannerComponent(model, ik_cache=ik_cache, collision=world)
+    result = planer.solve_targets(model.qz, np.hstack(kin.fkine_xyzrpy(q_bad)))
+    with tempfile.TemporaryDirectory() as tmp:
+        ik_cache.save(os.path.join(tmp, "ik_cache.npz"))
+        cached = np.load(os.path.join(tmp, "ik_cache.npz"))["values"].reshape(-1, model.n)
+    colliding = int(np.sum(result.success & world.self_collision.in_collision(result.q)))
+    colliding_cached = int(np.sum(world.self_collision.in_collision(cached))) if len(cached) else 0
+    print(f"[INFO] Самопересечения: целей {len(q_bad)}, решено {int(result.success.sum())}, "
+          f"с самопересечением в результате {colliding}, в кэше IK {colliding_cached} из {len(cached)}")
+    assert colliding == 0 and colliding_cached == 0, "solve_targets: решение с самопересечением"
+
+    # стол под базой в поле расстояний: PTP, уводящий звенья под стол, отклоняется
+    from .collision import pose_matrix
+    field = DistanceField(lower=(-1.2, -1.2, -0.3), upper=(1.2, 1.2, 1.2), resolution=0.04)
+    field.add_box("table", pose_matrix([0.0, 0.0, -0.05]), [2.4, 2.4, 0.1])
+    q_rand = rng.uniform(model.qlim[0], model.qlim[1], (2000, model.n))
+    q_rand = q_rand[~world.self_collision.in_collision(q_rand)]
+    gaps = field.clearance(q_rand, world.link_capsules)[:, 1:].min(axis=1)
+    q_under, q_clear = q_rand[np.argmin(gaps)], q_rand[np.argmax(gaps)]
+    gated = TrajectoryPlannerComponent(model, collision=world, distance_field=field)
+    free = TrajectoryPlannerComponent(model, collision=world)
+    q_start = np.asarray(model.qr, dtype=float)
+    assert free.plan(q_start, None, None, q_target=q_under), "PTP без поля расстояний не спланирован"
+    assert not gated.plan(q_start, None, None, q_target=q_under), "PTP под стол не отклонён"
+    assert gated.plan(q_start, None, None, q_target=q_clear), "PTP над столом отклонён"
+    print(f"[INFO] Поле расстояний: PTP с зазором {gaps.min():.3f} м отклонён, с зазором {gaps.max():.3f} м — нет")
+
+    # одиночные решения IK сдвигаются по критерию до записи в общий с solve_targets кэш
+    from .solvers import AnalyticIKSolver
+    analytic = AnalyticIKSolver(model)
+    ik_cache = IKCache(model=model)
+    planer = TrajectoryPlannerComponent(model, ik_solver=analytic, ik_cache=ik_cache, collision=world,
+                                        ik_objective="limits")
+    q_rand = rng.uniform(model.qlim[0], model.qlim[1], (200, model.n))
+    q_rand = q_rand[~world.self_collision.in_collision(q_rand)][:30]
+    gains, worst = [], 0.0
+    for xyz, rpy in zip(*kin.fkine_xyzrpy(q_rand)):
+        q_plain = analytic.solve(q_start, xyz, rpy)
+        q = planer._solve_ik(q_start, xyz, rpy)
+        if q_plain is None:
+            continue
+        assert np.array_equal(ik_cache.lookup(ik_cache.key(q_start, xyz, rpy))[1], q), "в кэше IK не то решение"
+        cost_plain, cost = planer._batch_ik.cost(np.array([q_plain, q]))
+        gains.append(float(cost_plain - cost))
+        worst = max(worst, float(np.max(np.abs(pose_error(kin.fkine(q)[None], kin.fkine(q_plain)[None])))))
+    print(f"[INFO] Критерий для одиночных решений: {len(gains)} поз, снижение стоимости "
+          f"медиана {np.median(gains):.4f}, наименьшее {min(gains):.2e}, отклонение позы {worst:.1e}")
+    assert min(gains) >= -1e-12 and np.median(gains) > 0, "ik_objective не применён к одиночному решению"
+    assert worst < 1e-6, "сдвиг по критерию изменил позу TCP"
+
+    # LIN между случайными позами: принятая траектория не превышает qd ни на одном шаге
+    planer = TrajectoryPlannerComponent(model, dt=0.01)
+    qd = np.asarray(model.qd, dtype=float)
+    planned, worst = 0, 0.0
+    for _ in range(100):
+        q_from = rng.uniform(0.7 * model.qlim[0], 0.7 * model.qlim[1])
+        xyz, rpy = kin.fkine_xyzrpy(q_from)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok = planer.plan_linear(q_from, xyz + rng.uniform(-0.3, 0.3, 3), rpy + rng.uniform(-0.5, 0.5, 3))
+        if ok:
+            planned += 1
+            worst = max(worst, float(np.max(np.abs(np.diff(planer.trajectory, axis=0)) / (qd * 0.01))))
+    print(f"[INFO] LIN: спланировано {planned} из 100, наибольшая скорость {worst:.3f} qd")
+    assert worst <= 1.0 + 1e-9, "LIN: скорости суставов превышают qd"
@@ -0,0 +1,196 @@
+import os
+import json
+import numpy as np
+
+from numpy.typing import ArrayLike
+
+from .fk import kinematics_of, model_hash, rpy_to_rot
+
+
+class ReachabilityMap:
+    """
+    Карта досягаемости TCP: воксельная сетка по позиции, в каждом вокселе —
+    битовая маска направлений оси подхода (ось z инструмента).
+
+    Строится офлайн по случайным конфигурациям (пакетная FK), хранится в .npy
+    и открывается через memory map; запрос к карте — O(1) индексация.
+    Вращение вокруг оси подхода не учитывается: его покрывает седьмой сустав.
+    """
+
+    def __init__(self,
+                 grid: np.ndarray,
+                 origin: ArrayLike,
+                 voxel: float,
+                 az_bins: int,
+                 el_bins: int,
+                 signature: str = ""):
+        """
+        :param grid: маски направлений (nx, ny, nz), uint32
+        :param origin: координата угла сетки (x, y, z) в системе базы
+        :param voxel: размер вокселя, м
+        :param az_bins: число секторов по азимуту оси подхода
+        :param el_bins: число поясов по z-компоненте оси подхода (равные площади)
+        :param signature: хэш модели, по которой построена карта
+        """
+        if az_bins * el_bins > 32:
+            raise ValueError("ReachabilityMap: az_bins * el_bins должно быть не больше 32")
+        self.grid = grid
+        self.origin = np.asarray(origin, dtype=float)
+        self.voxel = float(voxel)
+        self.az_bins = int(az_bins)
+        self.el_bins = int(el_bins)
+        self.signature = signature
+
+    # ------------- построение --------------
+    @classmethod
+    def build(cls,
+              robot,
+              voxel: float = 0.04,
+              samples: int = 2_000_000,
+              az_bins: int = 8,
+              el_bins: int = 4,
+              batch: int = 200_000,
+              seed: int = 0) -> "ReachabilityMap":
+        """
+        :param robot: модель робота (DHModel с qlim)
+        :param voxel: размер вокселя, м
+        :param samples: число случайных конфигураций
+        :param batch: размер пачки для FK
+        :param seed: зерно генератора (карта детерминирована)
+        """
+        kin = kinematics_of(robot)
+        qlim = np.asarray(robot.qlim, dtype=float)
+
+        # габарит рабочей зоны: сумма длин звеньев с инструментом вокруг базы
+        reach = np.sum(np.abs(kin.d)) + np.sum(np.abs(kin.a)) + np.linalg.norm(kin.tool[:3, 3])
+        origin = kin.base[:3, 3] - reach - voxel
+        shape = tuple(int(np.ceil(2 * (reach + voxel) / voxel)) + 1 for _ in range(3))
+        grid = np.zeros(shape, dtype=np.uint32)
+
+        rmap = cls(grid, origin, voxel, az_bins, el_bins, model_hash(robot))
+        rng = np.random.default_rng(seed)
+        for start in range(0, samples, batch):
+            n = min(batch, samples - start)
+            T = kin.fkine(rng.uniform(qlim[0], qlim[1], (n, kin.n)))
+            idx, inside = rmap._voxel_index(T[:, :3, 3])
+            bits = rmap._direction_bit(T[:, :3, 2])
+            np.bitwise_or.at(grid, tuple(idx[inside].T), bits[inside])
+
+        rmap._dilate()
+        return rmap
+
+    def _dilate(self):
+        """
+        Расширение на соседние воксели и соседние сектора азимута:
+        карта не должна отбрасывать досягаемые цели, попавшие между сэмплами.
+        """
+        src = self.grid.copy()
+        for axis in range(3):
+            for shift in (-1, 1):
+                self.grid |= np.roll(src, shift, axis=axis)
+
+        # циклический сдвиг азимута внутри каждого пояса
+        src = self.grid.copy()
+        n = self.az_bins
+        ring = np.uint32((1 << n) - 1)
+        for el in range(self.el_bins):
+            band = (src >> np.uint32(el * n)) & ring
+            left = ((band << np.uint32(1)) | (band >> np.uint32(n - 1))) & ring
+            right = ((band >> np.uint32(1)) | (band << np.uint32(n - 1))) & ring
+            self.grid |= (left | right) << np.uint32(el * n)
+
+    # ------------- индексация --------------
+    def _voxel_index(self, xyz: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        idx = np.floor((xyz - self.origin) / self.voxel).astype(np.int64)
+        inside = np.all((idx >= 0) & (idx < np.array(self.grid.shape)), axis=-1)
+        return idx, inside
+
+    def _direction_bit(self, z_axis: np.ndarray) -> np.ndarray:
+        az = np.arctan2(z_axis[..., 1], z_axis[..., 0])
+        az_i = np.minimum(((az + np.pi) / (2 * np.pi) * self.az_bins).astype(np.int64), self.az_bins - 1)
+        el_i = np.minimum(((z_axis[..., 2] + 1.0) * 0.5 * self.el_bins).astype(np.int64), self.el_bins - 1)
+        el_i = np.maximum(el_i, 0)
+        return (np.uint32(1) << (el_i * self.az_bins + az_i).astype(np.uint32)).astype(np.uint32)
+
+    # ------------- запросы --------------
+    def reachable_mask(self, xyz: ArrayLike, rpy: ArrayLike | None = None) -> np.ndarray:
+        """
+        :param xyz: позиции (M, 3)
+        :param rpy: ориентации (M, 3) order="xyz"; None — проверяется только позиция
+        :return: (M,) bool
+        """
+        xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+        idx, inside = self._voxel_index(xyz)
+        idx = np.where(inside[:, None], idx, 0)
+        cells = np.asarray(self.grid[idx[:, 0], idx[:, 1], idx[:, 2]])
+
+        if rpy is None:
+            return inside & (cells != 0)
+        z_axis = rpy_to_rot(np.asarray(rpy, dtype=float).reshape(-1, 3))[:, :, 2]
+        return inside & ((cells & self._direction_bit(z_axis)) != 0)
+
+    def is_reachable(self, xyz: ArrayLike, rpy: ArrayLike | None = None) -> bool:
+        return bool(self.reachable_mask(xyz, rpy)[0])
+
+    # ------------- хранение --------------
+    @staticmethod
+    def _meta_path(path: str) -> str:
+        return os.path.splitext(path)[0] + ".json"
+
+    def save(self, path: str):
+        np.save(path, np.ascontiguousarray(self.grid))
+        with open(self._meta_path(path), "w", encoding="utf-8") as f:
+            json.dump({"origin": self.origin.tolist(),
+                       "voxel": self.voxel,
+                       "az_bins": self.az_bins,
+                       "el_bins": self.el_bins,
+                       "signature": self.signature}, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "ReachabilityMap":
+        with open(cls._meta_path(path), encoding="utf-8") as f:
+            meta = json.load(f)
+        grid = np.load(path, mmap_mode="r")
+        return cls(grid, meta["origin"], meta["voxel"], meta["az_bins"], meta["el_bins"],
+                   meta.get("signature", ""))
+
+    @classmethod
+    def load_or_build(cls, robot, path: str | None = None, **build_kwargs) -> "ReachabilityMap":
+        """
+        Загружает карту из файла; если файла нет или он построен для другой модели — строит и сохраняет.
+
+        :param path: .npy карты; по умолчанию рядом с robot_models.py
+        """
+        if path is None:
+            path = os.path.join(os.path.dirname(__file__), f"{robot.name}_reachability.npy")
+
+        if os.path.exists(path) and os.path.exists(cls._meta_path(path)):
+            rmap = cls.load(path)
+            if rmap.signature == model_hash(robot):
+                return rmap
+            print(f"[INFO] Карта досягаемости '{path}' построена для другой модели — перестраиваю.")
+
+        print("[INFO] Строю карту досягаемости...")
+        rmap = cls.build(robot, **build_kwargs)
+        try:
+            rmap.save(path)
+        except OSError as e:
+            print(f"[WARN] Не удалось сохранить карту досягаемости '{path}': {e}")
+        return rmap
+
+
+if __name__ == "__main__":
+    import argparse
+    from .robot_models import LBRiiwaR800Model
+
+    parser = argparse.ArgumentParser(description="Построение карты досягаемости LBR iiwa")
+    parser.add_argument("--output", "-o", default=None, help="Путь к .npy (по умолчанию рядом с robot_models.py)")
+    parser.add_argument("--voxel", type=float, default=0.04, help="Размер вокселя, м")
+    parser.add_argument("--samples", type=int, default=2_000_000, help="Число случайных конфигураций")
+    args = parser.parse_args()
+
+    model = LBRiiwaR800Model()
+    out = args.output or os.path.join(os.path.dirname(__file__), f"{model.name}_reachability.npy")
+    rmap = ReachabilityMap.build(model, voxel=args.voxel, samples=args.samples)
+    rmap.save(out)
+    print(f"[INFO] Карта {rmap.grid.shape} сохранена в {out}")
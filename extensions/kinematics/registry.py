@@ -0,0 +1,382 @@
+import numpy as np
+import xml.etree.ElementTree as ET
+
+from pathlib import Path
+from typing import Any
+from numpy.typing import ArrayLike
+
+from .fk import DHKinematics, rpy_to_rot
+from .model import DHModel, RevoluteLink
+
+
+MODELS_DIR = Path(__file__).resolve().parent / "models"
+_SUFFIXES = (".yaml", ".yml", ".urdf")
+
+# параметры модели, которые хранятся массивами (остальные — как в файле)
+_ARRAYS = ("qd", "qdd", "qddd", "tau_max", "link_radii")
+_ANGULAR = ("qd", "qdd", "qddd")
+
+
+def available_models() -> list[str]:
+    """Имена моделей в каталоге models (без расширения)."""
+    return sorted(p.stem for p in MODELS_DIR.iterdir() if p.suffix in _SUFFIXES)
+
+
+def _resolve(source: str | Path) -> Path:
+    path = Path(source)
+    if path.suffix in _SUFFIXES and path.exists():
+        return path
+    for suffix in _SUFFIXES:
+        candidate = MODELS_DIR / f"{source}{suffix}"
+        if candidate.exists():
+            return candidate
+    raise FileNotFoundError(f"Модель '{source}' не найдена (доступны: {', '.join(available_models())})")
+
+
+def _angle(value: Any) -> Any:
+    """Радианы; строка "<число> deg" — градусы. Списки — поэлементно."""
+    if isinstance(value, (list, tuple)):
+        return [_angle(v) for v in value]
+    if isinstance(value, str):
+        number, _, unit = value.strip().partition(" ")
+        if unit.strip() != "deg":
+            raise ValueError(f"Угол '{value}': ожидается число (рад) или '<число> deg'")
+        return float(np.deg2rad(float(number)))
+    return float(value)
+
+
+def _transform(value: Any) -> np.ndarray | None:
+    """Поза 4x4 из {xyz, rpy} или вложенного списка 4x4."""
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        T = np.eye(4)
+        T[:3, :3] = rpy_to_rot(np.asarray(_angle(value.get("rpy", [0, 0, 0])), dtype=float))
+        T[:3, 3] = np.asarray(value.get("xyz", [0, 0, 0]), dtype=float)
+        return T
+    T = np.asarray(value, dtype=float)
+    if T.shape != (4, 4):
+        raise ValueError(f"Поза: ожидается {{xyz, rpy}} или матрица 4x4, получено {T.shape}")
+    return T
+
+
+# ------------- URDF --------------
+def _urdf_rot(rpy: ArrayLike) -> np.ndarray:
+    """Поворот URDF: R = Rz(yaw) @ Ry(pitch) @ Rx(roll)."""
+    r, p, y = np.asarray(rpy, dtype=float)
+    cr, sr, cp, sp, cy, sy = np.cos(r), np.sin(r), np.cos(p), np.sin(p), np.cos(y), np.sin(y)
+    return np.array([[cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+                     [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+                     [-sp, cp * sr, cp * cr]])
+
+
+def _origin(element: ET.Element | None) -> np.ndarray:
+    T = np.eye(4)
+    if element is not None:
+        T[:3, :3] = _urdf_rot([float(v) for v in element.get("rpy", "0 0 0").split()])
+        T[:3, 3] = [float(v) for v in element.get("xyz", "0 0 0").split()]
+    return T
+
+
+def _axis_rotation(axis: np.ndarray, angle: float) -> np.ndarray:
+    """Поворот вокруг единичной оси (формула Родрига), 4x4."""
+    K = np.array([[0, -axis[2], axis[1]], [axis[2], 0, -axis[0]], [-axis[1], axis[0], 0]])
+    T = np.eye(4)
+    T[:3, :3] = np.eye(3) + np.sin(angle) * K + (1 - np.cos(angle)) * K @ K
+    return T
+
+
+def _urdf_chain(root: ET.Element, base_link: str | None, tip_link: str | None) -> list[ET.Element]:
+    """Суставы от base_link до tip_link; по умолчанию — самая длинная цепь от корня дерева."""
+    joints = root.findall("joint")
+    by_child = {j.find("child").get("link"): j for j in joints}
+    children = {j.find("parent").get("link") for j in joints}
+    if tip_link is None:
+        leaves = [link for link in by_child if link not in children]
+
+        def movable(link):
+            count = 0
+            while link in by_child and link != base_link:
+                count += by_child[link].get("type") != "fixed"
+                link = by_child[link].find("parent").get("link")
+            return count
+        tip_link = max(leaves, key=movable)
+
+    chain = []
+    link = tip_link
+    while link in by_child and link != base_link:
+        joint = by_child[link]
+        chain.append(joint)
+        link = joint.find("parent").get("link")
+    if base_link is not None and link != base_link:
+        raise ValueError(f"URDF: звено '{tip_link}' не связано с '{base_link}'")
+    return chain[::-1]
+
+
+def _inertial(link: ET.Element | None) -> tuple[float, np.ndarray, np.ndarray]:
+    """Масса, центр масс и тензор инерции (в системе звена)."""
+    element = link.find("inertial") if link is not None else None
+    if element is None:
+        return 0.0, np.zeros(3), np.zeros((3, 3))
+    T = _origin(element.find("origin"))
+    mass = float(element.find("mass").get("value"))
+    i = {k: float(element.find("inertia").get(k, 0.0)) for k in ("ixx", "iyy", "izz", "ixy", "iyz", "ixz")}
+    I = np.array([[i["ixx"], i["ixy"], i["ixz"]],
+                  [i["ixy"], i["iyy"], i["iyz"]],
+                  [i["ixz"], i["iyz"], i["izz"]]])
+    return mass, T[:3, 3], T[:3, :3] @ I @ T[:3, :3].T
+
+
+def _common_normal(o_prev: np.ndarray, z_prev: np.ndarray, x_prev: np.ndarray,
+                   point: np.ndarray, z: np.ndarray, eps: float = 1e-9) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Начало и ось x системы DH, ось z которой — прямая (point, z), а предыдущая
+    система — (o_prev, z_prev, x_prev): общий перпендикуляр двух осей суставов.
+    """
+    n = np.cross(z_prev, z)
+    if np.linalg.norm(n) > eps:
+        # скрещивающиеся или пересекающиеся оси: ближайшие точки прямых
+        w = o_prev - point
+        b = z_prev @ z
+        denom = 1.0 - b * b
+        s = (b * (z @ w) - (z_prev @ w)) / denom
+        t = ((z @ w) - b * (z_prev @ w)) / denom
+        c_prev, c = o_prev + s * z_prev, point + t * z
+        if np.linalg.norm(c - c_prev) > eps:
+            x = (c - c_prev) / np.linalg.norm(c - c_prev)
+        else:
+            x = n / np.linalg.norm(n)
+            x = x if x @ x_prev >= 0 else -x
+        return c, x
+
+    # параллельные оси: перпендикуляр через point
+    c_prev = o_prev + ((point - o_prev) @ z_prev) * z_prev
+    if np.linalg.norm(point - c_prev) > eps:
+        return point, (point - c_prev) / np.linalg.norm(point - c_prev)
+    return point, x_prev
+
+
+def _frame(o: np.ndarray, x: np.ndarray, z: np.ndarray) -> np.ndarray:
+    T = np.eye(4)
+    T[:3, 0], T[:3, 1], T[:3, 2], T[:3, 3] = x, np.cross(z, x), z, o
+    return T
+
+
+def _urdf_fk(chain: list[ET.Element], q: np.ndarray) -> np.ndarray:
+    """Поза конечного звена цепи URDF в системе начального."""
+    T = np.eye(4)
+    i = 0
+    for joint in chain:
+        T = T @ _origin(joint.find("origin"))
+        if joint.get("type") != "fixed":
+            axis = joint.find("axis")
+            u = np.array([float(v) for v in (axis.get("xyz") if axis is not None else "1 0 0").split()])
+            T = T @ _axis_rotation(u / np.linalg.norm(u), q[i])
+            i += 1
+    return T
+
+
+def load_urdf(path: str | Path, base_link: str | None = None, tip_link: str | None = None) -> dict:
+    """
+    Параметры DHModel из URDF: последовательная цепь вращательных суставов приводится
+    к стандартной DH (оси суставов в нулевой конфигурации → общие перпендикуляры).
+    Неподвижные суставы внутри цепи сливаются со звеньями, за последним — уходят в tool.
+
+    Пределы (limit lower/upper) — qlim, velocity — qd, effort — tau_max; массы и
+    инерции звеньев пересчитываются в системы DH.
+
+    :param base_link: начальное звено цепи; None — корень дерева
+    :param tip_link: конечное звено (фланец); None — конец самой длинной цепи
+    :return: аргументы DHModel
+    """
+    root = ET.parse(path).getroot()
+    links = {link.get("name"): link for link in root.findall("link")}
+    chain = _urdf_chain(root, base_link, tip_link)
+    movable = [j for j in chain if j.get("type") != "fixed"]
+    for joint in movable:
+        if joint.get("type") not in ("revolute", "continuous"):
+            raise ValueError(f"URDF: сустав '{joint.get('name')}' типа {joint.get('type')} не поддерживается")
+    n = len(movable)
+    if n == 0:
+        raise ValueError(f"URDF '{path}': в цепи нет подвижных суставов")
+
+    # системы суставов в нулевой конфигурации и тела, жёстко связанные с каждым звеном
+    T = np.eye(4)
+    points, axes, link_frames = [], [], []
+    bodies: list[list[tuple[np.ndarray, ET.Element | None]]] = [[] for _ in range(n)]
+    k = -1
+    for joint in chain:
+        T = T @ _origin(joint.find("origin"))
+        if joint.get("type") != "fixed":
+            axis = joint.find("axis")
+            u = np.array([float(v) for v in (axis.get("xyz") if axis is not None else "1 0 0").split()])
+            points.append(T[:3, 3].copy())
+            axes.append(T[:3, :3] @ (u / np.linalg.norm(u)))
+            k += 1
+        if k >= 0:
+            bodies[k].append((T.copy(), links.get(joint.find("child").get("link"))))
+    T_tip = T
+
+    # системы DH: 0 — на оси первого сустава, ось x — проекция x корня
+    z0 = axes[0]
+    x0 = np.array([1.0, 0.0, 0.0]) - z0[0] * z0
+    if np.linalg.norm(x0) < 1e-6:
+        x0 = np.array([0.0, 1.0, 0.0]) - z0[1] * z0
+    frames = [_frame(points[0] - (points[0] @ z0) * z0, x0 / np.linalg.norm(x0), z0)]
+    for i in range(1, n):
+        o, x = _common_normal(frames[-1][:3, 3], frames[-1][:3, 2], frames[-1][:3, 0], points[i], axes[i])
+        frames.append(_frame(o, x, axes[i]))
+    # система n — на оси последнего сустава против фланца
+    o_prev, z_prev = frames[-1][:3, 3], frames[-1][:3, 2]
+    frames.append(_frame(o_prev + ((T_tip[:3, 3] - o_prev) @ z_prev) * z_prev, frames[-1][:3, 0], z_prev))
+
+    d, a, alpha, offset = np.zeros(n), np.zeros(n), np.zeros(n), np.zeros(n)
+    for i in range(n):
+        P, C = frames[i], frames[i + 1]
+        dv = C[:3, 3] - P[:3, 3]
+        d[i], a[i] = dv @ P[:3, 2], dv @ C[:3, 0]
+        offset[i] = np.arctan2(np.cross(P[:3, 0], C[:3, 0]) @ P[:3, 2], P[:3, 0] @ C[:3, 0])
+        alpha[i] = np.arctan2(np.cross(P[:3, 2], C[:3, 2]) @ C[:3, 0], P[:3, 2] @ C[:3, 2])
+    base = frames[0]
+    tool = np.linalg.inv(frames[-1]) @ T_tip
+
+    # проверка приведения: FK по DH совпадает с FK по URDF
+    kin = DHKinematics(d, a, alpha, offset, base, tool)
+    rng = np.random.default_rng(0)
+    for q in np.vstack([np.zeros(n), rng.uniform(-np.pi, np.pi, (4, n))]):
+        if not np.allclose(kin.fkine(q), _urdf_fk(chain, q), atol=1e-9):
+            raise ValueError(f"URDF '{path}': цепь не приводится к стандартной DH")
+
+    result_links = []
+    for i, joint in enumerate(movable):
+        limit = joint.find("limit")
+        qlim = None
+        if joint.get("type") == "revolute" and limit is not None:
+            qlim = [float(limit.get("lower", -np.pi)), float(limit.get("upper", np.pi))]
+
+        # тела звена в системе DH i + 1: суммарные масса, центр масс и инерция
+        inv = np.linalg.inv(frames[i + 1])
+        parts = []
+        for T_link, link in bodies[i]:
+            m, c, I = _inertial(link)
+            if m > 0:
+                T_dh = inv @ T_link
+                parts.append((m, T_dh[:3, :3] @ c + T_dh[:3, 3], T_dh[:3, :3] @ I @ T_dh[:3, :3].T))
+        m = sum(p[0] for p in parts)
+        r = sum(p[0] * p[1] for p in parts) / m if m > 0 else np.zeros(3)
+        I = np.zeros((3, 3))
+        for mk, ck, Ik in parts:
+            dc = ck - r
+            I += Ik + mk * ((dc @ dc) * np.eye(3) - np.outer(dc, dc))
+        result_links.append(RevoluteLink(d=d[i], a=a[i], alpha=alpha[i], offset=offset[i],
+                                         qlim=qlim, m=m, r=r, I=I))
+
+    spec: dict[str, Any] = {"links": result_links,
+                            "name": root.get("name", Path(path).stem),
+                            "base": base,
+                            "tool": tool,
+                            "joint_names": [j.get("name") for j in movable]}
+    limits = [j.find("limit") for j in movable]
+    for key, attr in (("qd", "velocity"), ("tau_max", "effort")):
+        values = [float(lim.get(attr, 0)) if lim is not None else 0.0 for lim in limits]
+        if all(v > 0 for v in values):
+            spec[key] = np.array(values)
+    return spec
+
+
+# ------------- YAML --------------
+def _links_from_yaml(entries: list[dict]) -> list[RevoluteLink]:
+    links = []
+    for entry in entries:
+        links.append(RevoluteLink(d=entry.get("d", 0.0),
+                                  a=entry.get("a", 0.0),
+                                  alpha=_angle(entry.get("alpha", 0.0)),
+                                  offset=_angle(entry.get("offset", 0.0)),
+                                  qlim=_angle(entry["qlim"]) if "qlim" in entry else None,
+                                  m=entry.get("m", 0.0),
+                                  r=entry.get("r"),
+                                  I=entry.get("I"),
+                                  G=entry.get("G", 1.0)))
+    return links
+
+
+def load_yaml(path: str | Path) -> dict:
+    """
+    Параметры DHModel из YAML: таблица DH (``links``) или ссылка на URDF (``urdf``,
+    ``base_link``, ``tip_link``), дополненные пределами, tool, конфигурациями и т.д.
+    Формат — models/lbr_iiwa7_r800.yaml.
+
+    :return: аргументы DHModel
+    """
+    import yaml
+
+    path = Path(path)
+    # C-загрузчик libyaml на порядок быстрее чистого Python — важно для старта контроллера
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.load(f, Loader=loader) or {}
+
+    if "urdf" in data:
+        spec = load_urdf(path.parent / data.pop("urdf"), data.pop("base_link", None), data.pop("tip_link", None))
+    elif "links" in data:
+        spec = {"links": _links_from_yaml(data.pop("links"))}
+    else:
+        raise ValueError(f"Модель '{path}': нужна таблица DH (links) или URDF (urdf)")
+
+    # base — поза робота в мире, tool — TCP относительно фланца: поверх заданных в URDF
+    base, tool = _transform(data.pop("base", None)), _transform(data.pop("tool", None))
+    if base is not None:
+        spec["base"] = base @ spec.get("base", np.eye(4))
+    if tool is not None:
+        spec["tool"] = spec.get("tool", np.eye(4)) @ tool
+
+    if "configurations" in data:
+        spec["configurations"] = {k: _angle(v) for k, v in data.pop("configurations").items()}
+    for key in _ARRAYS:
+        if key in data:
+            value = data.pop(key)
+            spec[key] = np.array(_angle(value) if key in _ANGULAR else value, dtype=float)
+    if "tool_capsules" in data:
+        spec["tool_capsules"] = [tuple(c) for c in data.pop("tool_capsules")]
+    if "collision_exclusions" in data:
+        spec["collision_exclusions"] = [tuple(p) for p in data.pop("collision_exclusions")]
+    spec.update(data)
+    return spec
+
+
+def load_spec(source: str | Path) -> dict:
+    """
+    Аргументы DHModel по имени модели из каталога models или пути к .yaml/.urdf.
+    """
+    path = _resolve(source)
+    return load_urdf(path) if path.suffix == ".urdf" else load_yaml(path)
+
+
+def load_model(source: str | Path) -> DHModel:
+    """
+    Модель по имени из каталога models (``load_model("lbr_iiwa7_r800")``) или пути к .yaml/.urdf.
+    FK/якобиан модели — сгенерированные под её таблицу DH ядра (kinematics_of), которые
+    кэшируются на диске по хэшу таблицы.
+    """
+    return DHModel(**load_spec(source))
+
+
+if __name__ == "__main__":
+    import argparse
+    from .fk import kinematics_of, model_hash
+
+    parser = argparse.ArgumentParser(description="Модели манипуляторов: таблица DH и ядро кинематики")
+    parser.add_argument("source", nargs="?", default=None, help="имя модели или путь к .yaml/.urdf")
+    args = parser.parse_args()
+
+    if args.source is None:
+        print("\n".join(available_models()))
+    else:
+        model = load_model(args.source)
+        print(f"{model.name} ({model.manufacturer or '—'}), суставов: {model.n}, хэш {model_hash(model)}")
+        print(f"{'сустав':<16}{'d':>10}{'a':>10}{'alpha°':>10}{'offset°':>10}{'qlim°':>18}")
+        for name, L in zip(model.joint_names, model.links):
+            print(f"{name:<16}{L.d:>10.4f}{L.a:>10.4f}{np.rad2deg(L.alpha):>10.2f}{np.rad2deg(L.offset):>10.2f}"
+                  f"{np.rad2deg(L.qlim[0]):>9.1f}{np.rad2deg(L.qlim[1]):>9.1f}")
+        print("tool:\n", np.round(model.tool, 6))
+        kinematics_of(model)
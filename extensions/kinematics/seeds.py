@@ -0,0 +1,159 @@
+import os
+import json
+import numpy as np
+
+from numpy.typing import ArrayLike
+
+from .fk import kinematics_of, model_hash, rpy_to_rot
+
+
+class IKSeedTable:
+    """
+    Таблица начальных приближений IK: случайные конфигурации рабочей зоны и их позы TCP.
+
+    Поза кодируется вектором [xyz, w·x_axis, w·z_axis] (9,), поиск ближайших —
+    KD-дерево по этим векторам. Таблица хранится в .npy (float32, memory map):
+    столбцы [0:n] — q, [n:n + 9] — признаки позы.
+    """
+
+    def __init__(self, data: np.ndarray, n: int, rot_weight: float, signature: str = ""):
+        """
+        :param data: таблица (N, n + 9)
+        :param n: число суставов
+        :param rot_weight: вес ориентации в метрике, м на единицу хордового расстояния осей
+        :param signature: хэш модели, по которой построена таблица
+        """
+        self.data = data
+        self.n = int(n)
+        self.rot_weight = float(rot_weight)
+        self.signature = signature
+        from scipy.spatial import cKDTree  # scipy нужен только с таблицей — не при старте контроллера
+
+        self._tree = cKDTree(np.asarray(data[:, self.n:], dtype=float))
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    @staticmethod
+    def _features(R: np.ndarray, xyz: np.ndarray, rot_weight: float) -> np.ndarray:
+        return np.concatenate([xyz, rot_weight * R[..., :, 0], rot_weight * R[..., :, 2]], axis=-1)
+
+    # ------------- построение --------------
+    @classmethod
+    def build(cls,
+              robot,
+              samples: int = 100_000,
+              margin: float = 0.1,
+              rot_weight: float = 0.2,
+              seed: int = 0) -> "IKSeedTable":
+        """
+        :param robot: модель робота (DHModel с qlim)
+        :param samples: число конфигураций в таблице
+        :param margin: доля диапазона сустава, отступаемая от каждого предела
+        :param rot_weight: вес ориентации в метрике поиска
+        :param seed: зерно генератора (таблица детерминирована)
+        """
+        kin = kinematics_of(robot)
+        qlim = np.asarray(robot.qlim, dtype=float)
+        pad = margin * (qlim[1] - qlim[0])
+
+        rng = np.random.default_rng(seed)
+        q = rng.uniform(qlim[0] + pad, qlim[1] - pad, (samples, kin.n))
+        T = kin.fkine(q)
+
+        data = np.empty((samples, kin.n + 9), dtype=np.float32)
+        data[:, :kin.n] = q
+        data[:, kin.n:] = cls._features(T[:, :3, :3], T[:, :3, 3], rot_weight)
+        return cls(data, kin.n, rot_weight, model_hash(robot))
+
+    # ------------- запросы --------------
+    def _target_features(self, xyz: ArrayLike, rpy: ArrayLike) -> np.ndarray:
+        return self._features(rpy_to_rot(rpy), np.asarray(xyz, dtype=float).reshape(3), self.rot_weight)
+
+    def nearest(self, xyz: ArrayLike, rpy: ArrayLike, k: int = 4) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :param xyz: целевая позиция (3,)
+        :param rpy: целевая ориентация (3,), order="xyz"
+        :param k: число приближений
+        :return: q (k, n) от ближайшей по позе к дальней и расстояния (k,)
+        """
+        dist, idx = self._tree.query(self._target_features(xyz, rpy), k=k)
+        idx = np.atleast_1d(idx)
+        return np.asarray(self.data[idx, :self.n], dtype=float), np.atleast_1d(dist)
+
+    def seeds(self, robot, q_current: ArrayLike, xyz: ArrayLike, rpy: ArrayLike, k: int = 4) -> np.ndarray:
+        """
+        Начальные приближения в порядке перебора: q_current и k ближайших из таблицы,
+        отсортированные по расстоянию их поз TCP до цели. Если текущая поза ближе
+        к цели, чем любая из таблицы (малый шаг), первым идёт q_current — решение не меняет ветвь.
+
+        :return: (k + 1, n)
+        """
+        q_current = np.asarray(q_current, dtype=float)
+        table, dist = self.nearest(xyz, rpy, k)
+
+        T = kinematics_of(robot).fkine(q_current)
+        f_current = self._features(T[:3, :3], T[:3, 3], self.rot_weight)
+        d_current = np.linalg.norm(f_current - self._target_features(xyz, rpy))
+
+        pos = int(np.searchsorted(dist, d_current))
+        return np.insert(table, pos, q_current, axis=0)
+
+    # ------------- хранение --------------
+    @staticmethod
+    def _meta_path(path: str) -> str:
+        return os.path.splitext(path)[0] + ".json"
+
+    def save(self, path: str):
+        np.save(path, np.ascontiguousarray(self.data))
+        with open(self._meta_path(path), "w", encoding="utf-8") as f:
+            json.dump({"n": self.n,
+                       "rot_weight": self.rot_weight,
+                       "signature": self.signature}, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "IKSeedTable":
+        with open(cls._meta_path(path), encoding="utf-8") as f:
+            meta = json.load(f)
+        data = np.load(path, mmap_mode="r")
+        return cls(data, meta["n"], meta["rot_weight"], meta.get("signature", ""))
+
+    @classmethod
+    def load_or_build(cls, robot, path: str | None = None, **build_kwargs) -> "IKSeedTable":
+        """
+        Загружает таблицу из файла; если файла нет или он построен для другой модели — строит и сохраняет.
+
+        :param path: .npy таблицы; по умолчанию рядом с robot_models.py
+        """
+        if path is None:
+            path = os.path.join(os.path.dirname(__file__), f"{robot.name}_ik_seeds.npy")
+
+        if os.path.exists(path) and os.path.exists(cls._meta_path(path)):
+            table = cls.load(path)
+            if table.signature == model_hash(robot):
+                return table
+            print(f"[INFO] Таблица приближений IK '{path}' построена для другой модели — перестраиваю.")
+
+        print("[INFO] Строю таблицу приближений IK...")
+        table = cls.build(robot, **build_kwargs)
+        try:
+            table.save(path)
+        except OSError as e:
+            print(f"[WARN] Не удалось сохранить таблицу приближений IK '{path}': {e}")
+        return table
+
+
+if __name__ == "__main__":
+    import argparse
+    from .robot_models import LBRiiwaR800Model
+
+    parser = argparse.ArgumentParser(description="Построение таблицы приближений IK для LBR iiwa")
+    parser.add_argument("--output", "-o", default=None, help="Путь к .npy (по умолчанию рядом с robot_models.py)")
+    parser.add_argument("--samples", type=int, default=100_000, help="Число конфигураций")
+    args = parser.parse_args()
+
+    model = LBRiiwaR800Model()
+    out = args.output or os.path.join(os.path.dirname(__file__), f"{model.name}_ik_seeds.npy")
+    table = IKSeedTable.build(model, samples=args.samples)
+    table.save(out)
+    print(f"[INFO] Таблица {table.data.shape} сохранена в {out}")
@@ -0,0 +1,152 @@
+import numpy as np
+
+from typing import Callable
+from numpy.typing import ArrayLike
+
+from .batch_ik import pose_error
+from .fk import kinematics_of, rpy_to_rot
+
+
+IKFunction = Callable[[ArrayLike, ArrayLike, ArrayLike], np.ndarray | None]
+
+
+class ResolvedRateServo:
+    """
+    Декартово слежение за целью со скоростью суставов по якобиану (resolved rate).
+
+    Каждый шаг dt по ошибке позы e и сдвигу цели за шаг d считается перемещение TCP
+    v dt = gain·dt·e + (1 - gain·dt)·d и шаг суставов dq = J⁺ v dt (затухающие
+    наименьшие квадраты — устойчиво у сингулярностей), плюс движение
+    в нуль-пространстве от пределов суставов. Шаг ограничивается скоростями
+    qd (весь вектор масштабируется, направление сохраняется). Цена шага постоянна:
+    одна FK с якобианом и решение системы 6x6.
+
+    Если цель отскочила дальше jump_pos / jump_rot, задача передаётся полной IK
+    (ik_solver), и робот идёт к её решению в пространстве суставов с тем же ограничением
+    скоростей; после этого слежение продолжается по якобиану.
+    """
+
+    def __init__(self,
+                 robot,
+                 dt: float,
+                 ik_solver: IKFunction | None = None,
+                 gain: float = 10.0,
+                 damping: float = 0.02,
+                 speed_scale: float = 1.0,
+                 limit_gain: float = 1.0,
+                 jump_pos: float = 0.05,
+                 jump_rot: float = 0.3,
+                 tol_pos: float = 1e-4,
+                 tol_rot: float = 1e-3,
+                 feedforward: bool = True):
+        """
+        :param robot: модель робота (DHModel с qlim и qd)
+        :param dt: шаг управления, с
+        :param ik_solver: полная IK вида ik_solver(q_current, xyz, rpy) -> q | None для больших
+                          скачков цели; None — скачки тоже отрабатываются по якобиану
+        :param gain: коэффициент усиления по ошибке позы, 1/с (постоянная времени 1/gain)
+        :param damping: коэффициент затухания λ псевдообратной J
+        :param speed_scale: доля предельных скоростей qd
+        :param limit_gain: усиление движения от пределов суставов в нуль-пространстве; 0 — без него
+        :param jump_pos: скачок позиции цели, м, после которого решается полная IK
+        :param jump_rot: скачок ориентации цели, рад, после которого решается полная IK
+        :param tol_pos: допуск позиции, м — в его пределах команда не меняется
+        :param tol_rot: допуск ориентации, рад
+        :param feedforward: добавлять скорость цели — без неё движущаяся цель отстаёт на v / gain
+        """
+        self._kin = kinematics_of(robot)
+        self._qlim = np.asarray(robot.qlim, dtype=float)
+        self._dq_max = np.asarray(robot.qd, dtype=float) * float(speed_scale) * float(dt)
+        self._ik_solver = ik_solver
+        self._gain = float(gain)
+        self._lam2 = float(damping) ** 2 * np.eye(6)
+        self._limit_gain = float(limit_gain)
+        self._q_mid = 0.5 * (self._qlim[0] + self._qlim[1])
+        self._q_w = 1.0 / (self._qlim[1] - self._qlim[0]) ** 2
+        self._jump = (float(jump_pos), float(jump_rot))
+        self._tol = (float(tol_pos), float(tol_rot))
+        self._feedforward = feedforward
+        self.dt = float(dt)
+
+        self.q: np.ndarray | None = None
+        self._q_goal: np.ndarray | None = None
+        self._failed: np.ndarray | None = None
+        self._T_prev: np.ndarray | None = None
+
+    @property
+    def mode(self) -> str:
+        """"servo" — слежение по якобиану, "ik" — переезд к решению полной IK, "idle" — нет команды."""
+        if self.q is None:
+            return "idle"
+        return "ik" if self._q_goal is not None else "servo"
+
+    def reset(self, q: ArrayLike | None = None):
+        """Сбрасывает заданную конфигурацию (None — возьмётся из измеренной на следующем шаге)."""
+        self.q = None if q is None else np.array(q, dtype=float)
+        self._q_goal = None
+        self._failed = None
+        self._T_prev = None
+
+    def _limit_step(self, dq: np.ndarray) -> np.ndarray:
+        ratio = np.max(np.abs(dq) / self._dq_max)
+        return dq / ratio if ratio > 1.0 else dq
+
+    def _approach(self) -> np.ndarray:
+        """Шаг к решению полной IK в пространстве суставов."""
+        diff = self._q_goal - self.q
+        self.q = self.q + self._limit_step(diff)
+        if np.all(np.abs(self._q_goal - self.q) < 1e-9):
+            self._q_goal = None
+        return self.q
+
+    def step(self, q_current: ArrayLike, xyz: ArrayLike, rpy: ArrayLike) -> np.ndarray:
+        """
+        :param q_current: измеренные углы суставов (n,) — начальная команда после reset
+        :param xyz: позиция цели TCP
+        :param rpy: ориентация цели TCP (порядок "xyz", как в solve_ik)
+        :return: заданные углы суставов на этот шаг (n,)
+        """
+        if self.q is None:
+            self.reset(q_current)
+        T_goal = np.eye(4)
+        T_goal[:3, :3] = rpy_to_rot(np.asarray(rpy, dtype=float))
+        T_goal[:3, 3] = np.asarray(xyz, dtype=float)
+        T_prev, self._T_prev = self._T_prev, T_goal
+        if self._q_goal is not None:
+            return self._approach()
+
+        T, J = self._kin.fkine_jacob0(self.q[None])
+        J, e = J[0], pose_error(T, T_goal[None])[0]
+        e_pos, e_rot = np.linalg.norm(e[:3]), np.linalg.norm(e[3:])
+        if self._ik_solver is not None and (e_pos > self._jump[0] or e_rot > self._jump[1]):
+            # нерешаемая цель не решается заново, пока гизмо не сдвинут
+            if self._failed is not None and np.allclose(self._failed, T_goal):
+                return self.q
+            q_goal = self._ik_solver(self.q, xyz, rpy)
+            if q_goal is None:
+                print(f"[IK WARNING] IK не решена для: {xyz}, {rpy}")
+                self._failed = T_goal
+                return self.q
+            self._failed = None
+            self._q_goal = np.asarray(q_goal, dtype=float)
+            return self._approach()
+
+        # e уже включает сдвиг цели за шаг d: шаг k·e + (1 - k)·d (k = gain·dt) гасит
+        # ошибку, оставшуюся с прошлого шага, в (1 - k) раз, а d отрабатывает целиком
+        k = min(1.0, self._gain * self.dt)
+        d = np.zeros(6)
+        if self._feedforward and T_prev is not None:
+            d = pose_error(T_prev[None], T_goal[None])[0]
+        if e_pos < self._tol[0] and e_rot < self._tol[1] and not np.any(d):
+            return self.q
+        v_dt = k * e + (1.0 - k) * d
+
+        # J⁺ v dt + (I - J⁺J) z: z — спуск от пределов суставов
+        J_pinv = J.T @ np.linalg.solve(J @ J.T + self._lam2, np.eye(6))
+        dq = J_pinv @ v_dt
+        if self._limit_gain > 0:
+            z = -self._limit_gain * self.dt * 2.0 * (self.q - self._q_mid) * self._q_w
+            dq += z - J_pinv @ (J @ z)
+
+        self.q = np.clip(self.q + self._limit_step(dq), self._qlim[0], self._qlim[1])
+        return self.q
@@ -0,0 +1,135 @@
+import numpy as np
+
+from numpy.typing import ArrayLike
+
+from .trajectory import Trajectory
+
+
+def _rdp(q: np.ndarray, first: int, last: int, tolerance: float, keep: np.ndarray, timed: bool = False):
+    """
+    Рамер — Дуглас — Пекер на отрезке [first, last]: отмечает в keep нужные отсчёты.
+    timed — отклонение считается от линейной интерполяции по времени (отсчёты равномерны),
+    а не от ближайшей точки хорды.
+    """
+    stack = [(first, last)]
+    while stack:
+        i, j = stack.pop()
+        if j - i < 2:
+            continue
+        chord = q[j] - q[i]
+        rel = q[i + 1:j] - q[i]
+        length2 = float(chord @ chord)
+        if timed:
+            rel = rel - (np.arange(1, j - i) / (j - i))[:, None] * chord
+        elif length2 > 1e-24:
+            t = np.clip(rel @ chord / length2, 0.0, 1.0)
+            rel = rel - t[:, None] * chord
+        dist = np.linalg.norm(rel, axis=1)
+        k = int(np.argmax(dist))
+        if dist[k] > tolerance:
+            k += i + 1
+            keep[k] = True
+            stack.append((i, k))
+            stack.append((k, j))
+
+
+def simplify_indices(q: ArrayLike,
+                     tolerance: float = 0.01,
+                     max_step: float | None = 0.15,
+                     keep: ArrayLike | None = None,
+                     timed: bool = False) -> np.ndarray:
+    """
+    Отсчёты траектории, которые нужно оставить: ломаная по ним отклоняется от исходной
+    не больше чем на tolerance (евклидово расстояние в суставах, рад). На прямых участках
+    остаются редкие точки, на изгибах — частые; шаг между соседними точками
+    ограничивается max_step (по наибольшему суставу).
+
+    :param q: траектория (N, n)
+    :param tolerance: допуск отклонения, рад
+    :param max_step: наибольшее изменение сустава между оставленными точками, рад; None — без ограничения
+    :param keep: (N,) bool — отсчёты, которые нужно сохранить в любом случае (события)
+    :param timed: оставленные отсчёты будут исполняться по своим моментам времени с линейной
+                  интерполяцией между ними — допуск относится к положению в каждый момент,
+                  выдержки отдельно не сохраняются
+    :return: индексы оставленных отсчётов по возрастанию
+    """
+    q = np.asarray(q, dtype=float)
+    N = q.shape[0]
+    fixed = np.zeros(N, dtype=bool) if keep is None else np.asarray(keep, dtype=bool).copy()
+    if N <= 2:
+        return np.arange(N)
+    fixed[[0, -1]] = True
+
+    # выдержки (повторённые отсчёты) сохраняются целиком — это время на хват
+    if not timed:
+        still = np.all(q[1:] == q[:-1], axis=1)
+        fixed[1:] |= still
+        fixed[:-1] |= still
+
+    kept = fixed.copy()
+    anchors = np.flatnonzero(fixed)
+    for i, j in zip(anchors[:-1], anchors[1:]):
+        _rdp(q, i, j, tolerance, kept, timed)
+
+    index = np.flatnonzero(kept)
+    if max_step is None:
+        return index
+
+    # длинные участки делятся по исходным отсчётам: от точки — к самому дальнему отсчёту в пределах max_step
+    step = np.max(np.abs(np.diff(q[index], axis=0)), axis=1)
+    extra = []
+    for s in np.flatnonzero(step > max_step):
+        i, j = index[s], index[s + 1]
+        while j - i > 1 and np.max(np.abs(q[j] - q[i])) > max_step:
+            far = np.max(np.abs(q[i + 1:j] - q[i]), axis=1) > max_step
+            i += max(1, int(np.argmax(far)) if np.any(far) else far.size)
+            extra.append(i)
+    return np.unique(np.concatenate([index, extra])).astype(int) if extra else index
+
+
+class TrajectorySimplifier:
+    """
+    Прореживание траектории перед исполнением. Супервизор отправляет роботу отсчёты
+    по одному и ждёт достижения каждого (MotionTracker), так что лишний отсчёт на прямом
+    участке стоит целого шага симуляции. Оставляются отсчёты, нужные для формы пути
+    (simplify_indices), все события и выдержки.
+    """
+
+    def __init__(self, tolerance: float = 0.01, max_step: float | None = 0.15, dt: float = 0.01):
+        """
+        :param tolerance: допуск отклонения от исходного пути, рад
+        :param max_step: наибольшее изменение сустава между отсчётами, рад
+        :param dt: шаг исходной траектории, с (для оценки сэкономленного времени)
+        """
+        self.tolerance = float(tolerance)
+        self.max_step = max_step
+        self.dt = float(dt)
+        self.samples_in = 0
+        self.samples_out = 0
+
+    @property
+    def removed(self) -> int:
+        return self.samples_in - self.samples_out
+
+    @property
+    def saved_time(self) -> float:
+        """Оценка сэкономленного времени исполнения: шаг симуляции на каждый удалённый отсчёт, с."""
+        return self.removed * self.dt
+
+    def __call__(self, trajectory: Trajectory) -> Trajectory:
+        keep = np.zeros(len(trajectory), dtype=bool)
+        events = trajectory.event_table()
+        keep[list(events)] = True
+        index = simplify_indices(trajectory.q, self.tolerance, self.max_step, keep)
+
+        position = np.searchsorted(index, list(events))
+        out = Trajectory.from_array(trajectory.q[index],
+                                    {int(p): kinds for p, kinds in zip(position, events.values())})
+        self.samples_in += len(trajectory)
+        self.samples_out += len(out)
+        return out
+
+    def summary(self) -> str:
+        share = 100.0 * self.removed / max(1, self.samples_in)
+        return (f"удалено {self.removed} из {self.samples_in} отсчётов ({share:.0f}%), "
+                f"экономия исполнения ≈ {self.saved_time:.1f} с")
@@ -1,19 +1,31 @@
 import numpy as np
-import roboticstoolbox as rtb
 
 from typing import Sequence
-from spatialmath import SE3
 from numpy.typing import ArrayLike
 
+from .fk import kinematics_of, rpy_to_rot
+from .model import DHModel
+from .seeds import IKSeedTable
+from ..core.ik import BaseIKSolver
 
-def solve_ik(robot: rtb.DHRobot,
+
+def solve_ik(robot: DHModel,
              q_current: Sequence,
              target_position: ArrayLike,
-             target_orientation_rpy: ArrayLike
+             target_orientation_rpy: ArrayLike,
+             seed_table: IKSeedTable | None = None
             ):
-    
-    T_target = SE3(target_position) * SE3.RPY(target_orientation_rpy, order='xyz')
-    sol = robot.ikine_LM(T_target, q0=q_current)
+    """
+    :param seed_table: таблица приближений — ikine_LM перебирает ближайшие к цели
+                       конфигурации из неё (вместе с q_current) до случайных перезапусков
+    """
+    T_target = np.eye(4)
+    T_target[:3, :3] = rpy_to_rot(target_orientation_rpy)
+    T_target[:3, 3] = target_position
+    q0 = q_current
+    if seed_table is not None:
+        q0 = seed_table.seeds(robot, q_current, target_position, target_orientation_rpy)
+    sol = robot.ikine_LM(T_target, q0=q0)
     
     if sol.success:
         return sol.q
@@ -22,8 +34,227 @@ def solve_ik(robot: rtb.DHRobot,
     return None
 
 
-def solve_pzk(model: rtb.DHRobot,
+def solve_pzk(model: DHModel,
               q: ArrayLike):
-    
-    T = model.fkine(q)
-    return T.t, T.rpy(order="xyz")
+    """
+    Прямая кинематика: q (7,) -> (xyz, rpy) или пачка q (N, 7) -> (N, 3), (N, 3).
+    """
+    return kinematics_of(model).fkine_xyzrpy(q)
+
+
+
+def _rz(theta: np.ndarray) -> np.ndarray:
+    c, s = np.cos(theta), np.sin(theta)
+    R = np.zeros(np.shape(theta) + (3, 3))
+    R[..., 0, 0], R[..., 0, 1] = c, -s
+    R[..., 1, 0], R[..., 1, 1] = s, c
+    R[..., 2, 2] = 1.0
+    return R
+
+
+def _ry(theta: np.ndarray) -> np.ndarray:
+    c, s = np.cos(theta), np.sin(theta)
+    R = np.zeros(np.shape(theta) + (3, 3))
+    R[..., 0, 0], R[..., 0, 2] = c, s
+    R[..., 2, 0], R[..., 2, 2] = -s, c
+    R[..., 1, 1] = 1.0
+    return R
+
+
+# Rx(+π/2) и Rx(-π/2)
+_RX_P = np.array([[1.0, 0.0, 0.0], [0.0, 0.0, -1.0], [0.0, 1.0, 0.0]])
+_RX_N = _RX_P.T
+_SRS_ALPHA = np.array([-1, 1, 1, -1, -1, 1, 0]) * np.pi / 2
+
+
+def _zyz_branches(M: np.ndarray, sign: np.ndarray, near: np.ndarray) -> np.ndarray:
+    """
+    Углы (a, b, c) для M = Rz(a) Ry(b) Rz(c); sign задаёт ветвь знака b.
+    При sin(b) ≈ 0 углы a и c не разделимы — a берётся из ``near``.
+    """
+    b = sign * np.arccos(np.clip(M[..., 2, 2], -1.0, 1.0))
+    a = np.arctan2(sign * M[..., 1, 2], sign * M[..., 0, 2])
+    c = np.arctan2(sign * M[..., 2, 1], -sign * M[..., 2, 0])
+
+    degenerate = np.abs(np.sin(b)) < 1e-9
+    if np.any(degenerate):
+        # b = 0: M = Rz(a + c); b = π: M = Rz(a - c) Ry(π)
+        total = np.arctan2(M[..., 1, 0], M[..., 0, 0])
+        a = np.where(degenerate, near, a)
+        c = np.where(degenerate,
+                     np.where(M[..., 2, 2] > 0, total - a, a - total),
+                     c)
+    return np.stack([a, b, c], axis=-1)
+
+
+class AnalyticIKSolver(BaseIKSolver):
+    """
+    Аналитическая IK для 7-осевого манипулятора со схемой SRS (LBR iiwa).
+
+    Избыточность параметризуется углом локтя ψ — поворотом плоскости
+    плечо–локоть–запястье вокруг оси плечо–запястье. Для заданного ψ
+    существует до 8 ветвей (знаки q2, q4, q6); solve отбрасывает ветви
+    вне qlim и возвращает ближайшую к q_current.
+    """
+
+    def __init__(self,
+                 robot: DHModel,
+                 psi: float | None = None,
+                 psi_samples: int = 72):
+        """
+        :param robot: модель робота со SRS-таблицей DH (a = 0, чётные d = 0)
+        :param psi: фиксированный угол локтя; None — угол локтя текущей конфигурации
+        :param psi_samples: шагов сетки по ψ, если при исходном ψ нет решения в пределах
+        """
+        kin = kinematics_of(robot)
+        if (kin.n != 7 or np.any(np.abs(kin.a) > 1e-12)
+                or np.any(np.abs(kin.d[1::2]) > 1e-12)
+                or np.any(np.abs(kin.alpha - _SRS_ALPHA) > 1e-9)):
+            raise ValueError("AnalyticIKSolver: таблица DH не соответствует схеме SRS")
+
+        self._kin = kin
+        self._qlim = np.asarray(robot.qlim, dtype=float)
+        self._psi = psi
+        self._psi_grid = np.linspace(-np.pi, np.pi, int(psi_samples), endpoint=False)
+
+        self._d_bs, self._d_se, self._d_ew, self._d_wf = kin.d[0], kin.d[2], kin.d[4], kin.d[6]
+        self._base_inv = np.linalg.inv(kin.base)
+        self._tool_inv = np.linalg.inv(kin.tool)
+
+        # сочетания ветвей: знаки q4, q2, q6
+        signs = np.array(np.meshgrid([1.0, -1.0], [1.0, -1.0], [1.0, -1.0], indexing="ij"))
+        self._sign4, self._sign2, self._sign6 = signs.reshape(3, -1)
+
+    @property
+    def signature(self) -> str:
+        return f"{type(self).__name__}/{self._psi}/{len(self._psi_grid)}"
+
+    def _flange_pose(self, xyz: ArrayLike, rpy: ArrayLike) -> np.ndarray:
+        T = np.eye(4)
+        T[:3, :3] = rpy_to_rot(np.asarray(rpy, dtype=float))
+        T[:3, 3] = np.asarray(xyz, dtype=float)
+        return self._base_inv @ T @ self._tool_inv
+
+    def _reference(self, x_sw: np.ndarray, q4: np.ndarray) -> np.ndarray:
+        """R_03 опорной конфигурации (q3 = 0) для заданных вектора плечо–запястье и q4."""
+        A = self._d_se + self._d_ew * np.cos(q4)
+        B = self._d_ew * np.sin(q4)
+        r = np.hypot(x_sw[0], x_sw[1])
+        q1 = np.arctan2(x_sw[1], x_sw[0]) if r > 1e-9 else 0.0
+        q2 = np.arctan2(r, x_sw[2]) + np.arctan2(B, A)
+        return _rz(np.full_like(q4, q1)) @ _ry(q2) @ _RX_P
+
+    def _shoulder_wrist(self, T07: np.ndarray) -> np.ndarray:
+        p_w = T07[:3, 3] - self._d_wf * T07[:3, 2]
+        return p_w - np.array([0.0, 0.0, self._d_bs])
+
+    def solutions(self,
+                  xyz_target: ArrayLike,
+                  rpy_target: ArrayLike,
+                  psi: ArrayLike = 0.0,
+                  q_near: ArrayLike | None = None) -> np.ndarray:
+        """
+        Все аналитические ветви без учёта пределов суставов.
+
+        :param psi: угол локтя (скаляр или массив (P,))
+        :param q_near: конфигурация, из которой берутся q1/q5 в вырожденных положениях (q2/q6 = 0)
+        :return: (P * 8, 7); пустой массив, если запястье вне досягаемости
+        """
+        T07 = self._flange_pose(xyz_target, rpy_target)
+        x_sw = self._shoulder_wrist(T07)
+        L = np.linalg.norm(x_sw)
+
+        c4 = (L ** 2 - self._d_se ** 2 - self._d_ew ** 2) / (2 * self._d_se * self._d_ew)
+        if abs(c4) > 1.0 or L < 1e-9:
+            return np.zeros((0, 7))
+
+        psi = np.atleast_1d(np.asarray(psi, dtype=float))[:, None, None, None]
+        q4 = self._sign4 * np.arccos(c4)                                   # (8,)
+        R03_ref = self._reference(x_sw, q4)                                # (8, 3, 3)
+
+        u = x_sw / L
+        U = np.array([[0.0, -u[2], u[1]], [u[2], 0.0, -u[0]], [-u[1], u[0], 0.0]])
+        R_psi = (np.eye(3) + np.sin(psi) * U
+                 + (1.0 - np.cos(psi)) * (U @ U))                          # (P, 1, 3, 3)
+        R03 = R_psi @ R03_ref                                              # (P, 8, 3, 3)
+
+        near = np.zeros(7) if q_near is None else np.asarray(q_near, dtype=float) + self._kin.offset
+        q123 = _zyz_branches(R03 @ _RX_N, self._sign2, near[0])
+
+        R04 = R03 @ _rz(q4) @ _RX_N
+        R47 = np.swapaxes(R04, -1, -2) @ T07[:3, :3]
+        q567 = _zyz_branches(R47, self._sign6, near[4])
+
+        q = np.concatenate([q123, np.broadcast_to(q4[:, None], q123.shape[:-1] + (1,)), q567], axis=-1)
+        q = q.reshape(-1, 7) - self._kin.offset
+        return (q + np.pi) % (2 * np.pi) - np.pi
+
+    def arm_angle(self, q: ArrayLike) -> float:
+        """Угол локтя ψ конфигурации q относительно опорной плоскости (q3 = 0)."""
+        q = np.asarray(q, dtype=float) + self._kin.offset
+        R02 = _rz(q[0]) @ _ry(q[1])
+        R04 = R02 @ _rz(q[2]) @ _ry(-q[3])
+
+        e_cur = R02[:, 2]
+        x_sw = self._d_se * e_cur + self._d_ew * R04[:, 2]
+        u = x_sw / np.linalg.norm(x_sw)
+        e_ref = self._reference(x_sw, np.array([q[3]]))[0, :, 1]
+
+        a = e_ref - u * (u @ e_ref)
+        b = e_cur - u * (u @ e_cur)
+        return float(np.arctan2(u @ np.cross(a, b), a @ b))
+
+    def _within_limits(self, q: np.ndarray) -> np.ndarray:
+        return np.all((q >= self._qlim[0]) & (q <= self._qlim[1]), axis=-1)
+
+    def solve(self,
+              q_current: ArrayLike,
+              xyz_target: ArrayLike,
+              rpy_target: ArrayLike):
+        """
+        :return: ближайшее к q_current решение в пределах qlim или None
+        """
+        q_current = np.asarray(q_current, dtype=float)
+        psi = self._psi if self._psi is not None else self.arm_angle(q_current)
+
+        q = self.solutions(xyz_target, rpy_target, psi, q_current)
+        q = q[self._within_limits(q)]
+        if q.shape[0] == 0:
+            # при этом ψ все ветви вне пределов — перебираем ψ по сетке
+            q = self.solutions(xyz_target, rpy_target, psi + self._psi_grid, q_current)
+            q = q[self._within_limits(q)]
+            if q.shape[0] == 0:
+                return None
+
+        return q[np.argmin(np.linalg.norm(q - q_current, axis=1))]
+
+
+if __name__ == "__main__":
+    import argparse
+    from .robot_models import LBRiiwaR800Model
+
+    parser = argparse.ArgumentParser(description="Проверка AnalyticIKSolver: FK решений на случайных позах")
+    parser.add_argument("--samples", type=int, default=300, help="Число случайных поз")
+    args = parser.parse_args()
+
+    model = LBRiiwaR800Model()
+    kin = kinematics_of(model)
+    solver = AnalyticIKSolver(model)
+    rng = np.random.default_rng(0)
+    q_ref = np.asarray(model.qr, dtype=float)
+
+    # поза, для которой при ψ из qr все ветви вне пределов — решается только перебором ψ по сетке
+    targets = [([0.5, 0.0, 0.5], [np.pi, 0.0, 0.0])]
+    targets += list(zip(*kin.fkine_xyzrpy(rng.uniform(model.qlim[0], model.qlim[1], (args.samples, model.n)))))
+
+    worst, unsolved = 0.0, 0
+    for xyz, rpy in targets:
+        q = solver.solve(q_ref, xyz, rpy)
+        if q is None:
+            unsolved += 1
+            continue
+        T_goal = np.eye(4)
+        T_goal[:3, :3], T_goal[:3, 3] = rpy_to_rot(rpy), xyz
+        worst = max(worst, float(np.max(np.abs(kin.fkine(q) - T_goal))))
+    print(f"[INFO] Поз: {len(targets)}, без решения: {unsolved}, наибольшая ошибка FK: {worst:.2e}")
+    assert worst < 1e-9, "AnalyticIKSolver: решение не воспроизводит целевую позу"
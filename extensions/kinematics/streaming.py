@@ -0,0 +1,139 @@
+import queue
+import threading
+
+from typing import Any, Callable, Iterable, NamedTuple
+
+from .trajectory import Trajectory
+
+
+class PlanFailure(NamedTuple):
+    """Участок программы, который не удалось спланировать."""
+    message: str
+    command: Any = None
+
+
+_END = object()
+
+
+class StreamingPlanner:
+    """
+    Конвейерное планирование: программа планируется в фоновом потоке по участкам,
+    а основной цикл исполняет уже готовые участки, не дожидаясь конца планирования.
+
+    Источник — итерируемый объект (обычно генератор), выдающий ``Trajectory``
+    (участок программы с событиями) или ``PlanFailure``. Очередь между потоками
+    ограничена: планировщик уходит вперёд не более чем на ``max_ahead`` участков
+    и ждёт, пока исполнение их заберёт.
+
+    Участки забираются в основном потоке вызовом ``poll()`` и дописываются
+    в общую траекторию; неудача планирования отмечается событием ``plan_failed``
+    на последнем готовом отсчёте (с него робот перейдёт к следующему участку).
+    """
+
+    def __init__(self,
+                 segments: Iterable,
+                 trajectory: Trajectory,
+                 max_ahead: int = 4,
+                 on_complete: Callable[[], None] | None = None):
+        """
+        :param segments: источник участков (Trajectory | PlanFailure)
+        :param trajectory: траектория, в которую дописываются готовые участки
+        :param max_ahead: размер очереди готовых, но не забранных участков
+        :param on_complete: вызывается в основном потоке, когда забран последний участок
+        """
+        self.trajectory = trajectory
+        self.failures: list[tuple[int, PlanFailure]] = []
+        self.stalled = 0
+
+        self._segments = segments
+        self._queue = queue.Queue(maxsize=max(1, int(max_ahead)))
+        self._on_complete = on_complete
+        self._stop = threading.Event()
+        self._finished = False
+        self._thread = threading.Thread(target=self._run, name="StreamingPlanner", daemon=True)
+
+    # ------------- фоновый поток --------------
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        try:
+            for item in self._segments:
+                if not self._put(item):
+                    return
+        except Exception as e:
+            self._put(PlanFailure(f"Планирование прервано: {e!r}"))
+        finally:
+            self._put(_END)
+
+    # ------------- основной поток --------------
+    def start(self) -> "StreamingPlanner":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Останавливает фоновый поток (текущий участок дорабатывается до конца)."""
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+    @property
+    def done(self) -> bool:
+        """Вся программа спланирована и забрана в траекторию."""
+        return self._finished
+
+    def poll(self, timeout: float | None = 0.0) -> int:
+        """
+        Забирает готовые участки из очереди.
+
+        :param timeout: ожидание первого участка, с; 0 — не ждать, None — ждать без ограничения
+        :return: число добавленных отсчётов
+        """
+        added = 0
+        block = timeout is None or timeout > 0
+        while not self._finished:
+            try:
+                item = self._queue.get(block=block, timeout=timeout if block else None)
+            except queue.Empty:
+                break
+            block = False
+
+            if item is _END:
+                self._finished = True
+                if self._on_complete is not None:
+                    self._on_complete()
+            elif isinstance(item, PlanFailure):
+                self._fail(item)
+            else:
+                self.trajectory.extend(item)
+                added += len(item)
+        return added
+
+    def _fail(self, failure: PlanFailure):
+        index = len(self.trajectory)
+        self.failures.append((index, failure))
+        print(f"[WARN] {failure.message}")
+        if index > 0:
+            self.trajectory.add_event(index - 1, "plan_failed", failure.message)
+
+    def ready(self, index: int) -> bool:
+        """
+        Есть ли отсчёт index для исполнения. Если исполнение догнало планирование,
+        робот стоит в последней точке, а шаг учитывается в ``stalled``.
+        """
+        if index < len(self.trajectory):
+            return True
+        if not self._finished:
+            self.stalled += 1
+        return False
+
+    def wait(self) -> Trajectory:
+        """Дожидается конца планирования (для офлайн-использования) и возвращает траекторию."""
+        while not self._finished:
+            self.poll(timeout=None)
+        return self.trajectory
@@ -0,0 +1,253 @@
+import numpy as np
+
+from numpy.typing import ArrayLike
+
+
+def _accel_phase(v: float, a_max: float, j_max: float) -> tuple[float, float, float]:
+    """
+    Фаза разгона 0 → v: длительность участков с постоянным рывком t_j,
+    с постоянным ускорением t_a и пройденный путь.
+    """
+    if not np.isfinite(j_max):
+        t_j, t_a = 0.0, v / a_max
+    elif v * j_max > a_max * a_max:
+        t_j, t_a = a_max / j_max, v / a_max - a_max / j_max
+    else:
+        t_j, t_a = np.sqrt(v / j_max), 0.0
+    return t_j, t_a, v * (t_j + 0.5 * t_a)
+
+
+def scurve(distance: float,
+           v_max: float,
+           a_max: float,
+           j_max: float = np.inf,
+           dt: float = 0.01) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Быстрейший профиль «покой → покой» на отрезке длины ``distance`` при ограничениях
+    скорости, ускорения и рывка (7 участков с кусочно-постоянным рывком;
+    при j_max = inf — трапеция).
+
+    :return: s, ṡ, s̈ в моменты 0, dt, 2dt, …, T (последний отсчёт ровно в T)
+    """
+    if distance <= 0.0:
+        z = np.zeros(2)
+        return z, z.copy(), z.copy()
+
+    # пиковая скорость: v_max, если путь позволяет разогнаться и затормозить, иначе — бисекция
+    v = v_max
+    if 2.0 * _accel_phase(v, a_max, j_max)[2] > distance:
+        lo, hi = 0.0, v_max
+        for _ in range(60):
+            v = 0.5 * (lo + hi)
+            if 2.0 * _accel_phase(v, a_max, j_max)[2] > distance:
+                hi = v
+            else:
+                lo = v
+        v = lo
+    t_j, t_a, d_acc = _accel_phase(v, a_max, j_max)
+    t_v = (distance - 2.0 * d_acc) / v
+    durations = np.array([t_j, t_a, t_j, t_v, t_j, t_a, t_j])
+    if t_j > 0:
+        jerks = np.array([1.0, 0.0, -1.0, 0.0, -1.0, 0.0, 1.0]) * j_max
+        accels = None
+    else:
+        # трапеция: участки рывка нулевой длины, ускорение на участках постоянно
+        jerks = np.zeros(7)
+        accels = np.array([0.0, a_max, 0.0, 0.0, 0.0, -a_max, 0.0])
+
+    # состояние (s, ṡ, s̈) в начале каждого участка
+    starts = np.concatenate([[0.0], np.cumsum(durations)])
+    state = np.zeros((7, 3))
+    s, sd, sdd = 0.0, 0.0, 0.0
+    for k, (T, jk) in enumerate(zip(durations, jerks)):
+        if accels is not None:
+            sdd = accels[k]
+        state[k] = s, sd, sdd
+        s += sd * T + sdd * T ** 2 / 2 + jk * T ** 3 / 6
+        sd += sdd * T + jk * T ** 2 / 2
+        sdd += jk * T
+
+    T_total = starts[-1]
+    n = max(1, int(np.ceil(T_total / dt - 1e-9)))
+    t = np.minimum(np.arange(n + 1) * dt, T_total)
+
+    k = np.clip(np.searchsorted(starts, t, side="right") - 1, 0, 6)
+    tau = t - starts[k]
+    jk = jerks[k]
+    s0, sd0, sdd0 = state[k].T
+    s_t = s0 + sd0 * tau + sdd0 * tau ** 2 / 2 + jk * tau ** 3 / 6
+    sd_t = sd0 + sdd0 * tau + jk * tau ** 2 / 2
+    sdd_t = sdd0 + jk * tau
+
+    # последний отсчёт — точно в цели и в покое
+    s_t[-1], sd_t[-1], sdd_t[-1] = distance, 0.0, 0.0
+    return s_t, sd_t, sdd_t
+
+
+def jtraj(q_start: ArrayLike, q_goal: ArrayLike, steps: int) -> np.ndarray:
+    """
+    Полином 5-й степени «покой → покой» (как ``roboticstoolbox.jtraj`` с нулевыми
+    скоростями на концах): q(s) = q0 + (q1 - q0)(10s³ - 15s⁴ + 6s⁵), s — равномерно на [0, 1].
+
+    :return: q формы (steps, n)
+    """
+    q_start = np.asarray(q_start, dtype=float)
+    s = np.linspace(0.0, 1.0, int(steps))
+    blend = s ** 3 * (10.0 - 15.0 * s + 6.0 * s ** 2)
+    return q_start + blend[:, None] * (np.asarray(q_goal, dtype=float) - q_start)
+
+
+def resample(trajectory: ArrayLike, s: ArrayLike) -> np.ndarray:
+    """
+    Отсчёты траектории в дробных номерах s (кубическая интерполяция Эрмита по отсчётам
+    и разностным скоростям): путь тот же, меняется только расстановка во времени.
+
+    :param s: номера отсчётов (M,), 0 ≤ s ≤ N - 1
+    :return: (M, n)
+    """
+    q = np.asarray(trajectory, dtype=float)
+    if len(q) < 2:
+        return q[np.zeros(len(np.atleast_1d(s)), dtype=int)]
+    v = np.gradient(q, axis=0)
+    s = np.asarray(s, dtype=float)
+    i = np.clip(s.astype(int), 0, len(q) - 2)
+    w = (s - i)[:, None]
+    w2, w3 = w * w, w * w * w
+    return ((2 * w3 - 3 * w2 + 1) * q[i] + (w3 - 2 * w2 + w) * v[i]
+            + (-2 * w3 + 3 * w2) * q[i + 1] + (w3 - w2) * v[i + 1])
+
+
+def retime(trajectory: ArrayLike, factor: ArrayLike, window: int = 1) -> np.ndarray:
+    """
+    Местное замедление: время у отсчёта i растягивается в factor[i] раз (factor ≥ 1),
+    путь не меняется, отсчёты — с прежним шагом. Чтобы скорость менялась плавно,
+    множители расширяются на window отсчётов (скользящий максимум) и сглаживаются
+    скользящим средним того же окна.
+
+    :param factor: множители замедления (N,)
+    :return: траектория (исходная, если замедлять нечего)
+    """
+    q = np.asarray(trajectory, dtype=float)
+    f = np.maximum(np.asarray(factor, dtype=float), 1.0)
+    if len(q) < 2 or np.all(f <= 1.0):
+        return q
+    if window > 1:
+        half = window // 2
+        padded = np.pad(f, (half, window - 1 - half), mode="edge")
+        f = np.lib.stride_tricks.sliding_window_view(padded, window).max(axis=1)
+        c = np.concatenate([[0.0], np.cumsum(np.pad(f, (half, window - 1 - half), mode="edge"))])
+        f = (c[window:] - c[:-window]) / window
+
+    # время (в шагах) прихода в каждый исходный отсчёт → исходные номера для новых шагов
+    t = np.concatenate([[0.0], np.cumsum(0.5 * (f[:-1] + f[1:]))])
+    steps = np.arange(int(np.ceil(t[-1] - 1e-9)) + 1, dtype=float)
+    steps[-1] = t[-1]
+    return resample(q, np.interp(steps, t, np.arange(len(q), dtype=float)))
+
+
+def ptp_profile(q_start: ArrayLike,
+                q_goal: ArrayLike,
+                qd_max: ArrayLike,
+                qdd_max: ArrayLike,
+                qddd_max: ArrayLike | None = None,
+                dt: float = 0.01) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Быстрейшее синхронное PTP-движение по прямой в пространстве суставов.
+
+    Пределы суставов переводятся в пределы параметра пути s ∈ [0, 1]
+    (лимитирует самый «медленный» по каждому ограничению сустав),
+    после чего строится S-профиль по s.
+
+    :param qd_max: пределы скоростей (n,)
+    :param qdd_max: пределы ускорений (n,)
+    :param qddd_max: пределы рывков (n,); None — без ограничения рывка (трапеция)
+    :param dt: шаг дискретизации, с
+    :return: q, qd, qdd формы (N, n)
+    """
+    q_start = np.asarray(q_start, dtype=float)
+    delta = np.asarray(q_goal, dtype=float) - q_start
+    moving = np.abs(delta) > 1e-12
+    if not np.any(moving):
+        q = np.tile(q_start, (2, 1))
+        return q, np.zeros_like(q), np.zeros_like(q)
+
+    span = np.abs(delta[moving])
+    v = np.min(np.asarray(qd_max, dtype=float)[moving] / span)
+    a = np.min(np.asarray(qdd_max, dtype=float)[moving] / span)
+    j = np.inf if qddd_max is None else np.min(np.asarray(qddd_max, dtype=float)[moving] / span)
+
+    s, sd, sdd = scurve(1.0, v, a, j, dt)
+    return (q_start + s[:, None] * delta,
+            sd[:, None] * delta,
+            sdd[:, None] * delta)
+
+
+def _box(v: np.ndarray, n: int) -> np.ndarray:
+    """Скользящее среднее окном n отсчётов (полная свёртка: длина растёт на n - 1)."""
+    if n <= 1:
+        return v
+    padded = np.vstack([np.zeros((n, v.shape[1])), v, np.zeros((n - 1, v.shape[1]))])
+    c = np.cumsum(padded, axis=0)
+    return (c[n:] - c[:-n]) / n
+
+
+def _box_window(v: np.ndarray, limit: np.ndarray, dt: float) -> int:
+    """
+    Наименьшее окно скользящего среднего, после которого производная v
+    не превышает limit (сглаживание идёт из покоя и в покой).
+    """
+    edges = np.diff(np.vstack([np.zeros((1, v.shape[1])), v, np.zeros((1, v.shape[1]))]), axis=0)
+    n = max(1, int(np.ceil(np.max(np.abs(edges) / limit) / dt)))
+    while True:
+        d = np.diff(_box(np.vstack([np.zeros((1, v.shape[1])), v]), n), axis=0) / dt
+        ratio = np.max(np.abs(d) / limit)
+        if ratio <= 1.0 + 1e-9:
+            return n
+        n = int(np.ceil(n * ratio))
+
+
+def blend_profile(waypoints: ArrayLike,
+                  qd_max: ArrayLike,
+                  qdd_max: ArrayLike,
+                  qddd_max: ArrayLike | None = None,
+                  dt: float = 0.01) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Непрерывное движение через промежуточные точки без остановок в них.
+
+    Ломаная в пространстве суставов проходится с предельной синхронной скоростью
+    на каждом отрезке; профиль скорости сглаживается скользящим средним
+    (окно — по пределу ускорения, второе окно — по пределу рывка). Углы ломаной
+    скругляются параболическими (после второго окна — кубическими) сопряжениями,
+    остановка — только в первой и последней точке.
+
+    :param waypoints: точки (M, n), первая — текущая конфигурация
+    :param qd_max: пределы скоростей (n,)
+    :param qdd_max: пределы ускорений (n,)
+    :param qddd_max: пределы рывков (n,); None — без ограничения рывка
+    :param dt: шаг дискретизации, с
+    :return: q, qd, qdd формы (N, n)
+    """
+    W = np.asarray(waypoints, dtype=float)
+    qd_max = np.asarray(qd_max, dtype=float)
+    delta = np.diff(W, axis=0)
+    moving = np.max(np.abs(delta), axis=1) > 1e-12
+    delta = delta[moving]
+    if delta.shape[0] == 0:
+        q = np.tile(W[0], (2, 1))
+        return q, np.zeros_like(q), np.zeros_like(q)
+
+    # ломаная: на каждом отрезке — постоянная скорость, лимитирует самый медленный сустав
+    steps = np.maximum(1, np.ceil(np.max(np.abs(delta) / qd_max, axis=1) / dt - 1e-9)).astype(int)
+    v = np.repeat(delta / (steps * dt)[:, None], steps, axis=0)
+
+    # сглаживание коммутирует с дифференцированием: окно по рывку подбирается по ускорению
+    v = _box(v, _box_window(v, np.asarray(qdd_max, dtype=float), dt))
+    if qddd_max is not None:
+        a = np.diff(np.vstack([np.zeros((1, v.shape[1])), v]), axis=0) / dt
+        v = _box(v, _box_window(a, np.asarray(qddd_max, dtype=float), dt))
+    a = np.diff(np.vstack([np.zeros((1, v.shape[1])), v]), axis=0) / dt
+
+    q = np.vstack([W[0], W[0] + np.cumsum(v, axis=0) * dt])
+    q[-1] = W[-1]
+    zero = np.zeros((1, W.shape[1]))
+    return q, np.vstack([zero, v]), np.vstack([zero, a])
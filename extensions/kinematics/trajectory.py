@@ -0,0 +1,161 @@
+import numpy as np
+
+from typing import Any, Iterable, Iterator
+from numpy.typing import ArrayLike
+
+
+class Trajectory:
+    """
+    Траектория в суставах: все отсчёты — в одном непрерывном массиве (N, n),
+    события (хват, съёмка, метки для логов) — в разреженной таблице {индекс: {тип: значение}}.
+
+    Отсчёт без событий не хранит ничего, кроме строки массива; выдержка на месте —
+    это повторённые строки, а не сотни словарей со ссылкой на один и тот же массив.
+    """
+
+    def __init__(self, n: int = 7, capacity: int = 1024):
+        """
+        :param n: число суставов
+        :param capacity: начальный размер буфера (растёт удвоением)
+        """
+        self._q = np.empty((max(1, int(capacity)), int(n)))
+        self._len = 0
+        self._events: dict[int, dict[str, Any]] = {}
+
+    @classmethod
+    def from_array(cls,
+                   q: ArrayLike,
+                   events: dict[int, dict[str, Any]] | None = None,
+                   copy: bool = True) -> "Trajectory":
+        """
+        :param q: отсчёты (N, n)
+        :param events: таблица событий {индекс: {тип: значение}}
+        :param copy: False — использовать q как буфер без копирования (например, memory map);
+                     при добавлении отсчётов буфер будет перевыделен
+        """
+        q = np.asarray(q, dtype=float)
+        traj = cls(q.shape[1], capacity=q.shape[0] if copy else 1)
+        if copy:
+            traj.extend(q)
+        else:
+            traj._q, traj._len = q, q.shape[0]
+        for index, kinds in (events or {}).items():
+            for kind, value in kinds.items():
+                traj.add_event(index, kind, value)
+        return traj
+
+    # ------------- размер и доступ --------------
+    def __len__(self) -> int:
+        return self._len
+
+    @property
+    def n(self) -> int:
+        return self._q.shape[1]
+
+    @property
+    def q(self) -> np.ndarray:
+        """Отсчёты (N, n) — представление внутреннего буфера без копирования."""
+        return self._q[:self._len]
+
+    @property
+    def last(self) -> np.ndarray:
+        if self._len == 0:
+            raise IndexError("Trajectory: траектория пуста")
+        return self._q[self._len - 1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.q.nbytes
+
+    def __getitem__(self, item):
+        """
+        traj[i] — суставы i-го отсчёта (n,);
+        traj[a:b] — новая траектория с событиями этого участка (индексы сдвигаются).
+        """
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self._len)
+            if step != 1:
+                raise ValueError("Trajectory: срез поддерживается только с шагом 1")
+            events = {i - start: dict(kinds) for i, kinds in self._events.items() if start <= i < stop}
+            return Trajectory.from_array(self._q[start:stop], events)
+        return self.q[item]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return iter(self.q)
+
+    # ------------- добавление --------------
+    def _reserve(self, extra: int):
+        need = self._len + extra
+        if need > self._q.shape[0]:
+            buf = np.empty((max(need, 2 * self._q.shape[0]), self.n))
+            buf[:self._len] = self._q[:self._len]
+            self._q = buf
+
+    def append(self, q: ArrayLike, **events):
+        """Добавляет один отсчёт; именованные аргументы — события в нём (например, gripper=True)."""
+        self._reserve(1)
+        self._q[self._len] = q
+        self._len += 1
+        for kind, value in events.items():
+            self.add_event(self._len - 1, kind, value)
+
+    def extend(self, q: "ArrayLike | Trajectory"):
+        """
+        Добавляет блок отсчётов (M, n), например траекторию планировщика,
+        или другую траекторию вместе с её событиями.
+        """
+        if isinstance(q, Trajectory):
+            offset = self._len
+            self.extend(q.q)
+            for index, kinds in q._events.items():
+                self._events.setdefault(offset + index, {}).update(kinds)
+            return
+        q = np.asarray(q, dtype=float).reshape(-1, self.n)
+        self._reserve(q.shape[0])
+        self._q[self._len:self._len + q.shape[0]] = q
+        self._len += q.shape[0]
+
+    def hold(self, count: int):
+        """Выдержка: count раз повторяет последний отсчёт."""
+        if count <= 0:
+            return
+        last = self.last.copy()
+        self._reserve(count)
+        self._q[self._len:self._len + count] = last
+        self._len += count
+
+    def __add__(self, other: "Trajectory") -> "Trajectory":
+        return Trajectory.concatenate([self, other])
+
+    @classmethod
+    def concatenate(cls, parts: Iterable["Trajectory"]) -> "Trajectory":
+        parts = list(parts)
+        if not parts:
+            raise ValueError("Trajectory: нечего объединять")
+        out = cls(parts[0].n, capacity=sum(len(p) for p in parts))
+        for part in parts:
+            out.extend(part)
+        return out
+
+    # ------------- события --------------
+    def add_event(self, index: int, kind: str, value: Any = True):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError(f"Trajectory: нет отсчёта {index}")
+        self._events.setdefault(index, {})[kind] = value
+
+    def event(self, index: int, kind: str, default: Any = None) -> Any:
+        """Значение события kind в отсчёте index или default."""
+        return self._events.get(index, {}).get(kind, default)
+
+    def events(self, index: int) -> dict[str, Any]:
+        return self._events.get(index, {})
+
+    def event_table(self) -> dict[int, dict[str, Any]]:
+        """Копия таблицы событий {индекс: {тип: значение}} по возрастанию индекса."""
+        return {i: dict(self._events[i]) for i in sorted(self._events)}
+
+    def events_of(self, kind: str) -> list[tuple[int, Any]]:
+        """Все события типа kind: [(индекс, значение), ...] по возрастанию индекса."""
+        return sorted((i, kinds[kind]) for i, kinds in self._events.items() if kind in kinds)
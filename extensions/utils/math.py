@@ -1,7 +1,8 @@
 import numpy as np
 import math
 
-from spatialmath.base import rodrigues, r2t, tr2rpy, t2r
+from ..kinematics.collision import pose_matrix
+from ..kinematics.fk import rot_to_rpy
 
 
 __all__ = [
@@ -19,15 +20,14 @@ def deg2rad(deg: float):
 def transform_world_to_local(robot_node, global_pos, global_rot=None):
     tr = robot_node.getField("translation").getSFVec3f()
     rot = robot_node.getField("rotation").getSFRotation()
-    T_wr = r2t(rodrigues(np.asarray(rot[:3])*rot[3])); T_wr[:3,3] = tr
+    T_wr = pose_matrix(tr, rot)
     T_rw = np.linalg.inv(T_wr)
     p_loc = T_rw @ np.append(global_pos, 1.0)
     if global_rot is None:
         return p_loc[:3]
-    R_wo = rodrigues(np.asarray(global_rot[:3])*global_rot[3])
-    T_wo = r2t(R_wo)
-    R_loc = t2r(T_rw @ T_wo)
-    return p_loc[:3], tr2rpy(R_loc, order="xyz")
+    T_wo = pose_matrix((0.0, 0.0, 0.0), global_rot)
+    R_loc = (T_rw @ T_wo)[:3, :3]
+    return p_loc[:3], rot_to_rpy(R_loc)
 
 
 def to_xyzrpy(xyz: np.ndarray, rpy: np.ndarray):
@@ -57,13 +57,22 @@ def build_pick_place_commands(cords_list,
                               rpy_pick_override=None,
                               place_step_z=0.05,
                               gap=0.002,
-                              start_index=0):
+                              start_index=0,
+                              reachability=None,
+                              linear_approach=False):
+    """
+    reachability: карта досягаемости (ReachabilityMap) — объекты, у которых хотя бы одна
+                  точка движения недостижима, пропускаются с предупреждением
+    linear_approach: подход к объекту/месту и отход от них — прямолинейно ("move_linear")
+    """
+    approach = "move_linear" if linear_approach else "move"
     cmds = []
     target_pose = np.asarray(target_pose, dtype=float).reshape(-1)
     base_xyz  = target_pose[:3].copy()
     rpy_place = target_pose[3:].copy()
 
-    for i, p in enumerate(cords_list, start=start_index):
+    i = start_index
+    for p in cords_list:
         # разбор входа
         xyz, rpy_pick_auto = split_xyz_rpy(p, default_rpy=rpy_place)
         rpy_pick = rpy_pick_auto if rpy_pick_override is None else np.asarray(rpy_pick_override, float)
@@ -80,28 +89,39 @@ def build_pick_place_commands(cords_list,
 
         xyz[2] = abs(xyz[2] - 0.03)
 
+        if reachability is not None:
+            poses = np.array([to_xyzrpy(pre_pick, rpy_pick), to_xyzrpy(xyz, rpy_pick),
+                              to_xyzrpy(pre_place, rpy_place), to_xyzrpy(place_xyz, rpy_place)])
+            if not np.all(reachability.reachable_mask(poses[:, :3], poses[:, 3:])):
+                print(f"[WARN] Объект {p} вне зоны досягаемости — пропускаю.")
+                continue
+
         # подход к объекту
         cmds.append({"command": "move", "args": to_xyzrpy(pre_pick, rpy_pick)})
-        cmds.append({"command": "move", "args": to_xyzrpy(xyz, rpy_pick)})
+        cmds.append({"command": approach, "args": to_xyzrpy(xyz, rpy_pick)})
         cmds.append({"command": "grab", "args": True})
-        cmds.append({"command": "move", "args": to_xyzrpy(pre_pick, rpy_pick)})
+        cmds.append({"command": approach, "args": to_xyzrpy(pre_pick, rpy_pick)})
 
         # перенос и выкладка на слой i
         cmds.append({"command": "move", "args": to_xyzrpy(pre_place, rpy_place)})
-        cmds.append({"command": "move", "args": to_xyzrpy(place_xyz, rpy_place)})
+        cmds.append({"command": approach, "args": to_xyzrpy(place_xyz, rpy_place)})
 
         # отпуск и безопасный уход вверх
         cmds.append({"command": "grab", "args": False})
-        cmds.append({"command": "move", "args": to_xyzrpy(pre_place, rpy_place)})
+        cmds.append({"command": approach, "args": to_xyzrpy(pre_place, rpy_place)})
+        i += 1
 
     return cmds
 
 
-def build_pick_place_pairwise(pick_list, target_poses, delta_z, rpy_pick_override=None):
+def build_pick_place_pairwise(pick_list, target_poses, delta_z, rpy_pick_override=None, reachability=None,
+                              linear_approach=False):
     """
     pick_list: список целей подбора (XYZ | [XYZ,RPY] | XYZRPY)
     target_poses: список целевых поз [[x,y,z,a,b,c], ...] той же длины
     delta_z: подлёт
+    reachability: карта досягаемости — недостижимые пары пропускаются
+    linear_approach: прямолинейный подход/отход ("move_linear")
     """
     cmds_all = []
     for pick, tpose in zip(pick_list, target_poses):
@@ -112,7 +132,9 @@ def build_pick_place_pairwise(pick_list, target_poses, delta_z, rpy_pick_overrid
             rpy_pick_override=rpy_pick_override,
             place_step_z=0.0,
             gap=0.0,
-            start_index=0
+            start_index=0,
+            reachability=reachability,
+            linear_approach=linear_approach
         )
         cmds_all.extend(cmds)
     return cmds_all
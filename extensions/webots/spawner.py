@@ -1,11 +1,34 @@
-from controller import Supervisor
+import numpy as np
+
+from controller import Supervisor, Node
+from ..kinematics.collision import CollisionWorld, pose_matrix
+from ..kinematics.distance_field import DistanceField
 
 class ObstacleSpawner:
-    def __init__(self, supervisor: Supervisor):
+    def __init__(self,
+                 supervisor: Supervisor,
+                 collision_world: CollisionWorld | None = None,
+                 robot_node: Node | None = None,
+                 distance_field: DistanceField | None = None):
+        """
+        :param supervisor: супервизор Webots
+        :param collision_world: если задан — созданные препятствия регистрируются в нём
+                                (в системе базы робота) и учитываются планировщиком
+        :param distance_field: если задано — поле расстояний обновляется при создании
+                               и удалении препятствий
+        :param robot_node: узел робота для перевода мировых координат в систему базы;
+                           None — база робота совпадает с мировой системой
+        """
         self.supervisor = supervisor
         self.timestep = int(supervisor.getBasicTimeStep())
         self.root_children = supervisor.getRoot().getField("children")
         self._counter = 0
+        self.collision_world = collision_world
+        self.robot_node = robot_node
+        self.distance_field = distance_field
+
+    def _registries(self) -> list:
+        return [r for r in (self.collision_world, self.distance_field) if r is not None]
 
     def _next_def(self, prefix: str) -> str:
         self._counter += 1
@@ -25,6 +48,15 @@ class ObstacleSpawner:
         rx, ry, rz, angle = rotation
         return f"{rx} {ry} {rz} {angle}"
 
+    def _to_robot_frame(self, translation: tuple, rotation) -> np.ndarray:
+        """Поза препятствия (мировые координаты Webots) в системе базы робота."""
+        T_wo = pose_matrix(translation, rotation)
+        if self.robot_node is None:
+            return T_wo
+        T_wr = pose_matrix(self.robot_node.getField("translation").getSFVec3f(),
+                           self.robot_node.getField("rotation").getSFRotation())
+        return np.linalg.inv(T_wr) @ T_wo
+
     def _insert_and_flush(self, node_string: str):
         self.root_children.importMFNodeFromString(-1, node_string)
         for _ in range(2):
@@ -97,6 +129,9 @@ DEF {def_name} Solid {{
         geometry = f"Box {{ size {sx} {sy} {sz} }}"
         bounding = f"Box {{ size {sx} {sy} {sz} }}"
 
+        for registry in self._registries():
+            registry.add_box(def_name, self._to_robot_frame(translation, rotation), size)
+
         return self._spawn_solid(
             def_name=def_name,
             translation=translation,
@@ -125,7 +160,7 @@ DEF {def_name} Solid {{
         """
         translation: (x, y, z) в м — позиция центра
         radius: м
-        height: м — ось цилиндра совпадает с осью Y
+        height: м — ось цилиндра совпадает с осью Z
         name: кастомное имя DEF; если None — сгенерируется 'CYL_i'
         """
         def_name = name if name else self._next_def("CYL")
@@ -134,6 +169,9 @@ DEF {def_name} Solid {{
         geometry = f"Cylinder {{ radius {radius} height {height} }}"
         bounding = f"Cylinder {{ radius {radius} height {height} }}"
 
+        for registry in self._registries():
+            registry.add_cylinder(def_name, self._to_robot_frame(translation, rotation), radius, height)
+
         return self._spawn_solid(
             def_name=def_name,
             translation=translation,
@@ -147,6 +185,8 @@ DEF {def_name} Solid {{
         )
 
     def remove(self, def_name: str) -> bool:
+        for registry in self._registries():
+            registry.remove(def_name)
         node = self.supervisor.getFromDef(def_name)
         if node is None:
             return False
@@ -1,10 +1,11 @@
 from __future__ import annotations
 import numpy as np
 from controller import Node
-from spatialmath.base import rodrigues, r2t, tr2rpy
 from numpy.typing import ArrayLike
 from ..core.target import BaseTarget
 from ..utils.math import transform_world_to_local
+from ..kinematics.collision import pose_matrix
+from ..kinematics.fk import rot_to_rpy
 
 
 class WebotsTargetGizmo(BaseTarget):
@@ -22,8 +23,7 @@ class WebotsTargetGizmo(BaseTarget):
         xyz = transform_world_to_local(self._robot_node,
                                        self._tr_field.getSFVec3f())
         rot = self._rot_field.getSFRotation()  # axis‑angle
-        R = rodrigues(np.asarray(rot[:3]) * rot[3])
-        rpy = tr2rpy(r2t(R), order="xyz")
+        rpy = rot_to_rpy(pose_matrix((0.0, 0.0, 0.0), rot))
         return xyz, rpy
 
     @property
@@ -42,7 +42,6 @@ class WebotsTargetObject(BaseTarget):
         xyz = transform_world_to_local(self._robot_node,
                                        self._tr_field.getSFVec3f())
         rot = self._rot_field.getSFRotation()
-        R = rodrigues(np.asarray(rot[:3]) * rot[3])
-        rpy = tr2rpy(r2t(R), order="xyz")
+        rpy = rot_to_rpy(pose_matrix((0.0, 0.0, 0.0), rot))
         return xyz, rpy
     
\ No newline at end of file
@@ -0,0 +1,132 @@
+import numpy as np
+
+from controller import Supervisor, Node
+from ..kinematics.collision import pose_matrix
+
+
+def _field(node: Node, name: str):
+    """Поле узла; для внутренних полей PROTO — через getProtoField."""
+    field = node.getField(name)
+    if field is None and hasattr(node, "getProtoField"):
+        field = node.getProtoField(name)
+    return field
+
+
+def _world_pose(node: Node) -> np.ndarray:
+    return pose_matrix(node.getPosition(), np.array(node.getOrientation()).reshape(3, 3))
+
+
+def _local_pose(node: Node) -> np.ndarray:
+    translation, rotation = _field(node, "translation"), _field(node, "rotation")
+    return pose_matrix(translation.getSFVec3f() if translation else (0.0, 0.0, 0.0),
+                       rotation.getSFRotation() if rotation else None)
+
+
+def _primitives(node: Node | None, T: np.ndarray, out: list):
+    """Обход boundingObject: (вид, поза, параметры) для Box и Cylinder, остальная геометрия пропускается."""
+    if node is None:
+        return
+    kind = node.getBaseTypeName()
+    if kind == "Box":
+        out.append(("box", T, _field(node, "size").getSFVec3f()))
+    elif kind == "Cylinder":
+        out.append(("cylinder", T, (_field(node, "radius").getSFFloat(), _field(node, "height").getSFFloat())))
+    elif kind == "Shape":
+        _primitives(_field(node, "geometry").getSFNode(), T, out)
+    elif kind in ("Group", "Transform", "Pose"):
+        if kind != "Group":
+            T = T @ _local_pose(node)
+        children = _field(node, "children")
+        for i in range(children.getCount()):
+            _primitives(children.getMFNode(i), T, out)
+
+
+def _limiter_panels(node: Node) -> list:
+    """
+    Панели WorkspaceLimiter (у PROTO нет boundingObject): сетка countLimiter блоков
+    1.25 x 0.01 x 1 м с шагом spacing, масштаб scale — как в WorkspaceLimiter.proto.
+    """
+    cx, cy = _field(node, "countLimiter").getSFVec2f()
+    sx, sy, sz = _field(node, "scale").getSFVec3f()
+    spacing = _field(node, "spacing").getSFFloat()
+    if spacing <= 0:
+        spacing = 0.02
+    width, depth, height = 1.25, 0.01, 1.0
+
+    panels = []
+    for i in range(int(cx)):
+        for j in range(int(cy)):
+            x = (i * (width + spacing) - (cx - 1) * (width + spacing) / 2) * sx
+            z = (j * (height + spacing) - (cy - 1) * (height + spacing) / 2) * sy
+            panels.append(("box", pose_matrix((x, 0.0, z)), (width * sx, depth * sy, height * sz)))
+    return panels
+
+
+def _is_static(node: Node) -> bool:
+    """Неподвижное тело: без физики или закреплённое (locked)."""
+    physics, locked = _field(node, "physics"), _field(node, "locked")
+    return physics is None or physics.getSFNode() is None or (locked is not None and locked.getSFBool())
+
+
+def _solids(children, skip: set):
+    """Тела верхнего уровня сцены (с заходом в группы)."""
+    for i in range(children.getCount()):
+        node = children.getMFNode(i)
+        kind = node.getBaseTypeName()
+        if node.getId() in skip:
+            continue
+        if kind in ("Solid", "Robot"):
+            yield node
+        elif kind in ("Group", "Transform", "Pose"):
+            yield from _solids(node.getField("children"), skip)
+
+
+def add_static_solids(supervisor: Supervisor,
+                      target,
+                      robot_node: Node | None = None,
+                      names: list[str] | None = None) -> list[str]:
+    """
+    Регистрирует неподвижные тела сцены (стол, ограждения WorkspaceLimiter и т.п.)
+    как препятствия в системе базы робота.
+
+    Берутся параллелепипеды и цилиндры из boundingObject; для WorkspaceLimiter,
+    у которого boundingObject нет, — панели ограждения по полям PROTO.
+
+    :param supervisor: супервизор Webots
+    :param target: куда регистрировать — DistanceField или CollisionWorld (add_box / add_cylinder)
+    :param robot_node: узел робота (пропускается; его база — система координат препятствий);
+                       None — мировая система
+    :param names: имена или DEF тел; None — все неподвижные тела (без физики или locked)
+    :return: имена зарегистрированных препятствий ("<тело>/<k>")
+    """
+    T_base = np.eye(4) if robot_node is None else np.linalg.inv(_world_pose(robot_node))
+    skip = set() if robot_node is None else {robot_node.getId()}
+
+    registered = []
+    for node in _solids(supervisor.getRoot().getField("children"), skip):
+        name_field = _field(node, "name")
+        name = node.getDef() or (name_field.getSFString() if name_field else node.getTypeName())
+        if names is not None:
+            if name not in names and (name_field is None or name_field.getSFString() not in names):
+                continue
+        elif not _is_static(node):
+            continue
+
+        if node.getTypeName() == "WorkspaceLimiter":
+            primitives = _limiter_panels(node)
+        else:
+            primitives = []
+            bounding = _field(node, "boundingObject")
+            _primitives(bounding.getSFNode() if bounding else None, np.eye(4), primitives)
+
+        T = T_base @ _world_pose(node)
+        for k, (kind, pose, params) in enumerate(primitives):
+            key = f"{name}/{k}"
+            if kind == "box":
+                target.add_box(key, T @ pose, params)
+            else:
+                target.add_cylinder(key, T @ pose, *params)
+            registered.append(key)
+
+    print(f"[INFO] Неподвижных препятствий в сцене: {len(registered)}")
+    return registered